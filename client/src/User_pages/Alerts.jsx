@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import Header from '../components/U_Header';
 import api from '../utils/api';
+import { subscribeAlerts } from '../utils/alertStream';
 
 const filterOptions = [
   { label: 'Unseen', value: 'unseen' },
@@ -17,25 +18,24 @@ const Alerts = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
-  // Fetch alerts and cameras on mount and periodically
+  // Fetch cameras once; alerts arrive over the event stream
   useEffect(() => {
-    let intervalId;
-    const fetchData = async () => {
-      try {
-        const [alertsRes, camerasRes] = await Promise.all([
-          api.get('/api/alerts'),
-          api.get('/api/cameras')
-        ]);
-        setAlerts(alertsRes.data);
-        setCameras(camerasRes.data);
-      } catch (err) {
+    api.get('/api/cameras')
+      .then(res => setCameras(res.data))
+      .catch(() => setError('Failed to fetch alerts or cameras.'));
+
+    return subscribeAlerts({
+      onSnapshot: (data) => {
+        setAlerts(data);
+        setLoading(false);
+      },
+      onAlert: (alert) => setAlerts(prev => (prev.some(a => a._id === alert._id) ? prev : [...prev, alert])),
+      onSeen: ({ _id }) => setAlerts(prev => prev.map(a => a._id === _id ? { ...a, seen: true } : a)),
+      onError: () => {
         setError('Failed to fetch alerts or cameras.');
-      }
-      setLoading(false);
-    };
-    fetchData();
-    intervalId = setInterval(fetchData, 5000); // Fetch every 5 seconds
-    return () => clearInterval(intervalId);
+        setLoading(false);
+      },
+    });
   }, []);
 
   const filteredAlerts = alerts.filter(alert => {
@@ -1,7 +1,9 @@
 import React, { useRef, useState, useEffect } from 'react';
 import Header from '../components/U_Header';
+import LiveVideo from '../components/LiveVideo';
 import { useLocation, useNavigate, useParams } from 'react-router-dom';
 import api from '../utils/api';
+import { subscribeAlerts } from '../utils/alertStream';
 
 const CameraDetails = () => {
   const location = useLocation();
@@ -48,27 +50,22 @@ const CameraDetails = () => {
     };
   }, [camera?._id, params.id]);
 
-  // Fetch alerts periodically
+  // Alerts for this camera, kept current from the alert event stream
   useEffect(() => {
     if (!camera?._id) return;
-
-    const fetchAlerts = async () => {
-      try {
-        const alertsRes = await api.get(`/api/alerts`);
-        const cameraAlerts = alertsRes.data.filter(a => a.camera?._id === camera._id);
-        setAlerts(cameraAlerts);
-      } catch (err) {
+    const forCamera = (a) => (a.camera?._id || a.camera) === camera._id;
+
+    return subscribeAlerts({
+      onSnapshot: (data) => setAlerts(data.filter(forCamera)),
+      onAlert: (alert) => {
+        if (forCamera(alert)) setAlerts(prev => (prev.some(a => a._id === alert._id) ? prev : [...prev, alert]));
+      },
+      onSeen: ({ _id }) => setAlerts(prev => prev.map(a => a._id === _id ? { ...a, seen: true } : a)),
+      onError: (err) => {
         console.error('Failed to fetch alerts:', err);
         setAlerts([]); // Reset to empty array on error
-      }
-    };
-
-    // Fetch immediately
-    fetchAlerts();
-
-    // Then fetch every 5 seconds
-    const interval = setInterval(fetchAlerts, 5000);
-    return () => clearInterval(interval);
+      },
+    });
   }, [camera?._id]);
 
   // Sync mute state after fullscreen changes
@@ -148,13 +145,9 @@ const CameraDetails = () => {
         <div className='w-full max-w-3xl bg-white bg-opacity-90 rounded-3xl shadow-lg p-8 mt-8 animate-fade-in '>
           <h2 className='text-3xl font-bold text-blue-800 mb-6 text-center'>Camera Details</h2>
           <div className='mb-6 flex flex-col items-center'>
-            <div className='w-full h-80 bg-gray-200 rounded-xl flex items-center justify-center overflow-hidden mb-3 '>
+            <div className='relative w-full h-80 bg-gray-200 rounded-xl flex items-center justify-center overflow-hidden mb-3 '>
               {camera?.status === 'active' ? (
-                 <img
-                 src={`http://localhost:5000/api/cameras/${camera._id}/video_feed`}
-                 alt="Live Cacmera"
-                 className='w-full h-full object-cover rounded-xl'
-               />
+                <LiveVideo cameraId={camera._id} className='rounded-xl' />
               ) : (
                 <span className='text-gray-400 text-lg'>Offline</span>
               )}
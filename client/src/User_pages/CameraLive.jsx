@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import Header from '../components/U_Header';
+import MjpegView from '../components/MjpegView';
 import { useNavigate } from 'react-router-dom';
 import api from '../utils/api';
 
@@ -56,13 +57,9 @@ const CameraLive = () => {
               key={camera._id}
               className={`rounded-2xl shadow-lg bg-white bg-opacity-90 p-4 flex flex-col items-center transition-transform duration-300 hover:scale-105`}
             >
-              <div className='w-full h-48 bg-gray-200 rounded-xl flex items-center justify-center overflow-hidden mb-3 '>
+              <div className='relative w-full h-48 bg-gray-200 rounded-xl flex items-center justify-center overflow-hidden mb-3 '>
                 {camera?.status === 'active' ? (
-                  <img
-                    src={`http://localhost:5000/api/cameras/${camera._id}/video_feed`}
-                    alt="Live Camera"
-                    className='w-full h-full object-cover rounded-xl'
-                  />
+                  <MjpegView cameraId={camera._id} query='w=480&q=70&fps=10' className='rounded-xl' />
                 ) : (
                   <span className='text-gray-400 text-lg'>Offline</span>
                 )}
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import Header from '../components/U_Header';
 import { Link } from 'react-router-dom';
 import api from '../utils/api';
+import { subscribeAlerts } from '../utils/alertStream';
 
 const Dashboard = () => {
   const [cameras, setCameras] = useState([]);
@@ -10,21 +11,26 @@ const Dashboard = () => {
   const [error, setError] = useState('');
 
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const [camsRes, alertsRes] = await Promise.all([
-          api.get('/api/cameras'),
-          api.get('/api/alerts')
-        ]);
-        setCameras(camsRes.data);
-        setAlerts(alertsRes.data);
-      } catch (err) {
+    api.get('/api/cameras')
+      .then(res => setCameras(res.data))
+      .catch(err => {
         console.error('Error fetching dashboard data:', err);
         setError('Failed to fetch dashboard data.');
-      }
-      setLoading(false);
-    };
-    fetchData();
+      });
+
+    return subscribeAlerts({
+      onSnapshot: (data) => {
+        setAlerts(data);
+        setLoading(false);
+      },
+      onAlert: (alert) => setAlerts(prev => (prev.some(a => a._id === alert._id) ? prev : [...prev, alert])),
+      onSeen: ({ _id }) => setAlerts(prev => prev.map(a => a._id === _id ? { ...a, seen: true } : a)),
+      onError: (err) => {
+        console.error('Error fetching dashboard data:', err);
+        setError('Failed to fetch dashboard data.');
+        setLoading(false);
+      },
+    });
   }, []);
 
   const activeCameras = cameras.filter(c => c.status === 'active').length;
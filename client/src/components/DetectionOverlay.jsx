@@ -0,0 +1,124 @@
+import React, { useEffect, useRef } from 'react';
+
+const COLORS = {
+  person: '#00ff00',
+  car: '#0000ff',
+  zone: '#ffff00',
+  zoneOccupied: '#ff0000',
+};
+
+const draw = (canvas, meta, fit) => {
+  const width = canvas.clientWidth;
+  const height = canvas.clientHeight;
+  if (canvas.width !== width) canvas.width = width;
+  if (canvas.height !== height) canvas.height = height;
+
+  // Coordinates are in the processing frame (meta.size), which is the camera
+  // frame resized without keeping its aspect ratio. The MJPEG feed shows that
+  // frame; the HLS pass-through shows the camera's own (meta.source).
+  const [frameW, frameH] = meta.size;
+  const [shownW, shownH] = fit === 'contain' && meta.source ? meta.source : meta.size;
+  const scale = (fit === 'contain' ? Math.min : Math.max)(width / shownW, height / shownH);
+  const offsetX = (width - shownW * scale) / 2;
+  const offsetY = (height - shownH * scale) / 2;
+  const scaleX = (shownW * scale) / frameW;
+  const scaleY = (shownH * scale) / frameH;
+  const tx = (x) => offsetX + x * scaleX;
+  const ty = (y) => offsetY + y * scaleY;
+
+  const ctx = canvas.getContext('2d');
+  ctx.clearRect(0, 0, width, height);
+  ctx.lineWidth = 2;
+  ctx.font = '12px sans-serif';
+
+  meta.zones.forEach(zone => {
+    ctx.strokeStyle = zone.occupied ? COLORS.zoneOccupied : COLORS.zone;
+    ctx.beginPath();
+    zone.points.forEach(([x, y], i) => (i === 0 ? ctx.moveTo(tx(x), ty(y)) : ctx.lineTo(tx(x), ty(y))));
+    ctx.closePath();
+    ctx.stroke();
+  });
+
+  meta.detections.forEach(det => {
+    const [x1, y1, x2, y2] = det.box;
+    const color = COLORS[det.label] || COLORS.person;
+    ctx.strokeStyle = color;
+    ctx.fillStyle = color;
+    ctx.strokeRect(tx(x1), ty(y1), (x2 - x1) * scaleX, (y2 - y1) * scaleY);
+    ctx.fillText(`#${det.id} ${det.label} ${det.conf.toFixed(2)}`, tx(x1), ty(y1) - 4);
+  });
+};
+
+// Draws detection boxes and zones from the camera metadata stream on top of a
+// clean video feed. `fit` is how the video under it is scaled: 'cover' for the
+// MJPEG <img> (object-cover), 'contain' for the letterboxed HLS player.
+// `getSeq` returns the sequence number of the frame on screen (MjpegView reads it
+// from X-Frame-Seq); the overlay then draws the metadata for exactly that frame.
+// Without it (HLS), metadata is timed by its detector timestamp: the offset between
+// the detector's clock and the browser's is estimated from the stream, and
+// `getDelay` gives how many seconds the video lags behind live (HLS buffering).
+// `skipIfAnnotated` is for the MJPEG feed, whose frames may already have boxes
+// burned in by the server; the HLS pass-through is always clean.
+const DetectionOverlay = ({ cameraId, getSeq, getDelay, skipIfAnnotated = false, fit = 'cover', className = '' }) => {
+  const canvasRef = useRef(null);
+
+  useEffect(() => {
+    if (!cameraId) return;
+    const source = new EventSource(`http://localhost:5000/api/cameras/${cameraId}/metadata`);
+    const queue = [];
+    // Browser time minus detector time for recent records; the smallest is the
+    // clock offset plus the lowest delivery latency seen
+    const offsets = [];
+    let drawn = null;
+    let rafId;
+
+    source.addEventListener('frame', (event) => {
+      const meta = JSON.parse(event.data);
+      // The worker restarted and its frame numbers started over
+      if (queue.length && meta.seq < queue[queue.length - 1].seq) queue.length = 0;
+      queue.push(meta);
+      if (queue.length > 300) queue.splice(0, queue.length - 300);
+      offsets.push(Date.now() / 1000 - meta.ts);
+      if (offsets.length > 100) offsets.shift();
+    });
+
+    // Metadata record for the frame on screen, or null to keep what is drawn
+    const current = () => {
+      if (getSeq) {
+        const seq = getSeq();
+        if (seq === null) return null;
+        while (queue.length && queue[0].seq < seq) queue.shift();
+        return queue.length && queue[0].seq === seq ? queue[0] : null;
+      }
+      if (!offsets.length) return null;
+      const target = Date.now() / 1000 - Math.min(...offsets) - (getDelay ? getDelay() : 0);
+      while (queue.length > 1 && queue[1].ts <= target) queue.shift();
+      return queue.length && queue[0].ts <= target ? queue[0] : null;
+    };
+
+    const tick = () => {
+      const meta = current();
+      const canvas = canvasRef.current;
+      if (canvas && meta && meta !== drawn) {
+        if (skipIfAnnotated && meta.annotated) {
+          // The server already drew these into the MJPEG frame
+          canvas.getContext('2d').clearRect(0, 0, canvas.width, canvas.height);
+        } else {
+          draw(canvas, meta, fit);
+        }
+        drawn = meta;
+      }
+      rafId = requestAnimationFrame(tick);
+    };
+    rafId = requestAnimationFrame(tick);
+
+    return () => {
+      cancelAnimationFrame(rafId);
+      source.close();
+    };
+  }, [cameraId, getSeq, getDelay, skipIfAnnotated, fit]);
+
+  return <canvas ref={canvasRef} className={`absolute inset-0 w-full h-full pointer-events-none ${className}`} />;
+};
+
+export default DetectionOverlay;
@@ -0,0 +1,58 @@
+import React, { useCallback, useEffect, useRef, useState } from 'react';
+import videojs from 'video.js';
+import 'video.js/dist/video-js.css';
+import DetectionOverlay from './DetectionOverlay';
+import MjpegView from './MjpegView';
+
+// Live camera view. Plays the camera's own H.264 through the HLS pass-through
+// (no server-side re-encode) and draws detections client-side. Falls back to the
+// MJPEG feed if HLS is not available for this camera.
+const LiveVideo = ({ cameraId, className = '' }) => {
+  const videoRef = useRef(null);
+  const playerRef = useRef(null);
+  const [fallback, setFallback] = useState(false);
+
+  useEffect(() => {
+    if (!cameraId || fallback || !videoRef.current) return;
+    const player = videojs(videoRef.current, {
+      autoplay: 'muted',
+      controls: false,
+      liveui: true,
+      fill: true,
+      html5: { vhs: { overrideNative: true } },
+      sources: [{
+        src: `http://localhost:5000/api/cameras/${cameraId}/hls/index.m3u8`,
+        type: 'application/x-mpegURL',
+      }],
+    });
+    player.on('error', () => setFallback(true));
+    playerRef.current = player;
+
+    return () => {
+      player.dispose();
+      playerRef.current = null;
+    };
+  }, [cameraId, fallback]);
+
+  const getDelay = useCallback(() => {
+    const player = playerRef.current;
+    if (!player || !player.liveTracker) return 0;
+    const behind = player.liveTracker.liveCurrentTime() - player.currentTime();
+    return Number.isFinite(behind) && behind > 0 ? behind : 0;
+  }, []);
+
+  if (fallback) {
+    return <MjpegView cameraId={cameraId} className={className} />;
+  }
+
+  return (
+    <>
+      <div data-vjs-player className='w-full h-full'>
+        <video ref={videoRef} className={`video-js w-full h-full object-contain ${className}`} muted playsInline />
+      </div>
+      <DetectionOverlay cameraId={cameraId} getDelay={getDelay} fit='contain' className={className} />
+    </>
+  );
+};
+
+export default LiveVideo;
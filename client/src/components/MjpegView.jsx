@@ -0,0 +1,109 @@
+import React, { useCallback, useEffect, useRef } from 'react';
+import DetectionOverlay from './DetectionOverlay';
+
+const RETRY_MS = 2000;
+
+const headerEnd = (buffer) => {
+  for (let i = 0; i + 3 < buffer.length; i++) {
+    if (buffer[i] === 13 && buffer[i + 1] === 10 && buffer[i + 2] === 13 && buffer[i + 3] === 10) return i;
+  }
+  return -1;
+};
+
+// Reads a multipart/x-mixed-replace MJPEG body and calls onPart(seq, jpegBytes)
+// with each part's X-Frame-Seq header, which an <img> tag would throw away.
+const readParts = async (response, onPart) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder('latin1');
+  let buffer = new Uint8Array(0);
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) return;
+    const joined = new Uint8Array(buffer.length + value.length);
+    joined.set(buffer);
+    joined.set(value, buffer.length);
+    buffer = joined;
+
+    for (;;) {
+      const end = headerEnd(buffer);
+      if (end === -1) break;
+      const headers = decoder.decode(buffer.subarray(0, end));
+      const length = /content-length:\s*(\d+)/i.exec(headers);
+      const seq = /x-frame-seq:\s*(\d+)/i.exec(headers);
+      const start = end + 4;
+      if (!length) {
+        buffer = buffer.slice(start);
+        continue;
+      }
+      const size = Number(length[1]);
+      if (buffer.length < start + size) break;
+      onPart(seq ? Number(seq[1]) : null, buffer.slice(start, start + size));
+      buffer = buffer.slice(start + size);
+    }
+  }
+};
+
+// MJPEG live view read with fetch instead of <img src>, so the overlay can be
+// matched to the exact frame on screen by sequence number rather than by
+// comparing the detector host's clock with the browser's.
+// `query` is passed through to the feed (e.g. 'w=480&q=70&fps=10').
+const MjpegView = ({ cameraId, query = '', className = '' }) => {
+  const imgRef = useRef(null);
+  const seqRef = useRef(null);
+  const src = `http://localhost:5000/api/cameras/${cameraId}/video_feed${query ? `?${query}` : ''}`;
+
+  useEffect(() => {
+    const controller = new AbortController();
+    const img = imgRef.current;
+    let shownUrl = null;
+    let pendingUrl = null;
+    let retryTimer;
+
+    img.onload = () => {
+      if (img.src !== pendingUrl) return;
+      if (shownUrl) URL.revokeObjectURL(shownUrl);
+      shownUrl = pendingUrl;
+      pendingUrl = null;
+      seqRef.current = img.dataset.seq === '' ? null : Number(img.dataset.seq);
+    };
+
+    const show = (seq, jpeg) => {
+      // Frames can arrive faster than they decode; only the newest one is kept
+      if (pendingUrl) URL.revokeObjectURL(pendingUrl);
+      pendingUrl = URL.createObjectURL(new Blob([jpeg], { type: 'image/jpeg' }));
+      img.dataset.seq = seq === null ? '' : String(seq);
+      img.src = pendingUrl;
+    };
+
+    const connect = async () => {
+      try {
+        const response = await fetch(src, { signal: controller.signal });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        await readParts(response, show);
+      } catch (err) {
+        if (controller.signal.aborted) return;
+        console.error('MJPEG stream error:', err.message);
+      }
+      if (!controller.signal.aborted) retryTimer = setTimeout(connect, RETRY_MS);
+    };
+    connect();
+
+    return () => {
+      controller.abort();
+      clearTimeout(retryTimer);
+      img.onload = null;
+      [shownUrl, pendingUrl].forEach(url => url && URL.revokeObjectURL(url));
+    };
+  }, [src]);
+
+  const getSeq = useCallback(() => seqRef.current, []);
+
+  return (
+    <>
+      <img ref={imgRef} alt='Live Camera' className={`w-full h-full object-cover ${className}`} />
+      <DetectionOverlay cameraId={cameraId} getSeq={getSeq} skipIfAnnotated className={className} />
+    </>
+  );
+};
+
+export default MjpegView;
@@ -0,0 +1,37 @@
+import api from './api';
+
+// Loads the alert list once, then keeps it current from the server's event
+// stream (new alerts + seen changes) instead of polling the whole collection.
+// The browser resends Last-Event-ID on reconnect, so only the delta is replayed;
+// a 'reset' event means the delta is unavailable and the list is reloaded.
+export const subscribeAlerts = ({ onSnapshot, onAlert, onSeen, onError }) => {
+  let source = null;
+  let closed = false;
+
+  const connect = async () => {
+    try {
+      const res = await api.get('/api/alerts');
+      if (closed) return;
+      onSnapshot(res.data);
+
+      const lastEventId = res.headers['x-last-event-id'] || '';
+      source = new EventSource(
+        `${api.defaults.baseURL}/api/alerts/stream?lastEventId=${encodeURIComponent(lastEventId)}`
+      );
+      source.addEventListener('alert', (event) => onAlert && onAlert(JSON.parse(event.data)));
+      source.addEventListener('seen', (event) => onSeen && onSeen(JSON.parse(event.data)));
+      source.addEventListener('reset', () => {
+        source.close();
+        connect();
+      });
+    } catch (err) {
+      if (onError) onError(err);
+    }
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    if (source) source.close();
+  };
+};
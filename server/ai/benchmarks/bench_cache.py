@@ -0,0 +1,116 @@
+"""Detection cache benchmark on recorded footage (night / static-lot clips).
+
+Runs the real detector on every sampled frame once, then replays the clip
+through DetectionCache at several hash distances. For each setting it reports
+the hit rate, the detector calls saved, and how many hits returned stale
+results (person count changed, or a person box moved by IoU < 0.5 compared to
+a fresh detection), which is the cost of the cache.
+
+    python benchmarks/bench_cache.py --video night_lot.mp4 --distances 0 4 6 10
+    python benchmarks/bench_cache.py --video night_lot.mp4 --no-model   # hit rate only
+
+Cache time follows the clip's own timestamps, so TTL behaves as it would live.
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observo.cache import DetectionCache  # noqa: E402
+from observo.config import FRAME_SIZE, FRAME_SKIP, MODEL_PATH  # noqa: E402
+
+
+def load_frames(path, limit, skip):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    frames, index = [], 0
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        index += 1
+        if index % skip == 0:
+            frames.append((index / fps, cv2.resize(frame, FRAME_SIZE)))
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read frames from {path}")
+    return frames
+
+
+def iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def is_stale(cached, fresh):
+    cached_people = [box for label, box, _ in cached if label == 'person']
+    fresh_people = [box for label, box, _ in fresh if label == 'person']
+    if len(cached_people) != len(fresh_people):
+        return True
+    return any(max((iou(box, other) for other in cached_people), default=0.0) < 0.5
+               for box in fresh_people)
+
+
+def replay(frames, hashes, fresh, max_distance, args):
+    clock = {"now": 0.0}
+    cache = DetectionCache(ttl=args.ttl, max_distance=max_distance, max_reuse=args.max_reuse,
+                           clock=lambda: clock["now"])
+    stale = 0
+    for i, (ts, _) in enumerate(frames):
+        clock["now"] = ts
+        cached = cache.lookup(hashes[i])
+        if cached is None:
+            cache.store(hashes[i], fresh[i])
+        elif is_stale(cached, fresh[i]):
+            stale += 1
+    return cache.stats(), stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detection cache benchmark')
+    parser.add_argument('--video', required=True, help='Recorded camera footage')
+    parser.add_argument('--frames', type=int, default=2000, help='Max sampled frames to use')
+    parser.add_argument('--skip', type=int, default=FRAME_SKIP, help='Sample every Nth frame, like the monitor')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--no-model', action='store_true',
+                        help='Skip the detector: report hit rates only (every result counts as empty)')
+    parser.add_argument('--distances', type=int, nargs='+', default=[0, 2, 4, 6, 8, 12])
+    parser.add_argument('--ttl', type=float, default=2.0)
+    parser.add_argument('--max-reuse', type=int, default=10)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.skip)
+    hasher = DetectionCache()
+    start = time.perf_counter()
+    hashes = [hasher.hash(frame) for _, frame in frames]
+    hash_ms = (time.perf_counter() - start) * 1000 / len(frames)
+
+    model_ms = 0.0
+    if args.no_model:
+        fresh = [[] for _ in frames]
+    else:
+        from observo.detector import Detector
+        detector = Detector(args.model)
+        detector.warm_up(FRAME_SIZE)
+        start = time.perf_counter()
+        fresh = [detector.detect(frame) for _, frame in frames]
+        model_ms = (time.perf_counter() - start) * 1000 / len(frames)
+
+    print(f"{len(frames)} frames from {args.video}; hash {hash_ms:.2f} ms/frame"
+          + ("" if args.no_model else f", detector {model_ms:.1f} ms/frame") + "\n")
+    print(f"{'distance':>8}{'hit rate':>10}{'detect calls':>14}{'stale hits':>12}{'est ms/frame':>14}")
+    for distance in args.distances:
+        stats, stale = replay(frames, hashes, fresh, distance, args)
+        est = hash_ms + model_ms * (1 - stats['hit_rate'])
+        stale_cell = '-' if args.no_model else f"{stale} ({stale / len(frames):.1%})"
+        print(f"{distance:>8}{stats['hit_rate']:>10.1%}{stats['misses']:>14}{stale_cell:>12}{est:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Decode cost per camera: OpenCV full-resolution decode + resize vs. the ffmpeg capture backend.
+
+For each mode, decodes up to --frames frames of a clip (or a camera URL for
+--seconds) and reports frames/s and CPU milliseconds per delivered frame.
+CPU is measured across all decode threads: this process for OpenCV, the
+ffmpeg child (from /proc) for the others.
+
+    python benchmarks/bench_decode.py --video lot_1080p.mp4
+    python benchmarks/bench_decode.py --video rtsp://cam/stream --seconds 30 --threads 1 2 4
+
+Keyframe-only mode delivers one frame per GOP. Its CPU per second of video,
+not per frame, is what an idle camera costs.
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observo.capture import FfmpegCapture, process_cpu_seconds  # noqa: E402
+from observo.config import FRAME_SIZE  # noqa: E402
+
+
+def bench_opencv(source, frames, seconds):
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    cpu_start, start, count = time.process_time(), time.perf_counter(), 0
+    while count < frames and time.perf_counter() - start < seconds:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        cv2.resize(frame, FRAME_SIZE)
+        count += 1
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return count, elapsed, time.process_time() - cpu_start
+
+
+def bench_ffmpeg(source, frames, seconds, threads, lowres, keyframes_only):
+    cap = FfmpegCapture(source, threads=threads, lowres=lowres)
+    if keyframes_only:
+        cap.release()
+        cap.keyframes_only = True
+        cap.open()
+    if not cap.isOpened():
+        raise SystemExit("ffmpeg not available")
+    start, count = time.perf_counter(), 0
+    cpu = None
+    while count < frames and time.perf_counter() - start < seconds:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        count += 1
+        # Sample before the process exits at end of file
+        cpu = process_cpu_seconds(cap.process.pid) or cpu
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return count, elapsed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode backend benchmark')
+    parser.add_argument('--video', required=True, help='Clip or camera URL')
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--lowres', type=int, default=0, help='Also pass -lowres N (MJPEG/MPEG-4 only)')
+    args = parser.parse_args()
+
+    print(f"{'mode':<28} {'frames':>7} {'frames/s':>9} {'cpu ms/frame':>13} {'cpu %/core':>11}")
+
+    def report(name, count, elapsed, cpu):
+        per_frame = f"{1000 * cpu / count:13.2f}" if cpu is not None and count else f"{'n/a':>13}"
+        share = f"{100 * cpu / elapsed:11.1f}" if cpu is not None and elapsed else f"{'n/a':>11}"
+        print(f"{name:<28} {count:>7} {count / elapsed if elapsed else 0:>9.1f} {per_frame} {share}")
+
+    report("opencv + resize", *bench_opencv(args.video, args.frames, args.seconds))
+    for threads in args.threads:
+        report(f"ffmpeg scaled, {threads} thread(s)",
+               *bench_ffmpeg(args.video, args.frames, args.seconds, threads, args.lowres, False))
+    report("ffmpeg keyframes only",
+           *bench_ffmpeg(args.video, args.frames, args.seconds, args.threads[-1], args.lowres, True))
+
+
+if __name__ == '__main__':
+    main()
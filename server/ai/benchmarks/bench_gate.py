@@ -0,0 +1,104 @@
+"""Cascade gate benchmark: CPU saved vs. people missed, on recorded footage.
+
+Runs the full detector on every sampled frame as ground truth, then replays the
+clip through MotionGate for each threshold combination and reports:
+
+  skip rate       frames the gate kept away from the detector
+  FN frames       frames with a person (per the detector) that the gate skipped
+  missed people   person episodes (consecutive person frames) the gate never opened on;
+                  these are the misses that can cost an alert
+  est ms/frame    gate cost + detector cost on the frames that pass
+
+    python benchmarks/bench_gate.py --video lot_day.mp4 --min-areas 0.001 0.002 0.005 --var-thresholds 16 25 40
+"""
+import os
+import sys
+import time
+import argparse
+import itertools
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observo.gate import MotionGate  # noqa: E402
+from observo.config import FRAME_SIZE, FRAME_SKIP, MODEL_PATH  # noqa: E402
+
+
+def load_frames(path, limit, skip):
+    cap = cv2.VideoCapture(path)
+    frames, index = [], 0
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        index += 1
+        if index % skip == 0:
+            frames.append(cv2.resize(frame, FRAME_SIZE))
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read frames from {path}")
+    return frames
+
+
+def person_episodes(has_person):
+    """(start, end) index ranges of consecutive frames with a person"""
+    episodes, start = [], None
+    for i, present in enumerate(has_person + [False]):
+        if present and start is None:
+            start = i
+        elif not present and start is not None:
+            episodes.append((start, i))
+            start = None
+    return episodes
+
+
+def replay(frames, fresh, has_person, min_area, var_threshold):
+    gate = MotionGate(min_area=min_area, var_threshold=var_threshold)
+    opened = []
+    for frame, detections in zip(frames, fresh):
+        is_open = gate.should_detect(frame)
+        if is_open:
+            gate.observe(detections)
+        opened.append(is_open)
+
+    fn_frames = sum(1 for person, is_open in zip(has_person, opened) if person and not is_open)
+    missed = sum(1 for start, end in person_episodes(has_person) if not any(opened[start:end]))
+    return gate.stats(), fn_frames, missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cascade gate benchmark')
+    parser.add_argument('--video', required=True, help='Recorded camera footage')
+    parser.add_argument('--frames', type=int, default=3000, help='Max sampled frames to use')
+    parser.add_argument('--skip', type=int, default=FRAME_SKIP, help='Sample every Nth frame, like the monitor')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--min-conf', type=float, default=0.4, help='Detector confidence that counts as a person')
+    parser.add_argument('--min-areas', type=float, nargs='+', default=[0.001, 0.002, 0.005])
+    parser.add_argument('--var-thresholds', type=float, nargs='+', default=[16, 25, 40])
+    args = parser.parse_args()
+
+    from observo.detector import Detector
+    frames = load_frames(args.video, args.frames, args.skip)
+    detector = Detector(args.model)
+    detector.warm_up(FRAME_SIZE)
+    start = time.perf_counter()
+    fresh = [detector.detect(frame) for frame in frames]
+    model_ms = (time.perf_counter() - start) * 1000 / len(frames)
+    has_person = [any(label == 'person' and conf >= args.min_conf for label, _, conf in dets)
+                  for dets in fresh]
+    person_frames = sum(has_person)
+    episodes = len(person_episodes(has_person))
+
+    print(f"{len(frames)} frames from {args.video}; detector {model_ms:.1f} ms/frame; "
+          f"{person_frames} person frames in {episodes} episode(s)\n")
+    print(f"{'min_area':>9}{'var_thr':>9}{'skip rate':>11}{'FN frames':>16}{'missed people':>15}{'est ms/frame':>14}")
+    for min_area, var_threshold in itertools.product(args.min_areas, args.var_thresholds):
+        stats, fn_frames, missed = replay(frames, fresh, has_person, min_area, var_threshold)
+        fn_rate = fn_frames / person_frames if person_frames else 0.0
+        est = stats['avg_gate_ms'] + model_ms * (1 - stats['skip_rate'])
+        print(f"{min_area:>9.3f}{var_threshold:>9.0f}{stats['skip_rate']:>11.1%}"
+              f"{f'{fn_frames} ({fn_rate:.1%})':>16}{f'{missed}/{episodes}':>15}{est:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
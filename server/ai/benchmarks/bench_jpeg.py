@@ -0,0 +1,134 @@
+"""JPEG streaming encode benchmark, in two separate tables.
+
+Encoders: the old gen_frames encode (cv2.imencode + tobytes + part
+concatenation) against each JpegEncoder backend, one encode per frame.
+
+Viewers: with one encoder held fixed, encoding for every viewer (the old
+per-connection loop) against FrameBroadcaster, which encodes each variant once
+per frame and shares the bytes.
+
+    python benchmarks/bench_jpeg.py --video sample.mp4 --viewers 4
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observo.encoder import JpegEncoder  # noqa: E402
+from observo.streaming import FrameBroadcaster  # noqa: E402
+
+
+def load_frames(args):
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.resize(frame, (640, 360)))
+        cap.release()
+        if not frames:
+            raise SystemExit(f"Could not read frames from {args.video}")
+        return frames
+    if args.image:
+        return [cv2.resize(cv2.imread(args.image), (640, 360))]
+    # Synthetic scene: gradient + noise roughly matches camera JPEG sizes
+    rng = np.random.default_rng(0)
+    gradient = np.tile(np.linspace(0, 255, 640, dtype=np.uint8), (360, 1))
+    base = np.dstack([gradient, gradient[::-1], np.full_like(gradient, 96)])
+    return [cv2.add(base, rng.integers(0, 40, base.shape, dtype=np.uint8)) for _ in range(8)]
+
+
+def bench_legacy(frames, iterations, quality):
+    """Old gen_frames encode: cv2.imencode, tobytes and a concatenated part, once per frame"""
+    copied = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        ret, buffer = cv2.imencode('.jpg', frames[i % len(frames)], [cv2.IMWRITE_JPEG_QUALITY, quality])
+        jpeg = buffer.tobytes()
+        part = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+        copied += len(jpeg) + len(part)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, copied / iterations
+
+
+def bench_encoder(encoder, frames, iterations, quality):
+    """JpegEncoder, once per frame; header, payload and trailer are written separately"""
+    copied = encoder.bytes_copied
+    start = time.perf_counter()
+    for i in range(iterations):
+        encoder.encode(frames[i % len(frames)], quality)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, (encoder.bytes_copied - copied) / iterations
+
+
+def bench_viewers(encoder, frames, iterations, viewers, quality, shared):
+    """Frames/s served to `viewers` viewers of one variant, with the same encoder.
+
+    shared=False encodes for every viewer (the old per-connection loop);
+    shared=True goes through FrameBroadcaster, which encodes once per frame.
+    """
+    broadcaster = FrameBroadcaster(encoder)
+    start = time.perf_counter()
+    for i in range(iterations):
+        broadcaster.publish(frames[i % len(frames)], i)
+        for _ in range(viewers):
+            if shared:
+                broadcaster.get_variant(0, quality)
+            else:
+                encoder.encode(broadcaster.frame, quality)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JPEG encode benchmark')
+    parser.add_argument('--video', help='Video file to take frames from')
+    parser.add_argument('--image', help='Single image to encode repeatedly')
+    parser.add_argument('--frames', type=int, default=100, help='Frames to load from --video')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--viewers', type=int, default=4, help='Concurrent viewers of one variant')
+    parser.add_argument('--quality', type=int, default=80)
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    print(f"{len(frames)} frame(s) 640x360, {args.iterations} iterations\n")
+
+    # Encoders alone: one encode per frame, no viewers involved
+    print(f"{'encoder':<28}{'encodes/s':>12}{'ms/encode':>12}{'bytes copied/frame':>22}")
+    rate, copied = bench_legacy(frames, args.iterations, args.quality)
+    print(f"{'legacy imencode+concat':<28}{rate:>12.1f}{1000 / rate:>12.2f}{copied:>22.0f}")
+
+    configs = [('cv2', '420', False), ('turbojpeg', '420', False), ('turbojpeg', '420', True),
+               ('turbojpeg', '422', True)]
+    best = None
+    for backend, subsampling, fast_dct in configs:
+        try:
+            encoder = JpegEncoder(subsampling, fast_dct, backend=backend)
+        except Exception as e:
+            print(f"{backend:<28}unavailable ({str(e).splitlines()[0]})")
+            continue
+        rate, copied = bench_encoder(encoder, frames, args.iterations, args.quality)
+        name = f"{backend} {subsampling}{' fastdct' if fast_dct else ''}"
+        stats = encoder.stats()
+        print(f"{name:<28}{rate:>12.1f}{1000 / rate:>12.2f}{copied:>22.0f}"
+              f"   (avg {stats['avg_jpeg_bytes']} B)")
+        if not fast_dct and subsampling == '420':
+            best = (name, encoder)
+
+    # Broadcaster alone: the same encoder either way, per-viewer vs shared encodes
+    name, encoder = best
+    print(f"\n{args.viewers} viewer(s) of one variant, {name} encoder")
+    print(f"{'stream path':<28}{'frames/s':>12}{'encodes/frame':>15}")
+    for label, shared in (('encode per viewer', False), ('FrameBroadcaster', True)):
+        rate = bench_viewers(encoder, frames, args.iterations, args.viewers, args.quality, shared)
+        print(f"{label:<28}{rate:>12.1f}{1 if shared else args.viewers:>15}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Detection worker startup-time benchmark.
+
+Measures each stage against STARTUP_BUDGET in observo/config.py and exits
+non-zero if any stage is over budget, so it can run in CI or before a release.
+
+    python benchmarks/bench_startup.py --video sample.mp4
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+import urllib.error
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_DIR)
+from observo.config import STARTUP_BUDGET, MODEL_PATH  # noqa: E402
+
+DETECT = os.path.join(AI_DIR, 'detect.py')
+
+
+def time_cli_help():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, DETECT, '--help'], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def time_model(model_path):
+    # Fresh interpreter so torch/ultralytics import cost is included
+    code = (
+        "import json; from observo.detector import Detector; "
+        f"d = Detector({model_path!r}); d.load(); d.warm_up(); print(json.dumps(d.timings))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=AI_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def time_ready(video, model_path, timeout):
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([
+        sys.executable, DETECT,
+        '--camera_url', video, '--camera_id', 'bench', '--user_id', 'bench',
+        '--features', '1', '--model', model_path, '--port', str(port)
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/ready', timeout=1) as resp:
+                    return time.perf_counter() - start, json.loads(resp.read())
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.05)
+        return None, None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detection worker startup benchmark')
+    parser.add_argument('--video', help='Local video file used as the camera for the ready check')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    results = {"cli_help": time_cli_help()}
+
+    timings = time_model(args.model)
+    if timings:
+        results.update(timings)
+
+    detail = None
+    if args.video:
+        results["ready"], detail = time_ready(os.path.abspath(args.video), args.model, args.timeout)
+
+    over = False
+    print(f"{'stage':<12}{'seconds':>10}{'budget':>10}")
+    for stage, budget in STARTUP_BUDGET.items():
+        value = results.get(stage)
+        if value is None:
+            print(f"{stage:<12}{'skipped':>10}{budget:>10.2f}")
+            continue
+        flag = '' if value <= budget else '  OVER BUDGET'
+        over = over or bool(flag)
+        print(f"{stage:<12}{value:>10.2f}{budget:>10.2f}{flag}")
+
+    if detail:
+        print("\n/ready startup stages:", json.dumps(detail.get("startup", {})))
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Observo detection service.
+
+Submodules are imported on first attribute access so that importing the
+package (or running ``detect.py --help``) does not pull in cv2, torch
+or flask.
+"""
+import importlib
+
+_LAZY = {
+    "SecurityMonitor": ".monitor",
+    "Detector": ".detector",
+    "CachedDetector": ".cache",
+    "DetectionCache": ".cache",
+    "CascadeDetector": ".gate",
+    "MotionGate": ".gate",
+    "CentroidTracker": ".tracker",
+    "Schedule": ".schedule",
+    "RulePipeline": ".rules",
+    "Rule": ".rules",
+    "Analytics": ".analytics",
+    "JpegEncoder": ".encoder",
+    "EventJournal": ".journal",
+    "FrameBroadcaster": ".streaming",
+    "HlsRemuxer": ".streaming",
+    "create_app": ".server",
+    "main": ".cli",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,227 @@
+import logging
+import threading
+import time as time_module
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .config import BACKEND_URL, ANALYTICS_FLUSH_INTERVAL, ANALYTICS_MAX_PENDING
+from .rules import points_in_polygon
+
+logger = logging.getLogger(__name__)
+
+
+class CountingLine:
+    """Directional tripwire from p1 to p2.
+
+    'in' counts tracks crossing from the right of p1->p2 to its left as seen on
+    screen, 'out' the reverse. Only tracks whose label is in `labels` count.
+    """
+    def __init__(self, name, points, labels=('person',)):
+        if len(points) != 2:
+            raise ValueError(f"Line {name!r} needs exactly 2 points")
+        self.name = name
+        self.p1 = np.asarray(points[0], dtype=np.float64)
+        self.p2 = np.asarray(points[1], dtype=np.float64)
+        self.labels = set(labels)
+
+
+class OccupancyZone:
+    """Polygon whose tracked occupants are counted as they enter and leave"""
+    def __init__(self, name, points, labels=('person',)):
+        self.name = name
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(self.points) < 3:
+            raise ValueError(f"Zone {name!r} needs at least 3 points")
+        self.labels = set(labels)
+        self.inside = set()  # track ids currently inside
+
+
+def cross(origin, direction, points):
+    """z of direction x (points - origin), broadcast over leading dims"""
+    rel = points - origin
+    return direction[..., 0] * rel[..., 1] - direction[..., 1] * rel[..., 0]
+
+
+def segment_crossings(prev, cur, starts, ends):
+    """(M, L) crossing direction of M track moves over L lines: +1 in, -1 out, 0 none.
+
+    A move crosses a line when its endpoints are on different sides of the line
+    and the line's endpoints are not both on one side of the move.
+    """
+    prev = prev[:, None, :]
+    cur = cur[:, None, :]
+    line_dir = (ends - starts)[None, :, :]
+    side_prev = cross(starts[None], line_dir, prev) < 0
+    side_cur = cross(starts[None], line_dir, cur) < 0
+    move_dir = cur - prev
+    within = cross(prev, move_dir, starts[None]) * cross(prev, move_dir, ends[None]) <= 0
+    crossed = (side_prev != side_cur) & within
+    return np.where(crossed, np.where(side_cur, 1, -1), 0)
+
+
+class Analytics:
+    """Incremental line-crossing and occupancy counts over tracker output.
+
+    update() is called once per processed frame with the frame's
+    TrackedDetections. Only each track's last centre is kept, so every frame
+    costs one vectorized segment test against all lines and one
+    point-in-polygon test per zone. Counts are rolled up per minute.
+    Finished minutes are queued and sent in bulk by flush(), which
+    start_flusher() runs periodically. One lock covers the current bucket and
+    the queue, since flush() runs on the flusher thread and may close the
+    minute itself when no frames arrive.
+    """
+    def __init__(self, lines=(), zones=(), camera_id=None, user_id=None, backend_url=BACKEND_URL,
+                 flush_interval=ANALYTICS_FLUSH_INTERVAL, max_pending=ANALYTICS_MAX_PENDING):
+        self.lines = list(lines)
+        self.zones = list(zones)
+        self.camera_id = camera_id
+        self.user_id = user_id
+        self.backend_url = backend_url
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.last_centers = {}  # track id -> (x, y)
+        self.line_starts = np.array([line.p1 for line in self.lines]).reshape(-1, 2)
+        self.line_ends = np.array([line.p2 for line in self.lines]).reshape(-1, 2)
+        self.totals = {line.name: {"in": 0, "out": 0} for line in self.lines}
+        self.minute = None
+        self.bucket = None
+        self.pending = []
+        self.lock = threading.Lock()  # guards minute, bucket and pending
+
+    @classmethod
+    def from_spec(cls, spec, **kwargs):
+        """{"lines": [{"name", "points": [[x, y], [x, y]], "labels"}], "zones": [{"name", "points", "labels"}]}"""
+        lines = [CountingLine(**line) for line in spec.get("lines", [])]
+        zones = [OccupancyZone(**zone) for zone in spec.get("zones", [])]
+        if not lines and not zones:
+            raise ValueError("Analytics needs at least one line or zone")
+        return cls(lines, zones, **kwargs)
+
+    def _new_bucket(self):
+        return {
+            "frames": 0,
+            "lines": {line.name: {"in": 0, "out": 0} for line in self.lines},
+            "zones": {zone.name: {"entries": 0, "exits": 0, "peak": 0, "occupancy_sum": 0}
+                      for zone in self.zones},
+        }
+
+    def _roll(self, now):
+        """Start a new bucket when now is in a later minute (lock held)"""
+        minute = int(now // 60) * 60
+        if minute == self.minute:
+            return
+        if self.bucket is not None:
+            self._finish_bucket()
+        self.minute = minute
+        self.bucket = self._new_bucket()
+
+    def _finish_bucket(self):
+        """Queue the finished minute's rollups (lock held).
+
+        Zone rows are written for every minute, empty ones included, with the
+        frame count and occupancy-frames, so hour/day averages are weighted by
+        frames over the whole period rather than only its busy minutes.
+        """
+        at = datetime.fromtimestamp(self.minute, timezone.utc).isoformat()
+        frames = self.bucket["frames"]
+        rollups = []
+        for name, counts in self.bucket["lines"].items():
+            if counts["in"] or counts["out"]:
+                rollups.append({"minute": at, "kind": "line", "name": name, **counts})
+        for name, counts in self.bucket["zones"].items():
+            rollups.append({"minute": at, "kind": "zone", "name": name,
+                            "entries": counts["entries"], "exits": counts["exits"],
+                            "peak": counts["peak"], "frames": frames,
+                            "occupancyFrames": counts["occupancy_sum"]})
+        self.pending.extend(rollups)
+        overflow = len(self.pending) - self.max_pending
+        if overflow > 0:
+            logger.warning(f"Analytics backlog full, dropping {overflow} oldest rollups")
+            del self.pending[:overflow]
+
+    def update(self, dets, dropped, now):
+        with self.lock:
+            self._update(dets, dropped, now)
+
+    def _update(self, dets, dropped, now):
+        self._roll(now)
+        bucket = self.bucket
+        bucket["frames"] += 1
+        ids = dets.ids.tolist()
+        labels = dets.labels
+        centers = dets.centers.astype(np.float64)
+
+        if self.lines:
+            moved = [i for i, track_id in enumerate(ids) if track_id in self.last_centers]
+            if moved:
+                prev = np.array([self.last_centers[ids[i]] for i in moved])
+                crossings = segment_crossings(prev, centers[moved], self.line_starts, self.line_ends)
+                for row, col in zip(*np.nonzero(crossings)):
+                    line = self.lines[col]
+                    if labels[moved[row]] not in line.labels:
+                        continue
+                    direction = "in" if crossings[row, col] > 0 else "out"
+                    bucket["lines"][line.name][direction] += 1
+                    self.totals[line.name][direction] += 1
+
+        for zone in self.zones:
+            counts = bucket["zones"][zone.name]
+            mask = np.array([label in zone.labels for label in labels], dtype=bool).reshape(len(ids))
+            inside_now = points_in_polygon(centers, zone.points) & mask
+            for track_id, inside in zip(ids, inside_now.tolist()):
+                if inside and track_id not in zone.inside:
+                    zone.inside.add(track_id)
+                    counts["entries"] += 1
+                elif not inside and track_id in zone.inside:
+                    zone.inside.discard(track_id)
+                    counts["exits"] += 1
+            # Tracks the tracker gave up on have left the scene
+            for track_id in dropped:
+                if track_id in zone.inside:
+                    zone.inside.discard(track_id)
+                    counts["exits"] += 1
+            counts["peak"] = max(counts["peak"], len(zone.inside))
+            counts["occupancy_sum"] += len(zone.inside)
+
+        for i, track_id in enumerate(ids):
+            self.last_centers[track_id] = (centers[i, 0], centers[i, 1])
+        for track_id in dropped:
+            self.last_centers.pop(track_id, None)
+
+    def snapshot(self):
+        """Live counts for the /metadata stream"""
+        return {
+            "lines": [{"name": line.name, "points": [line.p1.astype(int).tolist(), line.p2.astype(int).tolist()],
+                       **self.totals[line.name]} for line in self.lines],
+            "zones": [{"name": zone.name, "points": zone.points.astype(int).tolist(),
+                       "occupancy": len(zone.inside)} for zone in self.zones],
+        }
+
+    def flush(self, now=None):
+        """Close the current minute if it's over and POST every queued rollup in one request"""
+        with self.lock:
+            if now is not None and self.minute is not None and now >= self.minute + 60:
+                self._roll(now)
+            batch, self.pending = self.pending, []
+        if not batch:
+            return 0
+        import requests  # only needed once there is something to send
+        try:
+            resp = requests.post(f'{self.backend_url}/api/analytics/rollups', timeout=10, json={
+                "camera": self.camera_id, "user": self.user_id, "rollups": batch})
+            resp.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Analytics flush of {len(batch)} rollups failed, will retry: {e}")
+            with self.lock:
+                self.pending[:0] = batch
+            return 0
+        return len(batch)
+
+    def start_flusher(self):
+        def loop():
+            while True:
+                time_module.sleep(self.flush_interval)
+                self.flush(time_module.time())
+        threading.Thread(target=loop, daemon=True).start()
@@ -0,0 +1,145 @@
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from .config import (DETECTION_CACHE_SIZE, DETECTION_CACHE_TTL, DETECTION_CACHE_HASH_SIZE,
+                     DETECTION_CACHE_MAX_DISTANCE, DETECTION_CACHE_MIN_CONFIDENCE,
+                     DETECTION_CACHE_MAX_REUSE)
+
+
+def dhash(frame, hash_size=DETECTION_CACHE_HASH_SIZE):
+    """Difference hash of a BGR frame as a hash_size*hash_size bit integer.
+
+    Each bit says whether a pixel of the downscaled grey image is brighter than
+    its right-hand neighbour, so global brightness drift and sensor noise barely
+    move it while anything that changes the scene's structure flips bits.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class DetectionCache:
+    """LRU + TTL cache of detection results keyed by perceptual frame hash.
+
+    A frame whose hash is within max_distance bits of a cached frame reuses
+    that frame's detections instead of running the model. To keep it from
+    hiding real motion:
+      - results with a detection under min_confidence are never cached, since
+        borderline detections are exactly what appears/disappears between frames
+      - an entry is dropped after max_reuse hits, so a static-looking scene is
+        still re-detected every few frames
+      - entries expire after ttl seconds regardless of use
+    """
+    def __init__(self, max_entries=DETECTION_CACHE_SIZE, ttl=DETECTION_CACHE_TTL,
+                 hash_size=DETECTION_CACHE_HASH_SIZE, max_distance=DETECTION_CACHE_MAX_DISTANCE,
+                 min_confidence=DETECTION_CACHE_MIN_CONFIDENCE, max_reuse=DETECTION_CACHE_MAX_REUSE,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.min_confidence = min_confidence
+        self.max_reuse = max_reuse
+        self.clock = clock
+        self.entries = OrderedDict()  # hash -> [detections, stored_at, hits]
+        self.counters = dict.fromkeys(
+            ('lookups', 'hits', 'misses', 'stored', 'skipped_low_conf', 'expired', 'evicted',
+             'reuse_limited'), 0)
+        self.hash_seconds = 0.0
+
+    def hash(self, frame):
+        start = time.perf_counter()
+        value = dhash(frame, self.hash_size)
+        self.hash_seconds += time.perf_counter() - start
+        return value
+
+    def lookup(self, frame_hash):
+        """Return cached detections for a near-identical frame, or None"""
+        self.counters['lookups'] += 1
+        now = self.clock()
+        best_key, best_distance = None, self.max_distance + 1
+        for key, (_, stored_at, _) in list(self.entries.items()):
+            if now - stored_at > self.ttl:
+                del self.entries[key]
+                self.counters['expired'] += 1
+                continue
+            distance = hamming(key, frame_hash)
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+
+        if best_key is None:
+            self.counters['misses'] += 1
+            return None
+
+        entry = self.entries[best_key]
+        entry[2] += 1
+        if entry[2] > self.max_reuse:
+            del self.entries[best_key]
+            self.counters['reuse_limited'] += 1
+            self.counters['misses'] += 1
+            return None
+        self.entries.move_to_end(best_key)
+        self.counters['hits'] += 1
+        return entry[0]
+
+    def store(self, frame_hash, detections):
+        if any(conf < self.min_confidence for _, _, conf in detections):
+            self.counters['skipped_low_conf'] += 1
+            return
+        self.entries[frame_hash] = [detections, self.clock(), 0]
+        self.entries.move_to_end(frame_hash)
+        self.counters['stored'] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters['evicted'] += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.counters['lookups']
+        return {
+            **self.counters,
+            "entries": len(self.entries),
+            "hit_rate": round(self.counters['hits'] / lookups, 3) if lookups else 0.0,
+            "avg_hash_ms": round(self.hash_seconds * 1000 / lookups, 3) if lookups else 0.0,
+        }
+
+
+class CachedDetector:
+    """Detector wrapper that consults a DetectionCache before running the model.
+
+    Exposes the same load/warm_up/detect/timings surface as Detector, so the
+    monitor doesn't need to know whether caching is on.
+    """
+    def __init__(self, detector, cache=None):
+        self.detector = detector
+        self.cache = cache or DetectionCache()
+        self.last_hit = False
+
+    @property
+    def timings(self):
+        return {**self.detector.timings, "cache": self.cache.stats()}
+
+    def load(self):
+        return self.detector.load()
+
+    def warm_up(self, size):
+        return self.detector.warm_up(size)
+
+    def detect(self, frame):
+        frame_hash = self.cache.hash(frame)
+        detections = self.cache.lookup(frame_hash)
+        self.last_hit = detections is not None
+        if detections is None:
+            detections = self.detector.detect(frame)
+            self.cache.store(frame_hash, detections)
+        return detections
@@ -0,0 +1,216 @@
+import os
+import shutil
+import logging
+import threading
+import subprocess
+import time as time_module
+
+import cv2
+import numpy as np
+
+from .config import FRAME_SIZE, DECODE_THREADS, IDLE_KEYFRAME_AFTER, DECODE_CPU_SAMPLE
+
+logger = logging.getLogger(__name__)
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def process_cpu_seconds(pid):
+    """user + system CPU time of a child process, from /proc (None where unavailable)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # Fields after the parenthesised command name; utime and stime are 14th and 15th overall
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+_passthrough_option = None
+
+
+def passthrough_option():
+    """ffmpeg output option for variable frame rate: -fps_mode (5.1+) or the older -vsync"""
+    global _passthrough_option
+    if _passthrough_option is None:
+        try:
+            help_text = subprocess.run(['ffmpeg', '-hide_banner', '-h', 'long'], capture_output=True,
+                                       text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            help_text = ''
+        _passthrough_option = '-fps_mode' if '-fps_mode' in help_text else '-vsync'
+    return _passthrough_option
+
+
+def probe_size(source):
+    """(width, height) of the source's first video stream, from ffprobe; None if unknown"""
+    cmd = ['ffprobe', '-v', 'error']
+    if source.startswith('rtsp://'):
+        cmd += ['-rtsp_transport', 'tcp']
+    cmd += ['-select_streams', 'v:0', '-show_entries', 'stream=width,height', '-of', 'csv=p=0:s=x', source]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=15).stdout
+        width, height = (int(v) for v in out.split()[0].split('x')[:2])
+    except (OSError, subprocess.SubprocessError, IndexError, ValueError):
+        return None
+    return (width, height) if width and height else None
+
+
+class FfmpegCapture:
+    """Camera decode in an ffmpeg subprocess, with the same read/isOpened/release surface as cv2.VideoCapture.
+
+    The decode work is reduced in three ways:
+    - ffmpeg scales to FRAME_SIZE itself (fast_bilinear) and pipes out 640x360 BGR,
+      so full-resolution frames are never converted or copied.
+    - The decoder runs `threads` slice threads.
+    - `lowres` asks decoders that support it (MJPEG, MPEG-4) to decode at 1/2**lowres size.
+      H.264/HEVC have no reduced-resolution decode.
+
+    With idle_after > 0, the camera drops to keyframe-only decode
+    (-skip_frame nokey) once note_activity() has seen no person for that many
+    seconds. It goes back to full decode on the first keyframe with a person.
+    Keyframe mode also passes frame timing through; otherwise the rawvideo muxer
+    would duplicate each keyframe back up to the input frame rate. The monitor
+    processes every keyframe (frame_skip does not apply), so a person is seen
+    within one GOP. Switching back restarts ffmpeg, so the first full-rate frame
+    comes up to one more GOP plus the reconnect later.
+    """
+    def __init__(self, source, size=FRAME_SIZE, threads=DECODE_THREADS, lowres=0, idle_after=IDLE_KEYFRAME_AFTER):
+        self.source = source
+        self.size = tuple(size)
+        self.threads = threads
+        self.lowres = lowres
+        self.idle_after = idle_after
+        self.frame_bytes = self.size[0] * self.size[1] * 3
+        self.process = None
+        self.keyframes_only = False
+        self.source_size = None  # camera resolution before scaling, probed on first get()
+        self.last_active = time_module.monotonic()
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.restarts = 0
+        self.cpu_total = 0.0  # CPU seconds of ffmpeg processes that have exited
+        self.sample = None  # (monotonic, cpu seconds, frames) at the last rate sample
+        self.rates = {"decode_cpu": None, "decoded_fps": None}
+        self.open()
+
+    def build_command(self):
+        cmd = ['ffmpeg', '-loglevel', 'error', '-nostdin']
+        if self.source.startswith('rtsp://'):
+            cmd += ['-rtsp_transport', 'tcp']
+        # Decoder options go before -i
+        cmd += ['-threads', str(self.threads), '-thread_type', 'slice']
+        if self.lowres:
+            cmd += ['-lowres', str(self.lowres)]
+        if self.keyframes_only:
+            cmd += ['-skip_frame', 'nokey']
+        cmd += [
+            '-i', self.source,
+            '-map', '0:v:0', '-an',
+            '-vf', f'scale={self.size[0]}:{self.size[1]}:flags=fast_bilinear',
+            '-pix_fmt', 'bgr24',
+        ]
+        if self.keyframes_only:
+            cmd += [passthrough_option(), 'passthrough']
+        cmd += ['-f', 'rawvideo', 'pipe:1']
+        return cmd
+
+    def open(self):
+        if shutil.which('ffmpeg') is None:
+            logger.error("ffmpeg not found; use --capture opencv")
+            return False
+        self.process = subprocess.Popen(self.build_command(), stdout=subprocess.PIPE, bufsize=0)
+        self.sample = (time_module.monotonic(), 0.0, self.frames)
+        logger.info(f"ffmpeg decode started for {self.source} "
+                    f"({'keyframes only' if self.keyframes_only else 'all frames'})")
+        return True
+
+    def _stop(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        cpu = process_cpu_seconds(process.pid)
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if cpu is not None:
+            self.cpu_total += cpu
+
+    def _switch(self, keyframes_only):
+        with self.lock:
+            self._stop()
+            self.keyframes_only = keyframes_only
+            self.restarts += 1
+            self.open()
+
+    def isOpened(self):
+        return self.process is not None and self.process.poll() is None
+
+    def get(self, prop):
+        """cv2.VideoCapture.get for the source frame size, probed once; 0 for anything else"""
+        if prop not in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return 0.0
+        if self.source_size is None:
+            self.source_size = probe_size(self.source) or (0, 0)
+        return float(self.source_size[0 if prop == cv2.CAP_PROP_FRAME_WIDTH else 1])
+
+    def read(self):
+        if self.process is None:
+            return False, None
+        buf = bytearray(self.frame_bytes)
+        view = memoryview(buf)
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self.process.stdout.readinto(view[filled:])
+            if not n:
+                return False, None
+            filled += n
+        self.frames += 1
+        self._sample_rates()
+        return True, np.frombuffer(buf, dtype=np.uint8).reshape(self.size[1], self.size[0], 3)
+
+    def _sample_rates(self):
+        now = time_module.monotonic()
+        started, cpu_before, frames_before = self.sample
+        if now - started < DECODE_CPU_SAMPLE:
+            return
+        cpu = process_cpu_seconds(self.process.pid)
+        if cpu is not None:
+            self.rates["decode_cpu"] = round(100 * (cpu - cpu_before) / (now - started), 1)
+        self.rates["decoded_fps"] = round((self.frames - frames_before) / (now - started), 1)
+        self.sample = (now, cpu if cpu is not None else cpu_before, self.frames)
+
+    def note_activity(self, active):
+        """Called once per processed frame: switch between full and keyframe-only decode"""
+        if not self.idle_after:
+            return
+        now = time_module.monotonic()
+        if active:
+            self.last_active = now
+            if self.keyframes_only:
+                logger.info(f"Activity on {self.source}; decoding all frames")
+                self._switch(False)
+        elif not self.keyframes_only and now - self.last_active >= self.idle_after:
+            logger.info(f"{self.source} idle for {self.idle_after}s; decoding keyframes only")
+            self._switch(True)
+
+    def release(self):
+        with self.lock:
+            self._stop()
+
+    def stats(self):
+        current = process_cpu_seconds(self.process.pid) if self.isOpened() else None
+        return {
+            "backend": "ffmpeg",
+            "mode": "keyframes" if self.keyframes_only else "full",
+            "threads": self.threads,
+            "lowres": self.lowres,
+            "frames": self.frames,
+            "restarts": self.restarts,
+            # Percent of one core, over the last DECODE_CPU_SAMPLE seconds
+            "decode_cpu": self.rates["decode_cpu"],
+            "decoded_fps": self.rates["decoded_fps"],
+            "decode_cpu_seconds": round(self.cpu_total + (current or 0.0), 2),
+        }
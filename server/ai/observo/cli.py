@@ -0,0 +1,228 @@
+import os
+import json
+import atexit
+import signal
+import logging
+import argparse
+import threading
+
+from .config import (JPEG_SUBSAMPLING, HLS_DIR, MODEL_PATH, DETECTION_CACHE_MAX_DISTANCE,
+                     GATE_MIN_AREA, GATE_VAR_THRESHOLD, JOURNAL_DIR, JOURNAL_FSYNC,
+                     DECODE_THREADS, IDLE_KEYFRAME_AFTER, BACKEND_URL)
+
+OUTPUTS = ('server', 'gui', 'both')
+SINK_CHOICES = ('journal', 'http', 'disk', 'none')
+
+logger = logging.getLogger(__name__)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Security Monitoring')
+    parser.add_argument('--camera_url', required=True, help='RTSP stream URL')
+    parser.add_argument('--camera_id', required=True, help='MongoDB Camera ObjectID')
+    parser.add_argument('--user_id', required=True, help='MongoDB User ObjectID')
+    parser.add_argument('--features', required=True, help='Comma-separated feature codes (1,2,3)')
+    parser.add_argument('--no_annotate', action='store_true',
+                        help='Stream clean frames; viewers draw overlays from /metadata')
+    parser.add_argument('--jpeg_subsampling', choices=JPEG_SUBSAMPLING, default='420',
+                        help='JPEG chroma subsampling for streams and alert snapshots')
+    parser.add_argument('--jpeg_fast_dct', action='store_true',
+                        help='Use the faster, slightly less accurate DCT (libjpeg-turbo only)')
+    parser.add_argument('--model', default=MODEL_PATH, help='YOLO weights to load')
+    parser.add_argument('--capture', choices=('opencv', 'ffmpeg'), default='opencv',
+                        help='Decode backend; ffmpeg decodes straight to 640x360 in a subprocess '
+                             'and reports its CPU in /ready')
+    parser.add_argument('--decode_threads', type=int, default=DECODE_THREADS,
+                        help='ffmpeg slice-decoding threads per camera')
+    parser.add_argument('--decode_lowres', type=int, default=0, choices=(0, 1, 2, 3),
+                        help='ffmpeg reduced-resolution decode (1/2**N) for MJPEG/MPEG-4 cameras; '
+                             'not supported by H.264')
+    parser.add_argument('--idle_keyframes', type=float, default=IDLE_KEYFRAME_AFTER,
+                        help='With --capture ffmpeg: decode keyframes only after this many seconds '
+                             'without a person (0 = never)')
+    parser.add_argument('--detection_cache', action='store_true',
+                        help='Reuse detections for near-identical frames (static scenes)')
+    parser.add_argument('--cache_max_distance', type=int, default=DETECTION_CACHE_MAX_DISTANCE,
+                        help='Max perceptual-hash bit distance for a cache hit')
+    parser.add_argument('--gate', action='store_true',
+                        help='Run the detector only when a cheap motion gate sees a person-like blob')
+    parser.add_argument('--gate_min_area', type=float, default=GATE_MIN_AREA,
+                        help='Smallest foreground blob (fraction of frame) that opens the gate')
+    parser.add_argument('--gate_var_threshold', type=float, default=GATE_VAR_THRESHOLD,
+                        help='Background model sensitivity; lower opens the gate more often')
+    parser.add_argument('--journal_dir', default=JOURNAL_DIR,
+                        help='Directory for the local alert journal (one subdirectory per camera)')
+    parser.add_argument('--journal_fsync', choices=('always', 'interval', 'never'), default=JOURNAL_FSYNC,
+                        help='When journal appends are fsynced')
+    parser.add_argument('--schedule',
+                        help='Restricted-hours schedule for feature 3, as JSON or a path to a .json file '
+                             '(default: ALERT_TIME_WINDOW every day)')
+    parser.add_argument('--rules', default='',
+                        help='Extra comma-separated rules on top of --features: built-in names '
+                             '(zone_dwell, loitering, intrusion) or module:ClassName for a custom Rule')
+    parser.add_argument('--zone', help='Protected zone as JSON [[x, y], ...] in 640x360 frame coordinates')
+    parser.add_argument('--draw_zone', action='store_true',
+                        help='Click out the protected zone on the first frame (needs a display)')
+    parser.add_argument('--analytics',
+                        help='Counting lines and occupancy zones as JSON or a path to a .json file: '
+                             '{"lines": [{"name", "points": [[x, y], [x, y]]}], "zones": [{"name", "points"}]}; '
+                             'per-minute counts are uploaded to the backend')
+    parser.add_argument('--backend_url', default=BACKEND_URL,
+                        help='API server that receives alerts and analytics (the coordinator, '
+                             'when running on a detection node)')
+    parser.add_argument('--sinks', default='journal',
+                        help=f'Comma-separated alert sinks: {", ".join(SINK_CHOICES)}')
+    parser.add_argument('--output', choices=OUTPUTS, default='server',
+                        help='server: headless, streams over HTTP; gui: local preview window; both')
+    parser.add_argument('--port', type=int, default=5000, help='Port for the stream/alerts server')
+    return parser
+
+
+def read_json_arg(value):
+    """JSON given inline or as a path to a .json file"""
+    if value.endswith('.json') and os.path.isfile(value):
+        with open(value) as f:
+            value = f.read()
+    return json.loads(value)
+
+
+def exit_on_signal(signum, frame):
+    """SIGTERM handler: exit through SystemExit so atexit cleanup runs"""
+    raise SystemExit(0)
+
+
+def main(argv=None):
+    # Parse arguments before importing cv2/torch/flask so bad invocations
+    # and --help return immediately.
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    schedule = None
+    if args.schedule:
+        from .schedule import Schedule
+        try:
+            schedule = Schedule.from_spec(read_json_arg(args.schedule))
+        except (ValueError, TypeError, KeyError) as e:
+            parser.error(f"invalid --schedule: {e}")
+
+    zone = None
+    if args.zone:
+        try:
+            zone = read_json_arg(args.zone)
+        except ValueError as e:
+            parser.error(f"invalid --zone: {e}")
+
+    analytics_spec = None
+    if args.analytics:
+        try:
+            analytics_spec = read_json_arg(args.analytics)
+        except ValueError as e:
+            parser.error(f"invalid --analytics: {e}")
+
+    sink_names = [name.strip() for name in args.sinks.split(',') if name.strip() and name.strip() != 'none']
+    unknown = set(sink_names) - set(SINK_CHOICES)
+    if unknown:
+        parser.error(f"unknown --sinks {sorted(unknown)}; choose from {', '.join(SINK_CHOICES)}")
+    if args.capture != 'ffmpeg' and (args.idle_keyframes or args.decode_lowres):
+        parser.error("--idle_keyframes and --decode_lowres need --capture ffmpeg")
+    args.backend_url = args.backend_url.rstrip('/')
+    if args.draw_zone and args.output == 'server':
+        parser.error("--draw_zone needs a display; use --output gui or both")
+
+    # Setup logging
+    logging.basicConfig(level=logging.INFO)
+
+    from .detector import Detector
+    from .journal import EventJournal
+    from .encoder import JpegEncoder
+    from .monitor import SecurityMonitor
+    from .rules import RulePipeline, ZoneDwellRule
+    from .sinks import build_sinks
+    from .streaming import FrameBroadcaster, HlsRemuxer
+    from .server import create_app
+
+    # Create static directory for alert images
+    os.makedirs(os.path.join('static', 'alerts'), exist_ok=True)
+
+    # One encoder shared by streaming and alert snapshots
+    encoder = JpegEncoder(args.jpeg_subsampling, args.jpeg_fast_dct)
+    broadcaster = FrameBroadcaster(encoder)
+
+    # Shared segment cache for pass-through live view
+    remuxer = HlsRemuxer(args.camera_url, os.path.abspath(os.path.join(HLS_DIR, args.camera_id)))
+    # The scheduler stops a worker with SIGTERM; exit normally so atexit
+    # handlers run and the ffmpeg remux does not linger as an orphan
+    atexit.register(remuxer.stop)
+    signal.signal(signal.SIGTERM, exit_on_signal)
+
+    detector = Detector(args.model)
+    if args.detection_cache:
+        from .cache import CachedDetector, DetectionCache
+        detector = CachedDetector(detector, DetectionCache(max_distance=args.cache_max_distance))
+    if args.gate:
+        # Outermost, so the background model sees every frame
+        from .gate import CascadeDetector, MotionGate
+        detector = CascadeDetector(detector, MotionGate(var_threshold=args.gate_var_threshold,
+                                                        min_area=args.gate_min_area))
+
+    journal = None
+    if 'journal' in sink_names:
+        # Durable local alert history; undelivered alerts are replayed to the backend
+        journal = EventJournal(os.path.join(args.journal_dir, args.camera_id), fsync=args.journal_fsync)
+        journal.start_maintenance()
+    sinks = build_sinks(sink_names, journal, backend_url=args.backend_url)
+
+    features = [f.strip() for f in args.features.split(',') if f.strip()]
+    rule_specs = [r.strip() for r in args.rules.split(',') if r.strip()]
+    try:
+        pipeline = RulePipeline.build(features, rule_specs, zone=zone, schedule=schedule)
+    except (ValueError, KeyError, ImportError, AttributeError) as e:
+        parser.error(f"invalid rules: {e}")
+
+    analytics = None
+    if analytics_spec is not None:
+        from .analytics import Analytics
+        try:
+            analytics = Analytics.from_spec(analytics_spec, camera_id=args.camera_id, user_id=args.user_id,
+                                            backend_url=args.backend_url)
+        except (ValueError, TypeError) as e:
+            parser.error(f"invalid --analytics: {e}")
+
+    capture_factory = None
+    if args.capture == 'ffmpeg':
+        from .capture import FfmpegCapture
+
+        def capture_factory(source):
+            return FfmpegCapture(source, threads=args.decode_threads, lowres=args.decode_lowres,
+                                 idle_after=args.idle_keyframes)
+
+    monitor = SecurityMonitor(args.camera_url, args.features, args.camera_id, args.user_id, encoder,
+                              detector=detector, broadcaster=broadcaster,
+                              annotate=not args.no_annotate, pipeline=pipeline, sinks=sinks,
+                              analytics=analytics, capture_factory=capture_factory)
+
+    if args.draw_zone:
+        from .gui import draw_zone_interactive
+        cap = monitor.get_video_capture()
+        points = draw_zone_interactive(cap)
+        cap.release()
+        zone_rule = pipeline.get(ZoneDwellRule)
+        if len(points) >= 3 and zone_rule is not None:
+            pipeline.rules[pipeline.rules.index(zone_rule)] = ZoneDwellRule(points)
+
+    # Start detection in a separate thread; the model loads and warms up there
+    # while Flask is already answering /ready with 503.
+    detection_thread = threading.Thread(target=monitor.run_detection, daemon=True)
+    detection_thread.start()
+
+    if args.output in ('server', 'both'):
+        app = create_app(monitor, broadcaster, remuxer)
+        if args.output == 'server':
+            app.run(host='0.0.0.0', port=args.port, debug=True, use_reloader=False, threaded=True)
+            return
+        # cv2 windows must be driven from the main thread, so Flask moves to a thread
+        threading.Thread(target=app.run, daemon=True,
+                         kwargs=dict(host='0.0.0.0', port=args.port, threaded=True)).start()
+
+    from .gui import run_display
+    run_display(broadcaster)
@@ -0,0 +1,86 @@
+import os
+from datetime import time
+
+# Templates, alert images and static files live next to detect.py
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuration
+MODEL_PATH = "yolov8n.pt"
+FRAME_SAVE_PATH = "alerts"
+RTSP_RECONNECT_DELAY = 5
+FRAME_SKIP = 2
+FRAME_SIZE = (640, 360)  # (width, height) frames are resized to before inference
+BACKEND_URL = "http://localhost:5000"
+
+# Default parameters
+MIN_ZONE_DWELL_TIME = 3
+MIN_LOITER_TIME = 10
+ALERT_TIME_WINDOW = (time(22, 0), time(21, 0))
+ALERT_COOLDOWN = 60  # 1 minute cooldown between alerts
+DEFAULT_ZONE_POINTS = [(160, 90), (480, 90), (480, 270), (160, 270)]  # central area of FRAME_SIZE
+MAX_ALERTS_IN_MEMORY = 1000  # older alerts are read back from the journal
+
+# Local alert journal (observo/journal.py); one directory per camera under JOURNAL_DIR
+JOURNAL_DIR = "journal"
+JOURNAL_SEGMENT_SECONDS = 3600  # roll to a new segment every hour...
+JOURNAL_SEGMENT_BYTES = 64 * 1024 * 1024  # ...or at this size
+JOURNAL_FSYNC = 'always'  # 'always' | 'interval' | 'never'; alerts are rare, so fsync each one
+JOURNAL_FSYNC_INTERVAL = 1.0
+JOURNAL_RETENTION = 30 * 24 * 3600  # delete delivered segments older than this
+JOURNAL_COMPACT_AFTER = 24 * 3600  # drop snapshots from delivered segments older than this
+JOURNAL_MAINTENANCE_INTERVAL = 60
+JOURNAL_RETRY_DELAY = (1, 60)  # backend replay backoff, min/max seconds
+ALERTS_DEFAULT_LIMIT = 100  # /alerts without ?limit= returns at most this many...
+ALERTS_DEFAULT_WINDOW = 24 * 3600  # ...from this far back when ?since= is not given
+
+# Streaming defaults; viewers can ask for smaller/cheaper variants (?w=&q=&fps=)
+STREAM_MAX_FPS = 30
+DEFAULT_JPEG_QUALITY = 95  # cv2.imencode default
+MAX_CACHED_VARIANTS = 8  # least recently used variants are evicted beyond this
+STREAM_KEEPALIVE = 5  # re-send the last frame after this many seconds without a new one
+JPEG_SUBSAMPLING = ('444', '422', '420')
+
+# Detection cache for near-identical frames (--detection_cache)
+DETECTION_CACHE_SIZE = 32  # LRU entries per camera
+DETECTION_CACHE_TTL = 2.0  # seconds a cached result may be reused
+DETECTION_CACHE_HASH_SIZE = 16  # dHash grid; 16 -> 256-bit hash
+DETECTION_CACHE_MAX_DISTANCE = 6  # max differing hash bits to count as the same frame
+DETECTION_CACHE_MIN_CONFIDENCE = 0.5  # results with weaker detections are not cached
+DETECTION_CACHE_MAX_REUSE = 10  # force a real detection after this many hits on one entry
+
+# Cascade gate run before the detector (--gate); see benchmarks/bench_gate.py
+GATE_WIDTH = 160  # background model runs on a copy this wide
+GATE_HISTORY = 300  # frames the background model remembers
+GATE_VAR_THRESHOLD = 25  # MOG2 foreground sensitivity; lower = more sensitive
+GATE_MIN_AREA = 0.002  # smallest blob (fraction of frame) that may be a person
+GATE_MAX_AREA = 0.5  # more foreground than this = global change, run the detector
+GATE_MIN_ASPECT = 0.6  # blob height / width; people are upright
+GATE_HOLD_FRAMES = 15  # keep detecting this long after the last person
+GATE_REFRESH_FRAMES = 30  # run the detector at least this often anyway
+
+# Line-crossing / occupancy analytics (--analytics)
+ANALYTICS_FLUSH_INTERVAL = 300  # seconds between bulk uploads of per-minute rollups
+ANALYTICS_MAX_PENDING = 10000  # rollups kept while the backend is unreachable
+
+# Capture backend (--capture ffmpeg decodes in a subprocess at FRAME_SIZE)
+DECODE_THREADS = 2  # ffmpeg slice-decoding threads per camera
+IDLE_KEYFRAME_AFTER = 0  # seconds without a person before decoding keyframes only; 0 = never
+DECODE_CPU_SAMPLE = 5.0  # seconds between decode CPU / fps samples
+
+# Pass-through HLS live view
+HLS_DIR = "hls"
+HLS_SEGMENT_SECONDS = 1
+HLS_IDLE_TIMEOUT = 30  # stop remuxing when nobody has fetched a playlist for this long
+
+# Startup-time budget in seconds, checked by benchmarks/bench_startup.py.
+#   cli_help   - `python detect.py --help` end to end (interpreter + package import)
+#   model_load - importing ultralytics/torch and constructing the YOLO model
+#   warm_up    - first (dummy) inference, which builds the graph / allocates buffers
+#   ready      - process start until /ready reports the camera can infer
+#                (local video file; RTSP connect time comes on top)
+STARTUP_BUDGET = {
+    "cli_help": 0.5,
+    "model_load": 4.0,
+    "warm_up": 1.5,
+    "ready": 8.0,
+}
@@ -0,0 +1,67 @@
+import time
+import logging
+
+import numpy as np
+
+from .config import MODEL_PATH, FRAME_SIZE
+
+logger = logging.getLogger(__name__)
+
+# COCO class ids the monitor cares about
+DETECT_CLASSES = {0: 'person', 2: 'car'}
+
+
+class Detector:
+    """YOLO wrapper that loads ultralytics/torch on first use.
+
+    detect() returns plain (label, (x1, y1, x2, y2), confidence) tuples so the
+    rest of the pipeline never touches ultralytics result objects.
+    """
+    def __init__(self, model_path=MODEL_PATH, classes=DETECT_CLASSES):
+        self.model_path = model_path
+        self.classes = dict(classes)
+        self.model = None
+        self.warmed_up = False
+        self.timings = {}
+
+    def load(self):
+        if self.model is not None:
+            return self.model
+        start = time.perf_counter()
+        from ultralytics import YOLO  # heavy: pulls in torch
+        self.model = YOLO(self.model_path)
+        self.timings["model_load"] = time.perf_counter() - start
+        logger.info(f"Model {self.model_path} loaded in {self.timings['model_load']:.2f}s")
+        return self.model
+
+    def warm_up(self, size=FRAME_SIZE):
+        """Run one inference on a blank frame so the first real frame isn't slow"""
+        if self.warmed_up:
+            return
+        self.load()
+        start = time.perf_counter()
+        dummy = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        self.model(dummy, classes=list(self.classes), verbose=False)
+        self.warmed_up = True
+        self.timings["warm_up"] = time.perf_counter() - start
+        logger.info(f"Model warm-up took {self.timings['warm_up']:.2f}s")
+
+    def detect(self, frame):
+        results = self.load()(frame, classes=list(self.classes), verbose=False)
+        detections = []
+        for r in results:
+            if r.boxes is None:
+                continue
+
+            boxes = r.boxes.xyxy.cpu().numpy()
+            cls_ids = r.boxes.cls.cpu().numpy()
+            confs = r.boxes.conf.cpu().numpy()
+
+            for box, cls_id, conf in zip(boxes, cls_ids, confs):
+                label = self.classes.get(int(cls_id))
+                # Only process cars and people
+                if label is None:
+                    continue
+                x1, y1, x2, y2 = map(int, box[:4])
+                detections.append((label, (x1, y1, x2, y2), float(conf)))
+        return detections
@@ -0,0 +1,105 @@
+import time
+import logging
+
+import cv2
+
+try:
+    import turbojpeg
+except ImportError:  # optional, cv2 is used instead
+    turbojpeg = None
+
+from .config import JPEG_SUBSAMPLING
+
+logger = logging.getLogger(__name__)
+
+
+class JpegEncoder:
+    """JPEG encoder used for streaming and alert snapshots.
+
+    Uses libjpeg-turbo through PyTurboJPEG when the library is installed, and
+    cv2.imencode otherwise. encode() returns bytes; either backend copies the
+    compressed output once into that bytes object, which bytes_copied counts.
+    The saving for streaming is not here but in FrameBroadcaster, which encodes
+    each variant once per frame for all of its viewers.
+    """
+    def __init__(self, subsampling='420', fast_dct=False, backend='auto'):
+        if subsampling not in JPEG_SUBSAMPLING:
+            raise ValueError(f"Invalid subsampling {subsampling}. Use one of {JPEG_SUBSAMPLING}")
+        self.subsampling = subsampling
+        self.fast_dct = fast_dct
+        self.turbo = None
+
+        if backend in ('auto', 'turbojpeg'):
+            self.turbo = self._load_turbojpeg(required=backend == 'turbojpeg')
+        self.backend = 'turbojpeg' if self.turbo else 'cv2'
+
+        # Stats for benchmarks / logging
+        self.encodes = 0
+        self.encode_seconds = 0.0
+        self.bytes_out = 0
+        self.bytes_copied = 0
+
+        logger.info(f"JPEG encoder: {self.backend} (subsampling {subsampling}, fast_dct={fast_dct})")
+
+    def _load_turbojpeg(self, required):
+        if turbojpeg is None:
+            if required:
+                raise RuntimeError("PyTurboJPEG is not installed")
+            return None
+        try:
+            turbo = turbojpeg.TurboJPEG()
+        except Exception as e:
+            if required:
+                raise
+            logger.warning(f"libjpeg-turbo unavailable, falling back to cv2: {e}")
+            return None
+        return turbo
+
+    def _turbo_subsampling(self):
+        return {
+            '444': turbojpeg.TJSAMP_444,
+            '422': turbojpeg.TJSAMP_422,
+            '420': turbojpeg.TJSAMP_420,
+        }[self.subsampling]
+
+    def _cv2_params(self, quality):
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        # Sampling factor control exists in OpenCV >= 4.5.5; libjpeg's default is 4:2:0
+        if hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):
+            factor = {
+                '444': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444,
+                '422': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_422,
+                '420': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+            }[self.subsampling]
+            params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, factor]
+        return params
+
+    def encode(self, frame, quality=95):
+        """Encode a BGR frame; returns the JPEG bytes, or None on failure"""
+        start = time.perf_counter()
+        if self.turbo:
+            # Library allocated, wrapper copied into a bytes object
+            flags = turbojpeg.TJFLAG_FASTDCT if self.fast_dct else 0
+            jpeg = self.turbo.encode(frame, quality=int(quality),
+                                     jpeg_subsample=self._turbo_subsampling(), flags=flags)
+        else:
+            # Encoded into a numpy buffer, copied out by tobytes()
+            ret, buffer = cv2.imencode('.jpg', frame, self._cv2_params(quality))
+            jpeg = buffer.tobytes() if ret else None
+
+        self.encode_seconds += time.perf_counter() - start
+        if jpeg is not None:
+            self.encodes += 1
+            self.bytes_out += len(jpeg)
+            self.bytes_copied += len(jpeg)
+        return jpeg
+
+    def stats(self):
+        encodes = max(self.encodes, 1)
+        return {
+            "backend": self.backend,
+            "encodes": self.encodes,
+            "avg_encode_ms": round(self.encode_seconds / encodes * 1000, 3),
+            "avg_jpeg_bytes": self.bytes_out // encodes,
+            "bytes_copied_per_frame": self.bytes_copied // encodes,
+        }
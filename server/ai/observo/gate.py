@@ -0,0 +1,126 @@
+import time
+
+import cv2
+import numpy as np
+
+from .config import (GATE_WIDTH, GATE_HISTORY, GATE_VAR_THRESHOLD, GATE_MIN_AREA, GATE_MAX_AREA,
+                     GATE_MIN_ASPECT, GATE_HOLD_FRAMES, GATE_REFRESH_FRAMES)
+
+
+class MotionGate:
+    """Cheap person/no-person pre-check run on every frame before the detector.
+
+    A background model on a small grey copy of the frame finds moving blobs; the
+    gate opens when a blob is person-sized and upright (height/width above
+    min_aspect). It fails open: it stays open while the background model is still
+    learning, when most of the frame changes at once (lights, camera shake), for
+    hold_frames after the detector last saw a person (so people standing still
+    keep being tracked), and for one frame every refresh_frames.
+    """
+    def __init__(self, width=GATE_WIDTH, history=GATE_HISTORY, var_threshold=GATE_VAR_THRESHOLD,
+                 min_area=GATE_MIN_AREA, max_area=GATE_MAX_AREA, min_aspect=GATE_MIN_ASPECT,
+                 hold_frames=GATE_HOLD_FRAMES, refresh_frames=GATE_REFRESH_FRAMES):
+        self.width = width
+        self.history = history
+        self.min_area = min_area
+        self.max_area = max_area
+        self.min_aspect = min_aspect
+        self.hold_frames = hold_frames
+        self.refresh_frames = refresh_frames
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=history, varThreshold=var_threshold, detectShadows=True)
+        self.kernel = np.ones((3, 3), np.uint8)
+        self.frames = 0
+        self.hold = 0
+        self.since_detect = 0
+        self.counters = dict.fromkeys(
+            ('frames', 'opened_blob', 'opened_hold', 'opened_refresh', 'opened_learning',
+             'opened_global_change', 'skipped'), 0)
+        self.gate_seconds = 0.0
+
+    def person_like_blob(self, frame):
+        """Update the background model; return True/False, or None if the whole scene changed"""
+        height = int(round(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        mask = self.subtractor.apply(small)
+        # MOG2 marks shadows as 127; only keep definite foreground
+        mask = cv2.morphologyEx((mask > 200).astype(np.uint8), cv2.MORPH_OPEN, self.kernel)
+
+        frame_area = float(mask.size)
+        if cv2.countNonZero(mask) / frame_area > self.max_area:
+            return None
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h / frame_area >= self.min_area and h >= self.min_aspect * w:
+                return True
+        return False
+
+    def should_detect(self, frame):
+        start = time.perf_counter()
+        self.frames += 1
+        self.since_detect += 1
+        self.counters['frames'] += 1
+        blob = self.person_like_blob(frame)
+        self.gate_seconds += time.perf_counter() - start
+
+        if self.frames <= self.history // 10:
+            reason = 'opened_learning'
+        elif blob is None:
+            reason = 'opened_global_change'
+        elif blob:
+            reason = 'opened_blob'
+        elif self.hold > 0:
+            reason = 'opened_hold'
+        elif self.since_detect >= self.refresh_frames:
+            reason = 'opened_refresh'
+        else:
+            self.counters['skipped'] += 1
+            return False
+        self.counters[reason] += 1
+        self.since_detect = 0
+        return True
+
+    def observe(self, detections):
+        """Feed back the detector's result for a frame the gate let through"""
+        if any(label == 'person' for label, _, _ in detections):
+            self.hold = self.hold_frames
+        elif self.hold > 0:
+            self.hold -= 1
+
+    def stats(self):
+        frames = self.counters['frames']
+        return {
+            **self.counters,
+            "skip_rate": round(self.counters['skipped'] / frames, 3) if frames else 0.0,
+            "avg_gate_ms": round(self.gate_seconds * 1000 / frames, 3) if frames else 0.0,
+        }
+
+
+class CascadeDetector:
+    """Runs the full detector only on frames the MotionGate lets through.
+
+    Frames the gate rejects report no detections. Same load/warm_up/detect/timings
+    surface as Detector, and it can wrap a CachedDetector.
+    """
+    def __init__(self, detector, gate=None):
+        self.detector = detector
+        self.gate = gate or MotionGate()
+
+    @property
+    def timings(self):
+        return {**self.detector.timings, "gate": self.gate.stats()}
+
+    def load(self):
+        return self.detector.load()
+
+    def warm_up(self, size):
+        return self.detector.warm_up(size)
+
+    def detect(self, frame):
+        if not self.gate.should_detect(frame):
+            return []
+        detections = self.detector.detect(frame)
+        self.gate.observe(detections)
+        return detections
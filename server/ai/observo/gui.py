@@ -0,0 +1,82 @@
+import logging
+
+import cv2
+import numpy as np
+
+from .config import FRAME_SIZE
+
+logger = logging.getLogger(__name__)
+
+WINDOW_NAME = "Security Monitor"
+ZONE_WINDOW_NAME = "Draw Protected Zone (Press ENTER when done)"
+
+
+def draw_zone_interactive(capture, size=FRAME_SIZE):
+    """Let the operator click out the protected zone on the first frame.
+
+    Returns the points (at least 3), or [] if cancelled with Q.
+    """
+    ret, frame = capture.read()
+    if not ret:
+        logger.error("Cannot read video")
+        return []
+
+    frame = cv2.resize(frame, size)
+    points = []
+
+    def mouse_callback(event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            points.append((x, y))
+
+    cv2.namedWindow(ZONE_WINDOW_NAME)
+    cv2.setMouseCallback(ZONE_WINDOW_NAME, mouse_callback)
+
+    while True:
+        temp = frame.copy()
+        for pt in points:
+            cv2.circle(temp, pt, 5, (0, 255, 255), -1)
+        if len(points) > 1:
+            cv2.polylines(temp, [np.array(points, dtype=np.int32)], False, (0, 255, 255), 2)
+
+        instructions = [
+            "Left click to add points",
+            "Press ENTER to finish (need >=3 points)",
+            f"Points: {len(points)}",
+            "Press Q to cancel"
+        ]
+        for i, text in enumerate(instructions):
+            cv2.putText(temp, text, (10, 30 + i*30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+        cv2.imshow(ZONE_WINDOW_NAME, temp)
+        key = cv2.waitKey(1)
+        if key == 13:  # Enter key
+            if len(points) >= 3:
+                break
+            print("Need at least 3 points to define a zone")
+        elif key == ord('q'):
+            points = []
+            break
+
+    cv2.destroyWindow(ZONE_WINDOW_NAME)
+    return points
+
+
+def run_display(broadcaster):
+    """Show the processed frames in a local window until Q is pressed (main thread only)"""
+    last_seq = None
+    try:
+        while True:
+            seq = broadcaster.wait_for_frame(last_seq, timeout=0.1)
+            if seq != last_seq:
+                with broadcaster.cond:
+                    frame = broadcaster.frame
+                last_seq = seq
+                if frame is not None:
+                    cv2.imshow(WINDOW_NAME, frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        logger.info("Shutting down gracefully...")
+    finally:
+        cv2.destroyAllWindows()
@@ -0,0 +1,424 @@
+import os
+import json
+import zlib
+import bisect
+import struct
+import logging
+import threading
+import time as time_module
+from collections import deque, namedtuple
+
+from .config import (JOURNAL_SEGMENT_SECONDS, JOURNAL_SEGMENT_BYTES, JOURNAL_FSYNC,
+                     JOURNAL_FSYNC_INTERVAL, JOURNAL_RETENTION, JOURNAL_COMPACT_AFTER,
+                     JOURNAL_MAINTENANCE_INTERVAL, JOURNAL_RETRY_DELAY)
+
+logger = logging.getLogger(__name__)
+
+# Record layout: header, then `json_len` bytes of JSON, then the blob (alert snapshot).
+#   payload length (json + blob), crc32 of the payload, seq, timestamp, json length
+RECORD_HEADER = struct.Struct('<IIQdI')
+SEGMENT_SUFFIX = '.seg'
+COMPACTED_SUFFIX = '.cseg'  # sealed, delivered segment with blobs stripped
+INDEX_EVERY = 32  # sparse time index: one (ts, offset) entry per this many records
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+JournalRecord = namedtuple('JournalRecord', 'seq ts data blob blob_size')
+
+
+class Segment:
+    """One journal file. Named <start ms>_<first seq> so segments sort by time."""
+    def __init__(self, path):
+        self.path = path
+        name = os.path.basename(path)
+        start_ms, first_seq = name.split('.')[0].split('_')
+        self.start_ts = int(start_ms) / 1000
+        self.first_seq = int(first_seq)
+        self.last_seq = self.first_seq - 1
+        self.last_ts = self.start_ts
+        self.size = 0
+        self.index_ts = []
+        self.index_offsets = []
+        self.records = 0
+
+    @property
+    def compacted(self):
+        return self.path.endswith(COMPACTED_SUFFIX)
+
+    @classmethod
+    def create(cls, directory, ts, first_seq):
+        path = os.path.join(directory, f"{int(ts * 1000):013d}_{first_seq:012d}{SEGMENT_SUFFIX}")
+        open(path, 'ab').close()
+        return cls(path)
+
+    def note(self, seq, ts, offset, length):
+        """Account for a record written (or scanned) at offset"""
+        if self.records % INDEX_EVERY == 0:
+            self.index_ts.append(ts)
+            self.index_offsets.append(offset)
+        self.records += 1
+        self.last_seq = seq
+        self.last_ts = ts
+        self.size = offset + length
+
+    def scan(self, repair=False):
+        """Rebuild the index from disk; with repair, cut off a torn tail"""
+        with open(self.path, 'rb') as f:
+            offset = 0
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, crc, seq, ts, _ = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                self.note(seq, ts, offset, RECORD_HEADER.size + length)
+                offset = self.size
+            tail = f.seek(0, os.SEEK_END)
+        if tail > self.size:
+            if repair:
+                logger.warning(f"Journal segment {self.path}: dropping {tail - self.size} torn bytes")
+                with open(self.path, 'r+b') as f:
+                    f.truncate(self.size)
+            else:
+                logger.warning(f"Journal segment {self.path}: unreadable after offset {self.size}")
+
+    def iter_records(self, since=None, with_blobs=True):
+        """Records from the first one at or after `since` (sparse index seek, then scan).
+
+        Without blobs only the JSON part of each record is read; the snapshot is seeked over.
+        """
+        start = 0
+        if since is not None and self.index_ts:
+            # Last indexed record strictly before `since`; equal timestamps may precede it
+            pos = bisect.bisect_left(self.index_ts, since) - 1
+            if pos >= 0:
+                start = self.index_offsets[pos]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            while f.tell() < self.size:
+                length, crc, seq, ts, json_len = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                if since is not None and ts < since:
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+                data = json.loads(f.read(json_len))
+                if with_blobs:
+                    blob = f.read(length - json_len)
+                else:
+                    blob = b''
+                    f.seek(length - json_len, os.SEEK_CUR)
+                yield JournalRecord(seq, ts, data, blob, length - json_len)
+
+
+class EventJournal:
+    """Append-only, segmented on-disk journal of alert events.
+
+    - records are length-prefixed and CRC-checked; a torn tail after a crash is cut off on open
+    - segments roll every segment_seconds / segment_bytes and are named by start time, so a
+      time-range read only opens the segments it overlaps and seeks inside them with a
+      sparse index
+    - fsync policy: 'always' (every append), 'interval' (at most every fsync_interval
+      seconds, plus on roll/close) or 'never' (leave it to the OS)
+    - a delivery cursor records which events reached the backend; pending() returns the rest
+    - maintain() deletes delivered segments older than `retention` and compacts delivered
+      segments older than `compact_after` by dropping their snapshots (the backend has them)
+    """
+    def __init__(self, directory, segment_seconds=JOURNAL_SEGMENT_SECONDS,
+                 segment_bytes=JOURNAL_SEGMENT_BYTES, fsync=JOURNAL_FSYNC,
+                 fsync_interval=JOURNAL_FSYNC_INTERVAL, retention=JOURNAL_RETENTION,
+                 compact_after=JOURNAL_COMPACT_AFTER, clock=time_module.time):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.retention = retention
+        self.compact_after = compact_after
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.cursor_path = os.path.join(directory, 'delivered')
+        self.id_path = os.path.join(directory, 'id')
+        self.active = None  # open file of the last segment
+        self.last_fsync = 0.0
+        self.dirty = False
+        self.maintenance_thread = None
+        self.closed = threading.Event()
+
+        os.makedirs(directory, exist_ok=True)
+        names = sorted(n for n in os.listdir(directory)
+                       if n.endswith(SEGMENT_SUFFIX) or n.endswith(COMPACTED_SUFFIX))
+        self.segments = [Segment(os.path.join(directory, n)) for n in names]
+        for i, segment in enumerate(self.segments):
+            segment.scan(repair=(i == len(self.segments) - 1))
+        self.delivered_seq = self._read_cursor()
+        # Identifies this journal's sequence numbers; a recreated journal starts over at 1
+        self.id = self._read_id()
+        # Retention may have removed every segment; never reuse delivered sequence numbers
+        self.next_seq = max(self.segments[-1].last_seq if self.segments else 0, self.delivered_seq) + 1
+
+    def _read_cursor(self):
+        try:
+            with open(self.cursor_path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _read_id(self):
+        try:
+            with open(self.id_path) as f:
+                journal_id = f.read().strip()
+            if journal_id:
+                return journal_id
+        except OSError:
+            pass
+        journal_id = os.urandom(6).hex()
+        tmp = self.id_path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(journal_id)
+        os.replace(tmp, self.id_path)
+        return journal_id
+
+    def _sync(self, force=False):
+        if self.active is None or not self.dirty:
+            return
+        if force or self.fsync == 'always' or (
+                self.fsync == 'interval' and time_module.monotonic() - self.last_fsync >= self.fsync_interval):
+            os.fsync(self.active.fileno())
+            self.last_fsync = time_module.monotonic()
+            self.dirty = False
+
+    def _seal(self):
+        if self.active is not None:
+            if self.fsync != 'never':
+                self._sync(force=True)
+            self.active.close()
+            self.active = None
+
+    def _segment_for_append(self, ts):
+        current = self.segments[-1] if self.segments else None
+        if (current is None or current.compacted or current.size >= self.segment_bytes
+                or ts - current.start_ts >= self.segment_seconds):
+            self._seal()
+            current = Segment.create(self.directory, ts, self.next_seq)
+            self.segments.append(current)
+        if self.active is None:
+            self.active = open(current.path, 'ab')
+        return current
+
+    def append(self, data, blob=b'', ts=None):
+        """Write one event; returns its sequence number once it's on disk per the fsync policy"""
+        payload_json = json.dumps(data, separators=(',', ':')).encode()
+        payload = payload_json + blob
+        with self.lock:
+            ts = self.clock() if ts is None else ts
+            if self.segments:
+                # Keep timestamps monotonic so the time index stays sorted
+                ts = max(ts, self.segments[-1].last_ts)
+            segment = self._segment_for_append(ts)
+            seq = self.next_seq
+            header = RECORD_HEADER.pack(len(payload), zlib.crc32(payload), seq, ts, len(payload_json))
+            self.active.write(header + payload)
+            self.active.flush()
+            self.dirty = True
+            self._sync()
+            segment.note(seq, ts, segment.size, len(header) + len(payload))
+            self.next_seq += 1
+            return seq
+
+    def read(self, since=None, until=None, limit=None, with_blobs=False):
+        """Records with since <= ts <= until, oldest first; with limit, the most recent `limit`.
+
+        With a limit, segments are walked newest first and the walk stops once
+        enough records are found, so older segments are never opened.
+        """
+        with self.lock:
+            if not limit:
+                out = []
+                for segment in self.segments:
+                    if until is not None and segment.start_ts > until:
+                        break
+                    if since is not None and segment.records and segment.last_ts < since:
+                        continue
+                    out.extend(self._read_segment(segment, since, until, with_blobs))
+                return out
+
+            chunks, found = [], 0
+            for segment in reversed(self.segments):
+                if since is not None and segment.records and segment.last_ts < since:
+                    break  # this and every older segment end before `since`
+                if until is not None and segment.start_ts > until:
+                    continue
+                records = deque(self._read_segment(segment, since, until, with_blobs), maxlen=limit - found)
+                chunks.append(records)
+                found += len(records)
+                if found >= limit:
+                    break
+        return [record for chunk in reversed(chunks) for record in chunk]
+
+    @staticmethod
+    def _read_segment(segment, since, until, with_blobs):
+        for record in segment.iter_records(since, with_blobs):
+            if until is not None and record.ts > until:
+                break
+            yield record
+
+    def get(self, seq):
+        """Single record (with blob) by sequence number, or None"""
+        with self.lock:
+            pos = bisect.bisect_right([s.first_seq for s in self.segments], seq) - 1
+            if pos < 0 or seq > self.segments[pos].last_seq:
+                return None
+            for record in self.segments[pos].iter_records():
+                if record.seq == seq:
+                    return record
+        return None
+
+    def after(self, seq, limit=None):
+        """Records (without blobs) with a sequence number above seq, oldest first"""
+        out = []
+        with self.lock:
+            for segment in self.segments:
+                if segment.last_seq <= seq:
+                    continue
+                for record in segment.iter_records(with_blobs=False):
+                    if record.seq > seq:
+                        out.append(record)
+                        if limit and len(out) >= limit:
+                            return out
+        return out
+
+    def pending(self, limit=100):
+        """Undelivered records (with blobs), oldest first"""
+        out = []
+        with self.lock:
+            for segment in self.segments:
+                if segment.last_seq <= self.delivered_seq:
+                    continue
+                for record in segment.iter_records():
+                    if record.seq > self.delivered_seq:
+                        out.append(record)
+                        if len(out) >= limit:
+                            return out
+        return out
+
+    def mark_delivered(self, seq):
+        with self.lock:
+            if seq <= self.delivered_seq:
+                return
+            tmp = self.cursor_path + '.tmp'
+            with open(tmp, 'w') as f:
+                f.write(str(seq))
+                f.flush()
+                if self.fsync != 'never':
+                    os.fsync(f.fileno())
+            os.replace(tmp, self.cursor_path)
+            self.delivered_seq = seq
+
+    def maintain(self):
+        """Retention and compaction of sealed segments; also honours the fsync interval"""
+        now = self.clock()
+        with self.lock:
+            self._sync()
+            current = self.segments[-1] if self.segments else None
+            # Seal an idle active segment so it can age out like the others
+            if current is not None and not current.compacted and now - current.start_ts >= self.segment_seconds:
+                self._seal()
+            sealed = self.segments if self.active is None else self.segments[:-1]
+            for segment in list(sealed):
+                if segment.last_seq > self.delivered_seq:
+                    continue  # never drop events the backend hasn't got
+                if now - segment.last_ts >= self.retention:
+                    os.remove(segment.path)
+                    self.segments.remove(segment)
+                    logger.info(f"Journal: removed expired segment {os.path.basename(segment.path)}")
+                elif not segment.compacted and now - segment.last_ts >= self.compact_after:
+                    self._compact(segment)
+
+    def _compact(self, segment):
+        compacted_path = segment.path[:-len(SEGMENT_SUFFIX)] + COMPACTED_SUFFIX
+        tmp = compacted_path + '.tmp'
+        with open(tmp, 'wb') as out:
+            for record in segment.iter_records(with_blobs=False):
+                payload = json.dumps({**record.data, "blob_dropped": True}, separators=(',', ':')).encode()
+                out.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload), record.seq, record.ts,
+                                             len(payload)) + payload)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, compacted_path)
+        os.remove(segment.path)
+        replacement = Segment(compacted_path)
+        replacement.scan()
+        self.segments[self.segments.index(segment)] = replacement
+        logger.info(f"Journal: compacted {os.path.basename(segment.path)} "
+                    f"({segment.size} -> {replacement.size} bytes)")
+
+    def start_maintenance(self, interval=JOURNAL_MAINTENANCE_INTERVAL):
+        def loop():
+            while not self.closed.wait(interval):
+                try:
+                    self.maintain()
+                except Exception as e:
+                    logger.error(f"Journal maintenance failed: {str(e)}")
+        self.maintenance_thread = threading.Thread(target=loop, daemon=True)
+        self.maintenance_thread.start()
+
+    def close(self):
+        self.closed.set()
+        with self.lock:
+            self._seal()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "segments": len(self.segments),
+                "bytes": sum(s.size for s in self.segments),
+                "last_seq": self.next_seq - 1,
+                "delivered_seq": self.delivered_seq,
+                "pending": max(0, self.next_seq - 1 - self.delivered_seq),
+                "fsync": self.fsync,
+            }
+
+
+class BackendReplayer:
+    """Delivers journaled events to the backend in order, retrying with backoff.
+
+    send(record) must raise on failure. After an outage the backlog is replayed
+    from the journal's delivery cursor, so events are delivered at least once.
+    """
+    def __init__(self, journal, send, retry_delay=JOURNAL_RETRY_DELAY):
+        self.journal = journal
+        self.send = send
+        self.min_delay, self.max_delay = retry_delay
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def notify(self):
+        self.wakeup.set()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        delay = self.min_delay
+        while not self.journal.closed.is_set():
+            self.wakeup.clear()
+            failed = False
+            for record in self.journal.pending():
+                try:
+                    self.send(record)
+                except Exception as e:
+                    logger.warning(f"Alert {record.seq} not delivered, retrying in {delay:g}s: {e}")
+                    failed = True
+                    break
+                self.journal.mark_delivered(record.seq)
+
+            if failed:
+                self.wakeup.wait(delay)
+                delay = min(delay * 2, self.max_delay)
+            else:
+                delay = self.min_delay
+                if not self.journal.pending(limit=1):
+                    self.wakeup.wait(self.max_delay)
@@ -0,0 +1,398 @@
+import logging
+import threading
+import time as time_module
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from .config import FRAME_SKIP, FRAME_SIZE, RTSP_RECONNECT_DELAY, MAX_ALERTS_IN_MEMORY
+from .detector import Detector
+from .rules import RulePipeline, TrackedDetections, IntrusionRule, FEATURE_RULES
+from .sinks import HttpSink, JournalSink
+from .tracker import CentroidTracker
+
+logger = logging.getLogger(__name__)
+
+
+class SecurityMonitor:
+    """Capture -> detect -> track -> rules -> sinks loop for one camera.
+
+    What fires is decided by the RulePipeline (built from the legacy feature
+    codes when none is given) and where alerts go by the sinks; the broadcaster,
+    if any, gets every processed frame for the stream/GUI outputs.
+    """
+    def __init__(self, video_path, features, camera_id, user_id, encoder,
+                 detector=None, broadcaster=None, annotate=True, pipeline=None, sinks=None,
+                 analytics=None, clock=None, frame_skip=FRAME_SKIP, capture_factory=None):
+        self.detector = detector or Detector()
+        self.video_path = video_path
+        self.camera_id = camera_id
+        self.user_id = user_id
+        self.encoder = encoder
+        self.broadcaster = broadcaster
+        self.annotate = annotate
+        # Wall clock for rules and alert timestamps; replays and simulations inject their own
+        self.clock = clock or time_module.time
+        self.frame_skip = frame_skip
+        # source -> capture object (cv2.VideoCapture surface); None means OpenCV's own decode
+        self.capture_factory = capture_factory
+        self.capture = None
+        self.frame_counter = 0
+        self.frame_seq = 0
+        # Camera resolution; frames are resized to FRAME_SIZE without keeping its aspect ratio
+        self.source_size = FRAME_SIZE
+        self.tracker = CentroidTracker()
+        self.frame_tracked = None
+        self._frame_dicts = None
+        # Validate features
+        feature_list = [f.strip() for f in features.split(',') if f.strip()]
+        if not all(f in FEATURE_RULES for f in feature_list):
+            raise ValueError(f"Invalid feature codes. Only 1,2,3 are allowed. Got: {features}")
+        self.features = feature_list
+        self.pipeline = pipeline or RulePipeline.build(feature_list)
+        self.alert_colors = self.pipeline.colors()
+        self.analytics = analytics
+
+        self.sinks = sinks if sinks is not None else [HttpSink()]
+        # /alerts reads history from the journal when alerts are journaled
+        self.journal = next((s.journal for s in self.sinks if isinstance(s, JournalSink)), None)
+        self.alerts = []  # most recent alerts, for /alerts/stream
+        self.alerts_cond = threading.Condition()  # notified when an alert is appended
+        # /alerts/stream event ids are "<boot id>-<alert id>". Journaled alert ids
+        # are journal sequence numbers and survive restarts; otherwise they start
+        # over at 1, so the boot id changes and resuming clients are reset.
+        self.boot_id = f"{int(time_module.time() * 1000):x}"
+        if self.journal is not None:
+            self.boot_id = self.journal.id
+            self.alerts = [self.alert_from_record(r) for r in self.journal.read(limit=MAX_ALERTS_IN_MEMORY)]
+
+        # Readiness: the model is loaded/warmed in the background while the
+        # camera connects; /ready reports 'ready' once a frame has been inferred.
+        self.state = 'starting'
+        self.started_at = time_module.monotonic()
+        self.startup_times = {}
+        self.model_ready = threading.Event()
+        self.model_error = None
+
+    def mark_startup(self, stage):
+        self.startup_times[stage] = round(time_module.monotonic() - self.started_at, 3)
+
+    def readiness(self):
+        status = {
+            "ready": self.state == 'ready',
+            "state": self.state,
+            "camera": self.camera_id,
+            "startup": self.startup_times,
+            "model": self.detector.timings,
+        }
+        if self.journal is not None:
+            status["journal"] = self.journal.stats()
+        intrusion = self.pipeline.get(IntrusionRule)
+        if intrusion is not None:
+            status["schedule"] = intrusion.schedule.describe()
+        if self.analytics is not None:
+            status["analytics"] = self.analytics.snapshot()
+        if hasattr(self.capture, 'stats'):
+            status["capture"] = self.capture.stats()
+        return status
+
+    def prepare_model(self):
+        """Load and warm up the detector; runs in parallel with the camera connect"""
+        try:
+            self.detector.load()
+            self.mark_startup('model_loaded')
+            self.detector.warm_up(FRAME_SIZE)
+            self.mark_startup('model_warm')
+        except Exception as e:
+            logger.error(f"Model preparation failed: {str(e)}")
+            self.model_error = e
+            self.state = 'error'
+        finally:
+            self.model_ready.set()
+
+    def get_video_capture(self):
+        if not self.video_path:
+            raise ValueError("No video source configured for camera")
+
+        try:
+            if self.capture_factory is not None:
+                cap = self.capture_factory(self.video_path)
+            elif self.video_path.startswith('rtsp://'):
+                cap = cv2.VideoCapture(self.video_path, cv2.CAP_FFMPEG)
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
+            else:
+                cap = cv2.VideoCapture(self.video_path)
+
+            if not cap.isOpened():
+                raise RuntimeError(f"Failed to open video source: {self.video_path}")
+
+            return cap
+
+        except Exception as e:
+            logger.error(f"Video capture initialization failed: {str(e)}")
+            raise
+
+    @staticmethod
+    def read_source_size(cap):
+        """Camera resolution for viewers that show the camera's own frames (HLS)"""
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return (width, height) if width > 0 and height > 0 else FRAME_SIZE
+
+    def read_frame_with_retry(self, cap, max_attempts=3):
+        for attempt in range(max_attempts):
+            ret, frame = cap.read()
+            if ret:
+                return ret, frame
+
+            logger.warning(f"Reconnecting attempt {attempt + 1}/{max_attempts}...")
+            try:
+                cap.release()
+                time_module.sleep(RTSP_RECONNECT_DELAY)
+                cap = self.get_video_capture()
+            except Exception as e:
+                logger.error(f"Reconnection failed: {str(e)}")
+
+        return False, None
+
+    def update_detections(self, detections, now=None):
+        """Track detections and evaluate the alert rules.
+
+        detections: list of (label, (x1, y1, x2, y2), confidence) from Detector.detect
+        """
+        now = self.clock() if now is None else now
+        track_ids, dropped = self.tracker.update([(label, box) for label, box, _ in detections])
+        self.pipeline.forget(dropped)
+        tracked = TrackedDetections(track_ids, detections)
+        self.frame_tracked = tracked
+        self._frame_dicts = None
+        if self.analytics is not None:
+            self.analytics.update(tracked, dropped, now)
+        return self.pipeline.evaluate(tracked, now)
+
+    @property
+    def frame_detections(self):
+        """The last frame's detections as /metadata records, built only when streamed or drawn"""
+        if self._frame_dicts is None:
+            self._frame_dicts = self.frame_tracked.to_dicts() if self.frame_tracked is not None else []
+        return self._frame_dicts
+
+    def build_metadata(self, alerts, fps):
+        """Compact per-frame description of what the detector saw, keyed by frame sequence"""
+        zones = [{"name": zone["name"], "points": zone["points"], "occupied": zone["occupied"]}
+                 for zone in self.pipeline.zones()]
+        metadata = {
+            "seq": self.frame_seq,
+            "ts": round(self.clock(), 3),
+            "camera": self.camera_id,
+            "size": list(FRAME_SIZE),
+            "source": list(self.source_size),
+            "fps": round(fps, 1),
+            "annotated": self.annotate,
+            "detections": self.frame_detections,
+            "zones": zones,
+            "alerts": [{"type": alert_type, "message": message} for alert_type, message in alerts]
+        }
+        if self.analytics is not None:
+            metadata["analytics"] = self.analytics.snapshot()
+        return metadata
+
+    def draw_overlays(self, frame):
+        """Burn the current detections and rule zones into the frame"""
+        for zone in self.pipeline.zones():
+            exterior = np.array(zone["points"], dtype=np.int32)
+            cv2.polylines(frame, [exterior], True, zone["color"], 2)
+            cv2.putText(frame, zone["name"], tuple(zone["points"][0]),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, zone["color"], 2)
+
+        if self.analytics is not None:
+            counts = self.analytics.snapshot()
+            for line in counts["lines"]:
+                p1, p2 = tuple(line["points"][0]), tuple(line["points"][1])
+                cv2.line(frame, p1, p2, (255, 255, 0), 2)
+                cv2.putText(frame, f"{line['name']} in {line['in']} out {line['out']}", p1,
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+            for zone in counts["zones"]:
+                cv2.polylines(frame, [np.array(zone["points"], dtype=np.int32)], True, (255, 255, 0), 1)
+                cv2.putText(frame, f"{zone['name']}: {zone['occupancy']}", tuple(zone["points"][0]),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+
+        for det in self.frame_detections:
+            x1, y1, x2, y2 = det["box"]
+            color = (0, 255, 0) if det["label"] == 'person' else (255, 0, 0)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, f"{det['label']} {det['conf']:.2f}", (x1, y1-10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+    def alert_from_record(self, record):
+        """Alert as listed by /alerts and pushed by /alerts/stream, from a journal record"""
+        return {
+            "id": record.seq,
+            "type": record.data["type"],
+            "message": record.data["message"],
+            "image": f"alerts/{record.seq}/image" if record.blob_size else None,
+            "timestamp": record.data["timestamp"],
+            "delivered": record.seq <= self.journal.delivered_seq,
+        }
+
+    def save_alert(self, frame, alert_type, message):
+        fired_ts = self.clock()
+        fired_at = datetime.fromtimestamp(fired_ts)
+        timestamp = fired_at.strftime("%Y%m%d_%H%M%S_%f")
+        # Add alert text to the frame before sending
+        alert_frame = frame.copy()
+        if not self.annotate:
+            self.draw_overlays(alert_frame)
+        cv2.putText(alert_frame, f"{alert_type}: {message}", (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.alert_colors.get(alert_type, (0, 0, 255)), 2)
+        cv2.putText(alert_frame, fired_at.strftime("%Y-%m-%d %H:%M:%S"), (10, 60),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        # Encode frame as JPEG in memory
+        img_bytes = self.encoder.encode(alert_frame)
+
+        data = {
+            'type': alert_type,
+            'message': message,
+            'camera': self.camera_id,
+            'user': self.user_id,
+            'timestamp': timestamp,
+        }
+
+        alert = {"image": None, "delivered": False}
+        for sink in self.sinks:
+            try:
+                alert.update(sink.emit(data, img_bytes, fired_ts))
+            except Exception as e:
+                logger.error(f"{type(sink).__name__} failed for {alert_type} alert: {e}")
+
+        with self.alerts_cond:
+            if "id" not in alert:
+                alert["id"] = self.alerts[-1]["id"] + 1 if self.alerts else 1
+            self.alerts.append({"id": alert["id"], "type": alert_type, "message": message,
+                                "image": alert["image"], "timestamp": timestamp,
+                                "delivered": alert["delivered"]})
+            del self.alerts[:-MAX_ALERTS_IN_MEMORY]
+            self.alerts_cond.notify_all()
+        return alert["id"]
+
+    def alerts_after(self, event_id):
+        """(alerts after an /alerts/stream event id, id to continue from).
+
+        Alerts is None when the delta can't be served (another boot or journal,
+        or too far behind) and the client has to reload the list. No event id
+        means a new client, which gets the alerts in memory.
+        """
+        with self.alerts_cond:
+            alerts = list(self.alerts)
+        latest = alerts[-1]["id"] if alerts else 0
+        if not event_id:
+            return alerts, latest
+        boot, _, seq = str(event_id).rpartition('-')
+        try:
+            last = int(seq)
+        except ValueError:
+            return None, latest
+        if boot != self.boot_id or last > latest:
+            return None, latest
+        if not alerts or alerts[0]["id"] <= last + 1:
+            return [alert for alert in alerts if alert["id"] > last], latest
+        if self.journal is not None:
+            records = self.journal.after(last, limit=MAX_ALERTS_IN_MEMORY + 1)
+            if len(records) <= MAX_ALERTS_IN_MEMORY:
+                return [self.alert_from_record(r) for r in records], max(latest, last)
+        return None, latest
+
+    def skip_frame(self):
+        """Count a decoded frame; True when frame_skip says not to process it"""
+        self.frame_counter += 1
+        return self.frame_counter % self.frame_skip != 0
+
+    def process_frame(self, frame, fps=0.0):
+        """Detect, track, alert and publish one decoded frame; returns the fired (type, message) pairs"""
+        if (frame.shape[1], frame.shape[0]) != FRAME_SIZE:
+            frame = cv2.resize(frame, FRAME_SIZE)
+        self.frame_seq += 1
+
+        # Run detection
+        alerts = self.update_detections(self.detector.detect(frame))
+        if self.annotate:
+            self.draw_overlays(frame)
+
+        # Save alerts with screenshots
+        for alert_type, message in alerts:
+            self.save_alert(frame, alert_type, message)
+
+        if self.annotate:
+            # Add FPS to frame
+            cv2.putText(frame, f"FPS: {fps:.1f}", (10, frame.shape[0]-10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+        if self.broadcaster is not None:
+            self.broadcaster.publish(frame.copy(), self.frame_seq, self.build_metadata(alerts, fps))
+        return alerts
+
+    def run_detection(self):
+        """Main detection loop"""
+        cap = None
+        last_frame_time = time_module.time()
+        threading.Thread(target=self.prepare_model, daemon=True).start()
+        for sink in self.sinks:
+            sink.start()
+        if self.analytics is not None:
+            self.analytics.start_flusher()
+
+        while True:
+            try:
+                if cap is None or not cap.isOpened():
+                    self.state = 'connecting'
+                    cap = self.capture = self.get_video_capture()
+                    self.source_size = self.read_source_size(cap)
+                    time_module.sleep(1)  # Allow time for connection
+                    if 'camera_connected' not in self.startup_times:
+                        self.mark_startup('camera_connected')
+
+                ret, frame = self.read_frame_with_retry(cap)
+                if not ret:
+                    logger.error("Failed to read frame after multiple attempts")
+                    self.state = 'connecting'
+                    cap.release()
+                    cap = None
+                    continue
+
+                # Keyframe-only decode is already down to one frame per GOP (frame
+                # timing is passed through, so there are no duplicates); skipping
+                # on top of that would only notice a person every other GOP
+                if self.skip_frame() and not getattr(cap, 'keyframes_only', False):
+                    continue
+
+                if not self.model_ready.is_set():
+                    self.state = 'warming_up'
+                    self.model_ready.wait()
+                if self.model_error is not None:
+                    raise RuntimeError(f"Model unavailable: {self.model_error}")
+
+                # Calculate FPS
+                current_time = time_module.time()
+                fps = 1 / (current_time - last_frame_time)
+                last_frame_time = current_time
+
+                self.process_frame(frame, fps)
+                if hasattr(cap, 'note_activity'):
+                    cap.note_activity(bool(self.frame_tracked.is_person.any()))
+
+                if self.state != 'ready':
+                    self.state = 'ready'
+                    if 'ready' not in self.startup_times:
+                        self.mark_startup('ready')
+                        logger.info(f"Camera ready to infer after {self.startup_times['ready']:.2f}s")
+
+            except Exception as e:
+                logger.error(f"Error in detection loop: {str(e)}")
+                if self.model_error is None:
+                    self.state = 'connecting'
+                if cap is not None:
+                    cap.release()
+                cap = None
+                time_module.sleep(RTSP_RECONNECT_DELAY)
@@ -0,0 +1,243 @@
+"""Deterministic replay of recorded detections through SecurityMonitor.
+
+A recording holds the detector output for every decoded frame of a clip, so
+replaying it needs no model and no video decode. The clock is driven by the
+frame index, so rule timers, cooldowns and schedules behave as they did on
+the recorded footage. The fired alerts are compared against a golden file.
+Use it to check that changes to update_detections, frame skipping, the
+tracker or the rules keep the alerts the same.
+
+    # once per clip, with the real model
+    python -m observo.replay record --video night_lot.mp4 --out replays/night_lot.jsonl
+    # freeze the current behaviour for a configuration
+    python -m observo.replay bless replays/night_lot.jsonl --golden replays/night_lot.1-2-3.json \
+        --features 1,2,3 --start 2024-01-10T21:30:00
+    # after a change: exits 1 and prints a diff if any alert differs
+    python -m observo.replay check replays/night_lot.1-2-3.json
+
+Recording a new clip or model needs the model; bless and check run on
+CPU only.
+"""
+import os
+import sys
+import json
+import time
+import difflib
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from .config import FRAME_SIZE, FRAME_SKIP, MODEL_PATH
+
+
+class FrameClock:
+    """Clock that reads start + frame / fps; the harness sets the frame"""
+    def __init__(self, start, fps):
+        self.start = start
+        self.fps = fps
+        self.frame = 0
+
+    def __call__(self):
+        return self.start + self.frame / self.fps
+
+
+class Recording:
+    """Detections for every decoded frame of a clip, stored as JSON lines.
+
+    The first line is a header (source, fps, start, model, frame_size); each
+    following line is one frame's [[label, [x1, y1, x2, y2], conf], ...].
+    """
+    def __init__(self, frames, fps, start, source=None, model=None):
+        self.frames = frames
+        self.fps = fps
+        self.start = start
+        self.source = source
+        self.model = model
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            header = json.loads(f.readline())
+            frames = [[(label, tuple(box), conf) for label, box, conf in json.loads(line)]
+                      for line in f if line.strip()]
+        return cls(frames, header["fps"], header["start"], header.get("source"), header.get("model"))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(json.dumps({"source": self.source, "fps": self.fps, "start": self.start,
+                                "model": self.model, "frame_size": list(FRAME_SIZE)}) + "\n")
+            for detections in self.frames:
+                f.write(json.dumps([[label, list(box), round(conf, 4)] for label, box, conf in detections]) + "\n")
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class ReplayDetector:
+    """Detector stand-in that returns the recorded detections for the current frame"""
+    def __init__(self, recording):
+        self.recording = recording
+        self.frame = 0
+        self.timings = {}
+
+    def load(self):
+        pass
+
+    def warm_up(self, size=FRAME_SIZE):
+        pass
+
+    def detect(self, frame):
+        return list(self.recording.frames[self.frame])
+
+
+def record(video, model_path=MODEL_PATH, limit=None):
+    """Run the real detector on every frame of a clip"""
+    import cv2
+    from .detector import Detector
+
+    detector = Detector(model_path)
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open {video}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    frames = []
+    while limit is None or len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(detector.detect(cv2.resize(frame, FRAME_SIZE)))
+    cap.release()
+    return Recording(frames, fps, os.path.getmtime(video), source=os.path.basename(video), model=model_path)
+
+
+def build_monitor(recording, clock, config):
+    from .encoder import JpegEncoder
+    from .monitor import SecurityMonitor
+    from .rules import RulePipeline
+    from .schedule import Schedule
+
+    schedule = Schedule.from_spec(config["schedule"]) if config.get("schedule") else None
+    pipeline = RulePipeline.build(config["features"], config.get("rules", ()),
+                                  zone=config.get("zone"), schedule=schedule)
+    return SecurityMonitor(None, ",".join(config["features"]), "replay", "replay", JpegEncoder(),
+                           detector=ReplayDetector(recording), annotate=False, pipeline=pipeline,
+                           sinks=[], clock=clock, frame_skip=config.get("frame_skip", FRAME_SKIP))
+
+
+def replay(recording, config):
+    """Feed a recording through a fresh monitor; returns (alerts, frames per second).
+
+    Alerts are {"frame", "t", "type", "message"} with t in seconds from the
+    start of the clip. The monitor is the real one (frame skip, tracker, rules,
+    save_alert); only the frames are blank, because nothing downstream of the
+    detector looks at pixels.
+    """
+    clock = FrameClock(config.get("start", recording.start), recording.fps)
+    monitor = build_monitor(recording, clock, config)
+    blank = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    alerts = []
+    started = time.perf_counter()
+    for index in range(len(recording)):
+        clock.frame = monitor.detector.frame = index
+        if monitor.skip_frame():
+            continue
+        for alert_type, message in monitor.process_frame(blank):
+            alerts.append({"frame": index, "t": round(index / recording.fps, 3),
+                           "type": alert_type, "message": message})
+    elapsed = time.perf_counter() - started
+    return alerts, len(recording) / elapsed if elapsed > 0 else float('inf')
+
+
+def alert_lines(alerts):
+    return [f"{a['frame']:>7} {a['t']:>10.3f}  {a['type']:<7} {a['message']}" for a in alerts]
+
+
+def diff_alerts(expected, actual):
+    """Unified diff of two alert lists, empty when they match"""
+    return list(difflib.unified_diff(alert_lines(expected), alert_lines(actual),
+                                     'golden', 'replay', lineterm=''))
+
+
+def parse_start(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m observo.replay', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rec = commands.add_parser('record', help='Run the detector over a clip and save its output')
+    rec.add_argument('--video', required=True)
+    rec.add_argument('--out', required=True, help='Recording to write (.jsonl)')
+    rec.add_argument('--model', default=MODEL_PATH)
+    rec.add_argument('--frames', type=int, help='Stop after this many frames')
+
+    bless = commands.add_parser('bless', help='Write the golden alerts for a recording and configuration')
+    bless.add_argument('recording')
+    bless.add_argument('--golden', required=True)
+    bless.add_argument('--features', default='1,2,3')
+    bless.add_argument('--rules', default='', help='Extra rules, as for detect.py --rules')
+    bless.add_argument('--zone', help='Protected zone JSON, as for detect.py --zone')
+    bless.add_argument('--schedule', help='Schedule JSON, as for detect.py --schedule')
+    bless.add_argument('--frame_skip', type=int, default=FRAME_SKIP)
+    bless.add_argument('--start', help='Clock at the first frame (ISO time or epoch); default: clip mtime')
+
+    check = commands.add_parser('check', help='Replay and diff against a golden file')
+    check.add_argument('golden')
+    check.add_argument('--recording', help='Override the recording named in the golden file')
+    check.add_argument('--min_fps', type=float, default=0, help='Also fail when replay is slower than this')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        recording = record(args.video, args.model, args.frames)
+        recording.save(args.out)
+        print(f"{len(recording)} frames at {recording.fps:g} fps -> {args.out}")
+        return 0
+
+    if args.command == 'bless':
+        from .cli import read_json_arg
+
+        recording = Recording.load(args.recording)
+        config = {
+            "features": [f.strip() for f in args.features.split(',') if f.strip()],
+            "rules": [r.strip() for r in args.rules.split(',') if r.strip()],
+            "zone": read_json_arg(args.zone) if args.zone else None,
+            "schedule": read_json_arg(args.schedule) if args.schedule else None,
+            "frame_skip": args.frame_skip,
+            "start": parse_start(args.start) if args.start else recording.start,
+        }
+        alerts, fps = replay(recording, config)
+        golden_dir = os.path.dirname(os.path.abspath(args.golden))
+        with open(args.golden, 'w') as f:
+            json.dump({"recording": os.path.relpath(os.path.abspath(args.recording), golden_dir),
+                       "config": config, "alerts": alerts}, f, indent=1)
+            f.write("\n")
+        print(f"{len(alerts)} alerts over {len(recording)} frames ({fps:,.0f} frames/s) -> {args.golden}")
+        return 0
+
+    with open(args.golden) as f:
+        golden = json.load(f)
+    path = args.recording or os.path.join(os.path.dirname(os.path.abspath(args.golden)), golden["recording"])
+    recording = Recording.load(path)
+    alerts, fps = replay(recording, golden["config"])
+    diff = diff_alerts(golden["alerts"], alerts)
+    print(f"{len(recording)} frames, {len(alerts)} alerts, {fps:,.0f} frames/s")
+    if diff:
+        print("\n".join(diff))
+        print(f"FAIL: alerts differ from {args.golden}")
+        return 1
+    if fps < args.min_fps:
+        print(f"FAIL: {fps:,.0f} frames/s is below --min_fps {args.min_fps:,.0f}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import logging
+import importlib
+
+import numpy as np
+
+from .config import (MIN_ZONE_DWELL_TIME, MIN_LOITER_TIME, ALERT_COOLDOWN, ALERT_TIME_WINDOW,
+                     DEFAULT_ZONE_POINTS)
+from .schedule import Schedule
+
+logger = logging.getLogger(__name__)
+
+
+class TrackedDetections:
+    """One frame's tracked detections as parallel arrays, built once and shared by every rule"""
+    def __init__(self, track_ids, detections):
+        n = len(detections)
+        self.ids = np.asarray(track_ids, dtype=np.int64).reshape(n)
+        self.labels = np.array([label for label, _, _ in detections], dtype=object).reshape(n)
+        self.boxes = np.array([box for _, box, _ in detections], dtype=np.int32).reshape(n, 4)
+        self.conf = np.array([conf for _, _, conf in detections], dtype=np.float32).reshape(n)
+        self.centers = (self.boxes[:, :2] + self.boxes[:, 2:]) // 2
+        self.is_person = self.labels == 'person'
+        self.is_car = self.labels == 'car'
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_dicts(self):
+        """Per-detection records for the /metadata stream"""
+        return [{"id": int(track_id), "label": label, "conf": round(float(conf), 3), "box": box.tolist()}
+                for track_id, label, conf, box in zip(self.ids, self.labels, self.conf, self.boxes)]
+
+
+def points_in_polygon(points, polygon):
+    """Even-odd ray casting for all points against all polygon edges at once"""
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+    x = points[:, 0:1].astype(np.float64)
+    y = points[:, 1:2].astype(np.float64)
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    # Next vertex of each edge (np.roll does the same, several times slower)
+    nxt = np.concatenate((polygon[1:], polygon[:1]))
+    x2, y2 = nxt[:, 0], nxt[:, 1]
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_at_y = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.logical_xor.reduce(crosses & (x < x_at_y), axis=1)
+
+
+def boxes_near(people, cars):
+    """(P, C) mask: person box touches the car box, or its centre is below the car's centre"""
+    p = people[:, None, :]
+    c = cars[None, :, :]
+    intersects = (p[..., 0] <= c[..., 2]) & (p[..., 2] >= c[..., 0]) & \
+                 (p[..., 1] <= c[..., 3]) & (p[..., 3] >= c[..., 1])
+    behind = (p[..., 1] + p[..., 3]) > (c[..., 1] + c[..., 3])
+    return intersects | behind
+
+
+class Rule:
+    """Base class for alert rules.
+
+    evaluate() gets the frame's TrackedDetections and returns a list of
+    (alert_type, message). Per-track state should be keyed by track id so
+    forget() can drop it when the tracker loses the track. Subclasses set
+    `name` (used by --rules), and optionally `feature` (the legacy 1/2/3 code),
+    `alert_type` and `color`.
+    """
+    name = None
+    feature = None
+    alert_type = "ALERT"
+    color = (0, 0, 255)
+
+    def __init__(self, cooldown=ALERT_COOLDOWN):
+        self.cooldown = cooldown
+        self.timers = {}
+        self.last_fired = {}
+
+    @classmethod
+    def from_options(cls, options):
+        """Build from pipeline options (zone, schedule, ...); override to pick what you need"""
+        return cls()
+
+    def evaluate(self, dets, now):
+        raise NotImplementedError
+
+    def fire(self, key, now, message, alerts):
+        if now - self.last_fired.get(key, float('-inf')) >= self.cooldown:
+            alerts.append((self.alert_type, message))
+            self.last_fired[key] = now
+            logger.info(f"ALERT: {message}")
+
+    def forget(self, track_ids):
+        for track_id in track_ids:
+            self.timers.pop(track_id, None)
+            self.last_fired.pop(track_id, None)
+
+    def zones(self):
+        """Zones to draw / publish: [{"name", "points", "occupied", "color"}]"""
+        return []
+
+
+class ZoneDwellRule(Rule):
+    """Feature 1: a person stays inside the protected zone for min_dwell seconds"""
+    name = "zone_dwell"
+    feature = "1"
+    alert_type = "ZONE"
+    color = (0, 255, 255)
+
+    def __init__(self, points=DEFAULT_ZONE_POINTS, min_dwell=MIN_ZONE_DWELL_TIME, zone_name="Protected Zone",
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(self.points) < 3:
+            raise ValueError("A zone needs at least 3 points")
+        self.min_dwell = min_dwell
+        self.zone_name = zone_name
+        self.occupied = False
+
+    @classmethod
+    def from_options(cls, options):
+        return cls(options.get("zone") or DEFAULT_ZONE_POINTS)
+
+    def evaluate(self, dets, now):
+        alerts = []
+        inside = dets.is_person & points_in_polygon(dets.centers, self.points)
+        self.occupied = bool(inside.any())
+        # Dwell is continuous presence: leaving the zone restarts the timer
+        for track_id in dets.ids[dets.is_person & ~inside].tolist():
+            self.timers.pop(track_id, None)
+        for track_id in dets.ids[inside].tolist():
+            dwell = now - self.timers.setdefault(track_id, now)
+            if dwell >= self.min_dwell:
+                self.fire(track_id, now, f"Person in protected zone for {int(dwell)}s", alerts)
+        return alerts
+
+    def zones(self):
+        return [{"name": self.zone_name, "points": self.points.astype(int).tolist(),
+                 "occupied": self.occupied, "color": self.color}]
+
+
+class LoiterRule(Rule):
+    """Feature 2: a person stays next to / behind a car for min_loiter seconds"""
+    name = "loitering"
+    feature = "2"
+    alert_type = "LOITER"
+    color = (0, 165, 255)
+
+    def __init__(self, min_loiter=MIN_LOITER_TIME, **kwargs):
+        super().__init__(**kwargs)
+        self.min_loiter = min_loiter
+
+    def evaluate(self, dets, now):
+        alerts = []
+        person_ids = dets.ids[dets.is_person]
+        cars = dets.boxes[dets.is_car]
+        if len(cars):
+            near = boxes_near(dets.boxes[dets.is_person], cars).any(axis=1)
+        else:
+            near = np.zeros(len(person_ids), dtype=bool)
+        for track_id in person_ids[~near].tolist():
+            self.timers.pop(track_id, None)
+        for track_id in person_ids[near].tolist():
+            loiter = now - self.timers.setdefault(track_id, now)
+            if loiter >= self.min_loiter:
+                self.fire(track_id, now, f"Person behind car for {int(loiter)}s", alerts)
+        return alerts
+
+
+class IntrusionRule(Rule):
+    """Feature 3: any person while the camera's schedule says restricted hours"""
+    name = "intrusion"
+    feature = "3"
+    alert_type = "NIGHT"
+    color = (0, 0, 255)
+
+    def __init__(self, schedule=None, **kwargs):
+        super().__init__(**kwargs)
+        self.schedule = schedule or Schedule.daily(*ALERT_TIME_WINDOW)
+
+    @classmethod
+    def from_options(cls, options):
+        return cls(options.get("schedule"))
+
+    def evaluate(self, dets, now):
+        alerts = []
+        # One alert per cooldown for the whole camera, not per person
+        if dets.is_person.any() and self.schedule.is_active(now):
+            self.fire("camera", now, "Person detected during restricted hours", alerts)
+        return alerts
+
+
+BUILTIN_RULES = {rule.name: rule for rule in (ZoneDwellRule, LoiterRule, IntrusionRule)}
+FEATURE_RULES = {rule.feature: rule for rule in BUILTIN_RULES.values()}
+
+
+def load_rule_class(spec):
+    """Built-in rule name, or 'package.module:ClassName' for a custom Rule subclass"""
+    if spec in BUILTIN_RULES:
+        return BUILTIN_RULES[spec]
+    if ':' not in spec:
+        raise ValueError(f"Unknown rule {spec!r}; built-ins are {sorted(BUILTIN_RULES)} "
+                         f"or use 'module:ClassName'")
+    module_name, class_name = spec.split(':', 1)
+    rule_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(rule_class, type) and issubclass(rule_class, Rule)):
+        raise ValueError(f"{spec} is not a Rule subclass")
+    return rule_class
+
+
+class RulePipeline:
+    """Evaluates every enabled rule over the same TrackedDetections each frame"""
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    @classmethod
+    def build(cls, features=(), rule_specs=(), **options):
+        """Rules for the legacy feature codes plus any named/custom rules.
+
+        options are passed to each rule's from_options (zone=, schedule=, ...).
+        """
+        classes = [FEATURE_RULES[f] for f in features]
+        for spec in rule_specs:
+            rule_class = load_rule_class(spec)
+            if rule_class not in classes:
+                classes.append(rule_class)
+        return cls(rule_class.from_options(options) for rule_class in classes)
+
+    def evaluate(self, dets, now):
+        alerts = []
+        for rule in self.rules:
+            alerts.extend(rule.evaluate(dets, now))
+        return alerts
+
+    def forget(self, track_ids):
+        if track_ids:
+            for rule in self.rules:
+                rule.forget(track_ids)
+
+    def zones(self):
+        return [zone for rule in self.rules for zone in rule.zones()]
+
+    def colors(self):
+        return {rule.alert_type: rule.color for rule in self.rules}
+
+    def get(self, rule_class):
+        return next((rule for rule in self.rules if isinstance(rule, rule_class)), None)
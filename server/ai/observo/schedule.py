@@ -0,0 +1,136 @@
+import json
+import time
+from datetime import date, datetime, timedelta, time as dt_time
+from zoneinfo import ZoneInfo
+
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+WHOLE_DAY = ({"start": "00:00", "end": "24:00"},)
+LOOKAHEAD_DAYS = 8  # a weekly calendar repeats within this; holidays may shift it
+
+
+def parse_clock(value):
+    """'HH:MM' -> minutes after midnight; '24:00' is allowed as an end"""
+    if isinstance(value, dt_time):
+        return value.hour * 60 + value.minute
+    hours, minutes = (int(part) for part in str(value).split(':'))
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        raise ValueError(f"Invalid time of day: {value!r}")
+    return hours * 60 + minutes
+
+
+class Window:
+    """Daily window on the given weekdays; end <= start means it runs past midnight"""
+    def __init__(self, start, end, days=DAYS):
+        self.start = parse_clock(start)
+        self.end = parse_clock(end)
+        days = [d.lower()[:3] for d in days]
+        unknown = set(days) - set(DAYS)
+        if unknown:
+            raise ValueError(f"Unknown weekday(s): {sorted(unknown)}")
+        self.weekdays = {DAYS.index(d) for d in days}
+
+    def intervals_on(self, day, tz):
+        """(start_ts, end_ts) if the window opens on local date `day`"""
+        base = datetime.combine(day, dt_time(0), tzinfo=tz)
+        end = self.end if self.end > self.start else self.end + 24 * 60
+        start_dt = _local(base, self.start, tz)
+        end_dt = _local(base, end, tz)
+        return start_dt.timestamp(), end_dt.timestamp()
+
+
+def _local(midnight, minutes, tz):
+    # Wall-clock arithmetic, re-anchored in the zone so DST days keep their local times
+    naive = midnight.replace(tzinfo=None) + timedelta(minutes=minutes)
+    return naive.replace(tzinfo=tz)
+
+
+class Schedule:
+    """Per-camera alert schedule: weekly windows in a time zone, with holidays.
+
+    is_active(ts) is called for every person in every frame, so the state is
+    computed once per boundary: it holds until `next_transition`, and each call
+    is a single chained comparison against the cached validity range. Crossing
+    a boundary (or the clock jumping backwards) recomputes it.
+
+    Holidays replace that date's weekly windows with `holiday_windows`
+    (the whole day by default). A window that starts the evening before a
+    holiday still runs to its end.
+    """
+    def __init__(self, windows, timezone=None, holidays=(), holiday_windows=WHOLE_DAY):
+        self.timezone = timezone
+        # No zone: naive local datetimes, which follow the host's DST rules
+        self.tz = ZoneInfo(timezone) if timezone else None
+        self.windows = [w if isinstance(w, Window) else Window(**w) for w in windows]
+        self.holidays = {d if isinstance(d, date) else date.fromisoformat(d) for d in holidays}
+        self.holiday_windows = [w if isinstance(w, Window) else Window(**w) for w in holiday_windows]
+        self.active = False
+        self.valid_from = float('inf')
+        self.next_transition = float('-inf')
+        self.recomputes = 0
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Build from a dict or JSON string:
+
+        {"timezone": "Europe/Paris",
+         "windows": [{"days": ["mon", "tue"], "start": "22:00", "end": "06:00"}],
+         "holidays": ["2026-12-25"], "holiday_windows": [{"start": "00:00", "end": "24:00"}]}
+        """
+        if isinstance(spec, str):
+            spec = json.loads(spec)
+        if not isinstance(spec, dict) or not spec.get("windows"):
+            raise ValueError("Schedule needs a non-empty 'windows' list")
+        return cls(spec["windows"], spec.get("timezone"), spec.get("holidays", ()),
+                   spec.get("holiday_windows", WHOLE_DAY))
+
+    @classmethod
+    def daily(cls, start, end, timezone=None):
+        """Same window every day (the old ALERT_TIME_WINDOW behaviour)"""
+        return cls([Window(start, end)], timezone)
+
+    def intervals_for(self, day):
+        windows = self.holiday_windows if day in self.holidays else self.windows
+        return [w.intervals_on(day, self.tz) for w in windows if day.weekday() in w.weekdays]
+
+    def evaluate(self, ts):
+        """(active, valid_from, next_transition) at ts"""
+        today = datetime.fromtimestamp(ts, self.tz).date()
+        intervals = []
+        # Start two days back: an overnight window can cover all of yesterday
+        for offset in range(-2, LOOKAHEAD_DAYS):
+            intervals.extend(self.intervals_for(today + timedelta(days=offset)))
+        intervals.sort()
+
+        # Merge overlapping/touching windows so a transition is a real state change
+        merged = []
+        for start, end in intervals:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        previous_end = datetime.combine(today - timedelta(days=1), dt_time(0), tzinfo=self.tz).timestamp()
+        for start, end in merged:
+            if ts < start:
+                return False, previous_end, start
+            if ts < end:
+                return True, start, end
+            previous_end = end
+        # Nothing scheduled in the lookahead: check again once it has passed
+        horizon = datetime.combine(today + timedelta(days=LOOKAHEAD_DAYS - 1), dt_time(0),
+                                   tzinfo=self.tz).timestamp()
+        return False, previous_end, max(horizon, ts + 1)
+
+    def is_active(self, ts=None):
+        ts = time.time() if ts is None else ts
+        if not self.valid_from <= ts < self.next_transition:
+            self.active, self.valid_from, self.next_transition = self.evaluate(ts)
+            self.recomputes += 1
+        return self.active
+
+    def describe(self):
+        return {
+            "timezone": self.timezone or 'local',
+            "active": self.active,
+            "next_transition": self.next_transition if self.next_transition != float('-inf') else None,
+        }
@@ -0,0 +1,97 @@
+import flask
+
+from .config import AI_DIR, ALERTS_DEFAULT_LIMIT, ALERTS_DEFAULT_WINDOW
+from .streaming import gen_frames, gen_metadata, gen_alert_events, parse_stream_params
+
+
+def create_app(monitor, broadcaster, remuxer):
+    """Flask app serving the live streams, alerts and readiness for one camera"""
+    app = flask.Flask(__name__, root_path=AI_DIR)
+
+    @app.route('/')
+    def index():
+        return flask.render_template('index.html')
+
+    @app.route('/ready')
+    def ready():
+        # 200 only once the model is warm and a camera frame has been inferred
+        status = monitor.readiness()
+        return flask.jsonify(status), (200 if status["ready"] else 503)
+
+    @app.route('/video_feed')
+    def video_feed():
+        return flask.Response(gen_frames(broadcaster, *parse_stream_params(flask.request.args)),
+                              mimetype='multipart/x-mixed-replace; boundary=frame')
+
+    @app.route('/video_feed/<camera_id>')
+    def video_feed_camera(camera_id):
+        # For now, fallback to the default monitor (single camera)
+        return flask.Response(gen_frames(broadcaster, *parse_stream_params(flask.request.args)),
+                              mimetype='multipart/x-mixed-replace; boundary=frame')
+
+    @app.route('/hls/<camera_id>/<path:filename>')
+    def hls_segment(camera_id, filename):
+        # Single camera per process; camera_id is accepted for URL symmetry with video_feed
+        if filename == 'index.m3u8':
+            if not remuxer.ensure_running() or not remuxer.wait_for_playlist():
+                return flask.Response('HLS live view unavailable', status=503)
+            response = flask.send_from_directory(remuxer.out_dir, filename,
+                                                 mimetype='application/vnd.apple.mpegurl')
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        response = flask.send_from_directory(remuxer.out_dir, filename)
+        # Segments are immutable once written
+        response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    @app.route('/metadata')
+    @app.route('/metadata/<camera_id>')
+    def metadata_feed(camera_id=None):
+        # For now, single camera per process (same as video_feed)
+        return flask.Response(gen_metadata(broadcaster), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/alerts')
+    def get_alerts():
+        # ?since=&until= (unix seconds) seek into the journal; ?limit= keeps the most recent.
+        # Defaults: the last ALERTS_DEFAULT_WINDOW seconds, at most ALERTS_DEFAULT_LIMIT alerts
+        if monitor.journal is None:
+            return flask.jsonify(monitor.alerts[-ALERTS_DEFAULT_LIMIT:])
+        args = flask.request.args
+        try:
+            until = float(args['until']) if 'until' in args else None
+            since = (float(args['since']) if 'since' in args
+                     else (until if until is not None else monitor.clock()) - ALERTS_DEFAULT_WINDOW)
+            limit = int(args.get('limit', ALERTS_DEFAULT_LIMIT))
+        except ValueError:
+            return flask.jsonify({"error": "since/until must be unix seconds, limit an integer"}), 400
+        if limit < 1:
+            return flask.jsonify({"error": "limit must be positive"}), 400
+        records = monitor.journal.read(since, until, limit)
+        return flask.jsonify([monitor.alert_from_record(r) for r in records])
+
+    @app.route('/alerts/stream')
+    def alert_stream():
+        # Resume after the last alert the page has seen (EventSource resends Last-Event-ID)
+        last_id = flask.request.headers.get('Last-Event-ID', flask.request.args.get('lastEventId'))
+        return flask.Response(gen_alert_events(monitor, last_id), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/alerts/<int:seq>/image')
+    def alert_image(seq):
+        record = monitor.journal.get(seq) if monitor.journal is not None else None
+        if record is None or not record.blob:
+            flask.abort(404)
+        return flask.Response(record.blob, mimetype='image/jpeg',
+                              headers={'Cache-Control': 'public, max-age=86400'})
+
+    @app.route('/alerts/<filename>')
+    def serve_alert_image(filename):
+        return flask.send_from_directory('alerts', filename)
+
+    # Serve static files (if needed)
+    @app.route('/static/<path:filename>')
+    def serve_static(filename):
+        return flask.send_from_directory('static', filename)
+
+    return app
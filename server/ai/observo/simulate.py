@@ -0,0 +1,334 @@
+"""Headless simulation: synthetic detections through the real monitor.
+
+SyntheticScene makes up detector output for crowds of moving people and
+parked or moving cars. It can also play scripted actors that follow waypoint
+paths. A FrameClock drives time, so no video, no model and no real time is
+involved. Use it to load-test the tracker, rules, sinks and backend far
+beyond what inference could produce.
+
+    python -m observo.simulate --people 1,10,50,200 --cars 10 --frames 20000
+    python -m observo.simulate --scenario benchmarks/scenarios/night_intruder.json --sinks journal
+
+Alert snapshots are not JPEG-encoded unless --encode_snapshots is given, so
+the numbers measure the tracker and rules rather than the encoder. A journal
+sink writes to a temporary directory and delivers nowhere.
+
+A scenario script is JSON:
+
+    {"fps": 25, "duration": 60, "start": "2024-01-10T23:00:00",
+     "features": "1,2,3", "zone": [[160, 90], [480, 90], [480, 270], [160, 270]],
+     "crowd": {"people": 5, "cars": 2, "seed": 1},
+     "actors": [{"label": "person", "path": [[0, 20, 300], [4, 300, 200], [20, 300, 200]]}]}
+
+Each actor path point is [seconds, x, y] (box centre). An actor is visible
+from its first to its last point and moves in a straight line between
+points. Flags on the command line override the script.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+from .config import FRAME_SIZE, FRAME_SKIP
+from .replay import FrameClock, parse_start
+
+PERSON_SIZE = (30, 80)
+CAR_SIZE = (120, 60)
+
+
+class SyntheticScene:
+    """Random-walk crowd plus scripted actors, generated a chunk of frames at a time.
+
+    people/cars: crowd sizes. walk_speed is pixels/s and people turn at random;
+    cars drive straight at car_speed unless parked (parked_ratio of them).
+    Everyone bounces off the frame edges. churn is the chance per second that
+    a crowd member leaves and a new one enters at a random edge, which creates
+    new tracks. miss_rate drops detections at random and jitter adds box noise,
+    like a real detector does.
+
+    Motion for `chunk` frames is computed with a handful of array operations,
+    so the generator costs next to nothing per frame. detections() only builds
+    the tuples for frames the monitor actually processes.
+    """
+    def __init__(self, people=10, cars=2, fps=25.0, size=FRAME_SIZE, seed=0, walk_speed=40.0, car_speed=80.0,
+                 parked_ratio=0.8, churn=0.01, miss_rate=0.0, jitter=2.0, actors=(), chunk=256):
+        self.rng = np.random.default_rng(seed)
+        self.dt = 1.0 / fps
+        self.size = np.array(size, dtype=np.float64)
+        self.churn = churn
+        self.miss_rate = miss_rate
+        self.jitter = jitter
+        self.chunk = chunk
+        self.actors = [self._load_actor(actor) for actor in actors]
+
+        labels = ['person'] * people + ['car'] * cars
+        n = len(labels)
+        self.is_person = np.array([label == 'person' for label in labels], dtype=bool)
+        self.labels = labels + [actor["label"] for actor in self.actors]
+        # Unbounded positions; reflect() folds them back into the frame
+        self.pos = self.rng.uniform(0, 1, (n, 2)) * self.size
+        self.heading = self.rng.uniform(0, 2 * np.pi, n)
+        self.speed = np.where(self.is_person, walk_speed * self.rng.uniform(0.6, 1.4, n), car_speed)
+        self.speed[~self.is_person & (self.rng.uniform(0, 1, n) < parked_ratio)] = 0.0
+        self.turn = np.where(self.is_person, 1.0, 0.0)  # radians per sqrt(second)
+        half = np.where(self.is_person[:, None], PERSON_SIZE, CAR_SIZE) / 2.0
+        half *= self.rng.uniform(0.8, 1.2, (n, 1))
+        self.half = np.concatenate([half] + [actor["half"][None] for actor in self.actors]).reshape(-1, 2)
+
+        self.frame = -1  # index of the current frame
+        self.chunk_start = 0
+        self.boxes = self.conf = self.visible = None
+        self._generate()
+
+    @staticmethod
+    def _load_actor(actor):
+        path = np.asarray(actor["path"], dtype=np.float64).reshape(-1, 3)
+        label = actor.get("label", "person")
+        size = np.asarray(actor.get("size", PERSON_SIZE if label == 'person' else CAR_SIZE), dtype=np.float64)
+        return {"label": label, "times": path[:, 0], "xy": path[:, 1:], "half": size / 2.0}
+
+    def reflect(self, pos):
+        period = 2 * self.size
+        return self.size - np.abs(self.size - np.mod(pos, period))
+
+    def _respawn(self, index):
+        shown = self.reflect(self.pos[index])
+        edge = self.rng.integers(0, 4, len(index))
+        w, h = self.size
+        shown[:, 0] = np.select([edge == 0, edge == 1], [0.0, w], shown[:, 0])
+        shown[:, 1] = np.select([edge == 2, edge == 3], [0.0, h], shown[:, 1])
+        self.pos[index] = shown
+        to_center = self.size / 2 - shown
+        self.heading[index] = np.arctan2(to_center[:, 1], to_center[:, 0])
+
+    def _generate(self):
+        k, n = self.chunk, len(self.pos)
+        if self.churn and n:
+            leaving = self.rng.uniform(0, 1, n) < self.churn * k * self.dt
+            if leaving.any():
+                self._respawn(np.flatnonzero(leaving))
+
+        turns = self.rng.normal(0, 1, (k, n)) * (self.turn * self.dt ** 0.5)
+        heading = self.heading + np.cumsum(turns, axis=0)
+        step = np.stack([np.cos(heading), np.sin(heading)], axis=2) * (self.speed * self.dt)[:, None]
+        raw = self.pos + np.cumsum(step, axis=0)
+        self.pos, self.heading = raw[-1], heading[-1]
+        centers = self.reflect(raw)
+        visible = np.ones((k, n), dtype=bool)
+
+        if self.actors:
+            t = (self.chunk_start + np.arange(k)) * self.dt
+            actor_centers, actor_visible = [], []
+            for actor in self.actors:
+                times, xy = actor["times"], actor["xy"]
+                actor_centers.append(np.stack([np.interp(t, times, xy[:, 0]), np.interp(t, times, xy[:, 1])], axis=1))
+                actor_visible.append((t >= times[0]) & (t <= times[-1]))
+            centers = np.concatenate([centers, np.stack(actor_centers, axis=1)], axis=1)
+            visible = np.concatenate([visible, np.stack(actor_visible, axis=1)], axis=1)
+
+        if self.jitter:
+            centers = centers + self.rng.normal(0, self.jitter, centers.shape)
+        boxes = np.concatenate([centers - self.half, centers + self.half], axis=2)
+        np.clip(boxes, 0, np.tile(self.size, 2), out=boxes)
+        if self.miss_rate:
+            visible &= self.rng.uniform(0, 1, visible.shape) >= self.miss_rate
+        self.boxes = boxes.astype(np.int32).tolist()
+        self.conf = self.rng.uniform(0.5, 0.95, visible.shape).round(3).tolist()
+        self.visible = visible.tolist()
+
+    def advance(self):
+        """Move to the next frame"""
+        self.frame += 1
+        if self.frame - self.chunk_start >= self.chunk:
+            self.chunk_start += self.chunk
+            self._generate()
+
+    def detections(self):
+        """The current frame's detections as Detector.detect returns them"""
+        row = self.frame - self.chunk_start
+        return [(label, tuple(box), conf) for label, box, conf, shown
+                in zip(self.labels, self.boxes[row], self.conf[row], self.visible[row]) if shown]
+
+
+class SyntheticDetector:
+    """Detector stand-in that returns whatever the harness last generated"""
+    def __init__(self):
+        self.current = []
+        self.timings = {}
+
+    def load(self):
+        pass
+
+    def warm_up(self, size=FRAME_SIZE):
+        pass
+
+    def detect(self, frame):
+        return self.current
+
+
+class SnapshotStub:
+    """Encoder stand-in for alert snapshots: one small placeholder JPEG for every alert"""
+    def __init__(self):
+        from .encoder import JpegEncoder
+        self.jpeg = JpegEncoder().encode(np.zeros((8, 8, 3), dtype=np.uint8))
+
+    def encode(self, frame, quality=95):
+        return self.jpeg
+
+
+class DiscardDelivery:
+    """Delivery target for a simulated journal: records are marked delivered and go nowhere"""
+    def send(self, record):
+        pass
+
+
+def build_monitor(config, clock, sinks):
+    from .encoder import JpegEncoder
+    from .monitor import SecurityMonitor
+    from .rules import RulePipeline
+    from .schedule import Schedule
+
+    features = [f.strip() for f in config["features"].split(',') if f.strip()]
+    schedule = Schedule.from_spec(config["schedule"]) if config.get("schedule") else None
+    pipeline = RulePipeline.build(features, config.get("rules", ()), zone=config.get("zone"), schedule=schedule)
+    analytics = None
+    if config.get("analytics"):
+        from .analytics import Analytics
+        analytics = Analytics.from_spec(config["analytics"], camera_id=config["camera_id"],
+                                        user_id=config["user_id"])
+    encoder = JpegEncoder() if config.get("encode_snapshots") else SnapshotStub()
+    return SecurityMonitor(None, ",".join(features), config["camera_id"], config["user_id"], encoder,
+                           detector=SyntheticDetector(), annotate=False, pipeline=pipeline, sinks=sinks,
+                           analytics=analytics, clock=clock, frame_skip=config["frame_skip"])
+
+
+def run(scene, monitor, clock, frames):
+    """Simulate `frames` decoded frames; returns timing and alert counts"""
+    blank = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    generate = process = 0.0
+    alerts = {}
+    detections = 0
+    started = time.perf_counter()
+    for index in range(frames):
+        clock.frame = index
+        t0 = time.perf_counter()
+        scene.advance()
+        if monitor.skip_frame():
+            generate += time.perf_counter() - t0
+            continue
+        current = monitor.detector.current = scene.detections()
+        t1 = time.perf_counter()
+        generate += t1 - t0
+        detections += len(current)
+        for alert_type, _ in monitor.process_frame(blank):
+            alerts[alert_type] = alerts.get(alert_type, 0) + 1
+        process += time.perf_counter() - t1
+    elapsed = time.perf_counter() - started
+    processed = monitor.frame_seq
+    return {
+        "frames": frames,
+        "processed": processed,
+        "decoded_per_s": frames / elapsed,
+        "processed_per_s": processed / elapsed,
+        "generate_us": 1e6 * generate / frames,
+        "monitor_us": 1e6 * process / max(processed, 1),
+        "avg_detections": detections / max(processed, 1),
+        "tracks": len(monitor.tracker.tracks),
+        "alerts": alerts,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m observo.simulate', description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', help='Scenario script (.json); other flags override it')
+    parser.add_argument('--people', help='Crowd size, or a comma-separated list to sweep')
+    parser.add_argument('--cars', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--miss_rate', type=float, help='Fraction of detections dropped at random')
+    parser.add_argument('--churn', type=float, help='Chance per second that a crowd member is replaced')
+    parser.add_argument('--frames', type=int, help='Decoded frames to simulate (default: scenario duration)')
+    parser.add_argument('--fps', type=float)
+    parser.add_argument('--frame_skip', type=int)
+    parser.add_argument('--features')
+    parser.add_argument('--rules', help='Extra rules, as for detect.py --rules')
+    parser.add_argument('--start', help='Clock at the first frame (ISO time or epoch); default: now')
+    parser.add_argument('--sinks', default='none',
+                        help='Alert sinks to exercise: journal (in a temporary directory, delivered '
+                             'nowhere), http, disk, none')
+    parser.add_argument('--journal_dir', help='Keep the simulated journal here instead of a temporary directory')
+    parser.add_argument('--encode_snapshots', action='store_true',
+                        help='JPEG-encode alert snapshots as the live monitor does')
+    parser.add_argument('--min_fps', type=float, default=0,
+                        help='Exit non-zero if any run processes fewer frames/s than this')
+    args = parser.parse_args(argv)
+
+    scenario = {}
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+    crowd = dict(scenario.get("crowd", {}))
+    for key in ("cars", "seed", "miss_rate", "churn"):
+        if getattr(args, key) is not None:
+            crowd[key] = getattr(args, key)
+    fps = args.fps or scenario.get("fps", 25.0)
+    frames = args.frames or int(scenario.get("duration", 0) * fps) or 10000
+    start = args.start or scenario.get("start")
+    config = {
+        "features": args.features or scenario.get("features", "1,2,3"),
+        "rules": [r.strip() for r in (args.rules or ",".join(scenario.get("rules", []))).split(',') if r.strip()],
+        "zone": scenario.get("zone"),
+        "schedule": scenario.get("schedule"),
+        "analytics": scenario.get("analytics"),
+        "frame_skip": args.frame_skip or scenario.get("frame_skip", FRAME_SKIP),
+        "encode_snapshots": args.encode_snapshots,
+        "camera_id": scenario.get("camera_id", "simulated"),
+        "user_id": scenario.get("user_id", "simulated"),
+    }
+    sweep = [int(p) for p in args.people.split(',')] if args.people else [crowd.get("people", 10)]
+
+    sink_names = [s.strip() for s in args.sinks.split(',') if s.strip() and s.strip() != 'none']
+    journal = scratch = None
+    if 'journal' in sink_names:
+        from .journal import EventJournal
+        if args.journal_dir is None:
+            scratch = tempfile.mkdtemp(prefix='observo-simulate-')
+        journal = EventJournal(os.path.join(args.journal_dir or scratch, config["camera_id"]), fsync='never')
+
+    print(f"{'people':>7} {'decoded/s':>10} {'processed/s':>12} {'gen us':>8} {'mon us':>8} "
+          f"{'dets':>6} {'tracks':>6}  alerts")
+    slowest = float('inf')
+    for people in sweep:
+        from .sinks import JournalSink, build_sinks
+
+        sinks = build_sinks([name for name in sink_names if name != 'journal'])
+        if journal is not None:
+            sinks.append(JournalSink(journal, DiscardDelivery()))
+        clock = FrameClock(parse_start(start) if start else time.time(), fps)
+        scene = SyntheticScene(**{**crowd, "people": people}, fps=fps, actors=scenario.get("actors", ()))
+        monitor = build_monitor(config, clock, sinks)
+        for sink in sinks:
+            sink.start()
+        result = run(scene, monitor, clock, frames)
+        slowest = min(slowest, result["processed_per_s"])
+        alerts = ", ".join(f"{k} {v}" for k, v in sorted(result["alerts"].items())) or "-"
+        print(f"{people:>7} {result['decoded_per_s']:>10,.0f} {result['processed_per_s']:>12,.0f} "
+              f"{result['generate_us']:>8.1f} {result['monitor_us']:>8.1f} "
+              f"{result['avg_detections']:>6.1f} {result['tracks']:>6}  {alerts}")
+    if journal is not None:
+        print(f"journal: {journal.stats()}")
+        journal.close()
+    if scratch is not None:
+        shutil.rmtree(scratch, ignore_errors=True)
+    if slowest < args.min_fps:
+        print(f"FAIL: {slowest:,.0f} processed frames/s is below --min_fps {args.min_fps:,.0f}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import io
+import os
+import logging
+from datetime import datetime
+
+from .config import AI_DIR, BACKEND_URL, FRAME_SAVE_PATH
+from .journal import BackendReplayer, JournalRecord
+
+logger = logging.getLogger(__name__)
+
+SINKS = ('journal', 'http', 'disk')
+
+
+class AlertSink:
+    """Where fired alerts go.
+
+    emit(data, jpeg, ts) gets the alert fields (type, message, camera, user,
+    timestamp), the encoded snapshot and the time the alert fired, in unix
+    seconds from the monitor's clock (so replays stay deterministic). It
+    returns a dict of fields to merge
+    into the alert listed by /alerts ('id', 'image', 'delivered'), and it
+    raises only for errors the caller should log.
+    """
+    def start(self):
+        pass
+
+    def emit(self, data, jpeg, ts):
+        raise NotImplementedError
+
+
+class HttpSink(AlertSink):
+    """POST straight to the backend; an alert is lost if the backend is down"""
+    def __init__(self, backend_url=BACKEND_URL):
+        self.backend_url = backend_url
+
+    def send(self, record):
+        """POST one journal record to the backend; raises if it should be retried"""
+        import requests  # only needed once an alert actually fires
+
+        data = {
+            'message': record.data['message'],
+            'camera': record.data['camera'],
+            'user': record.data['user'],
+            # Replayed alerts keep the time they fired, not the time they were delivered
+            'date': datetime.fromtimestamp(record.ts).astimezone().isoformat(),
+        }
+        files = {'img': ('alert.jpg', io.BytesIO(record.blob), 'image/jpeg')} if record.blob else None
+
+        resp = requests.post(f'{self.backend_url}/api/alerts', data=data, files=files, timeout=10)
+        if 400 <= resp.status_code < 500:
+            # The backend rejected it; retrying won't help and would block the queue
+            logger.error(f"Backend rejected alert {record.seq}: {resp.status_code} {resp.text[:200]}")
+            return
+        resp.raise_for_status()
+        logger.info(f"Alert {record.seq} sent to backend: {resp.json()}")
+
+    def emit(self, data, jpeg, ts):
+        self.send(JournalRecord(None, ts, data, jpeg, len(jpeg)))
+        return {"delivered": True}
+
+
+class JournalSink(AlertSink):
+    """Append to the local journal; a BackendReplayer delivers it (and any backlog) in order"""
+    def __init__(self, journal, http_sink=None):
+        self.journal = journal
+        self.replayer = BackendReplayer(journal, (http_sink or HttpSink()).send)
+
+    def start(self):
+        # Also delivers whatever was left undelivered by a previous run
+        self.replayer.start()
+
+    def emit(self, data, jpeg, ts):
+        seq = self.journal.append(data, jpeg, ts=ts)
+        self.replayer.notify()
+        return {"id": seq, "image": f"alerts/{seq}/image", "delivered": False}
+
+
+class DiskSink(AlertSink):
+    """Write the snapshot to FRAME_SAVE_PATH (served by /alerts/<filename>); for standalone setups"""
+    def __init__(self, directory=os.path.join(AI_DIR, FRAME_SAVE_PATH)):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def emit(self, data, jpeg, ts):
+        filename = f"{data['type']}_{data['timestamp']}.jpg"
+        with open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(jpeg)
+        logger.info(f"Alert saved: {filename}")
+        return {"image": f"alerts/{filename}"}
+
+
+def build_sinks(names, journal=None, backend_url=BACKEND_URL):
+    """Sinks for a --sinks list; 'journal' needs the EventJournal"""
+    sinks = []
+    for name in names:
+        if name == 'journal':
+            sinks.append(JournalSink(journal, HttpSink(backend_url)))
+        elif name == 'http':
+            sinks.append(HttpSink(backend_url))
+        elif name == 'disk':
+            sinks.append(DiskSink())
+        else:
+            raise ValueError(f"Unknown alert sink {name!r}; choose from {SINKS}")
+    return sinks
@@ -0,0 +1,263 @@
+import os
+import json
+import shutil
+import logging
+import threading
+import subprocess
+import time as time_module
+from collections import OrderedDict
+
+import cv2
+
+from .config import (STREAM_MAX_FPS, DEFAULT_JPEG_QUALITY, MAX_CACHED_VARIANTS, STREAM_KEEPALIVE,
+                     HLS_SEGMENT_SECONDS, HLS_IDLE_TIMEOUT)
+
+logger = logging.getLogger(__name__)
+
+
+class FrameBroadcaster:
+    """Holds the latest processed frame, its detection metadata and its encoded JPEG variants.
+
+    Each (width, quality) variant is encoded at most once per frame, no matter
+    how many viewers ask for it. At most MAX_CACHED_VARIANTS are kept per frame;
+    beyond that the least recently requested one is evicted.
+    """
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.frame = None
+        self.seq = 0
+        self.metadata = None
+        self.cond = threading.Condition()
+        self.encode_lock = threading.Lock()
+        self.variants = OrderedDict()  # (width, quality) -> jpeg bytes for variants_seq, LRU order
+        self.variants_seq = None
+
+    def publish(self, frame, seq, metadata=None):
+        with self.cond:
+            self.frame = frame
+            self.seq = seq
+            self.metadata = metadata
+            self.cond.notify_all()
+
+    def wait_for_frame(self, after_seq, timeout=1.0):
+        """Block until a frame newer than after_seq is available; returns its seq"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.frame is not None and self.seq != after_seq, timeout=timeout)
+            return self.seq
+
+    def get_metadata(self):
+        with self.cond:
+            return self.metadata
+
+    def get_variant(self, width, quality):
+        """Return (seq, jpeg_bytes) for the latest frame at the requested size/quality"""
+        with self.cond:
+            frame, seq = self.frame, self.seq
+        if frame is None:
+            return seq, None
+
+        key = (width, quality)
+        with self.encode_lock:
+            if self.variants_seq != seq:
+                self.variants.clear()
+                self.variants_seq = seq
+            if key in self.variants:
+                self.variants.move_to_end(key)
+                return seq, self.variants[key]
+
+            if width and width < frame.shape[1]:
+                height = int(round(frame.shape[0] * width / frame.shape[1]))
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            jpeg = self.encoder.encode(frame, quality)
+            if jpeg is None:
+                return seq, None
+            # One encode per variant, shared by every viewer
+            self.variants[key] = jpeg
+            if len(self.variants) > MAX_CACHED_VARIANTS:
+                self.variants.popitem(last=False)
+            return seq, jpeg
+
+
+def parse_stream_params(request_args):
+    """Read ?w=&q=&fps= viewer preferences, clamped to sane ranges.
+
+    Widths are rounded to multiples of 16 so the number of distinct variants
+    (and therefore encodes per frame) stays small.
+    """
+    def read_int(name, default, low, high):
+        try:
+            value = int(request_args.get(name, default))
+        except (TypeError, ValueError):
+            value = default
+        return max(low, min(high, value))
+
+    width = read_int('w', 0, 0, 1920)
+    if width:
+        width = max(64, width // 16 * 16)
+    quality = read_int('q', DEFAULT_JPEG_QUALITY, 10, 100)
+    fps = read_int('fps', STREAM_MAX_FPS, 1, STREAM_MAX_FPS)
+    return width, quality, fps
+
+
+def gen_frames(broadcaster, width=0, quality=DEFAULT_JPEG_QUALITY, fps=STREAM_MAX_FPS,
+               keepalive=STREAM_KEEPALIVE):
+    """Video streaming generator function.
+
+    While the camera stalls, the last frame is re-sent every `keepalive`
+    seconds; the write is what notices a viewer that has gone, so the thread
+    serving it is freed instead of waiting on the camera forever.
+    """
+    interval = 1.0 / fps
+    last_seq = None
+    frame = None
+    next_send = 0
+    last_sent = time_module.monotonic()
+    while True:
+        seq = broadcaster.wait_for_frame(last_seq)
+        if seq == last_seq:
+            if frame is None or time_module.monotonic() - last_sent < keepalive:
+                continue
+        else:
+            now = time_module.time()
+            if now < next_send:
+                time_module.sleep(next_send - now)
+            seq, latest = broadcaster.get_variant(width, quality)
+            if latest is None:
+                continue
+            last_seq, frame = seq, latest
+            next_send = time_module.time() + interval
+        last_sent = time_module.monotonic()
+        # Header, payload and trailer go out as separate writes so the JPEG
+        # itself is never copied into a concatenated part.
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n'
+               b'Content-Length: %d\r\n'
+               b'X-Frame-Seq: %d\r\n\r\n' % (len(frame), last_seq))
+        yield frame
+        yield b'\r\n'
+
+
+def gen_metadata(broadcaster):
+    """Server-sent events generator pushing one metadata record per processed frame."""
+    last_seq = None
+    while True:
+        seq = broadcaster.wait_for_frame(last_seq, timeout=15)
+        metadata = broadcaster.get_metadata()
+        if seq == last_seq or metadata is None:
+            # Keep idle connections (and proxies) alive
+            yield ": keep-alive\n\n"
+            continue
+        last_seq = seq
+        yield f"id: {metadata['seq']}\nevent: frame\ndata: {json.dumps(metadata, separators=(',', ':'))}\n\n"
+
+
+def gen_alert_events(monitor, last_event_id=None):
+    """Server-sent events generator for alerts after last_event_id ("<boot id>-<alert id>").
+
+    When that delta can't be served a 'reset' event tells the client to reload
+    the list, as the Node alert stream does.
+    """
+    backlog, last_id = monitor.alerts_after(last_event_id)
+    if backlog is None:
+        yield f"id: {monitor.boot_id}-{last_id}\nevent: reset\ndata: {{}}\n\n"
+        backlog = []
+    while True:
+        for alert in backlog:
+            last_id = max(last_id, alert["id"])
+            yield f"id: {monitor.boot_id}-{alert['id']}\nevent: alert\ndata: {json.dumps(alert)}\n\n"
+        with monitor.alerts_cond:
+            monitor.alerts_cond.wait_for(lambda: monitor.alerts and monitor.alerts[-1]["id"] > last_id,
+                                         timeout=15)
+            backlog = [alert for alert in monitor.alerts if alert["id"] > last_id]
+        if not backlog:
+            yield ": keep-alive\n\n"
+
+
+class HlsRemuxer:
+    """Remux the camera's original H.264 into fMP4 HLS segments without transcoding.
+
+    One ffmpeg process per camera writes a rolling set of segments to disk; every
+    viewer is served from that same segment cache. The remuxer starts on the first
+    playlist request and stops once no viewer has asked for a playlist in a while,
+    or when the worker shuts down (stop()).
+    """
+    def __init__(self, source_url, out_dir):
+        self.source_url = source_url
+        self.out_dir = out_dir
+        self.process = None
+        self.last_access = 0
+        self.lock = threading.Lock()
+
+    @property
+    def playlist_path(self):
+        return os.path.join(self.out_dir, 'index.m3u8')
+
+    def build_command(self):
+        cmd = ['ffmpeg', '-loglevel', 'error', '-nostdin']
+        if self.source_url.startswith('rtsp://'):
+            cmd += ['-rtsp_transport', 'tcp']
+        cmd += [
+            '-i', self.source_url,
+            '-map', '0:v:0', '-an',
+            '-c:v', 'copy',
+            '-f', 'hls',
+            '-hls_time', str(HLS_SEGMENT_SECONDS),
+            '-hls_list_size', '6',
+            '-hls_flags', 'delete_segments+omit_endlist+independent_segments',
+            '-hls_segment_type', 'fmp4',
+            '-hls_fmp4_init_filename', 'init.mp4',
+            '-hls_segment_filename', os.path.join(self.out_dir, 'seg_%05d.m4s'),
+            self.playlist_path
+        ]
+        return cmd
+
+    def ensure_running(self):
+        """Start ffmpeg if needed and record viewer activity"""
+        with self.lock:
+            self.last_access = time_module.time()
+            if self.process is not None and self.process.poll() is None:
+                return True
+            if shutil.which('ffmpeg') is None:
+                logger.error("ffmpeg not found; HLS live view unavailable")
+                return False
+
+            os.makedirs(self.out_dir, exist_ok=True)
+            for name in os.listdir(self.out_dir):
+                os.remove(os.path.join(self.out_dir, name))
+            self.process = subprocess.Popen(self.build_command(), stdout=subprocess.DEVNULL)
+            logger.info(f"HLS remux started for {self.source_url}")
+            threading.Thread(target=self._watch_idle, daemon=True).start()
+            return True
+
+    def _watch_idle(self):
+        process = self.process
+        while process.poll() is None:
+            time_module.sleep(5)
+            with self.lock:
+                if time_module.time() - self.last_access > HLS_IDLE_TIMEOUT:
+                    process.terminate()
+                    logger.info("HLS remux stopped (no viewers)")
+                    break
+
+    def stop(self):
+        """Terminate ffmpeg, so it does not outlive the worker and keep pulling the camera"""
+        with self.lock:
+            process, self.process = self.process, None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        logger.info("HLS remux stopped (worker shutdown)")
+
+    def wait_for_playlist(self, timeout=10):
+        deadline = time_module.time() + timeout
+        while time_module.time() < deadline:
+            if os.path.exists(self.playlist_path):
+                return True
+            if self.process is None or self.process.poll() is not None:
+                return False
+            time_module.sleep(0.2)
+        return False
@@ -0,0 +1,37 @@
+class CentroidTracker:
+    """Greedy nearest-centroid tracker that gives detections stable IDs across frames"""
+    def __init__(self, max_distance=60, max_missed=10):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.next_id = 1
+        self.tracks = {}  # track_id -> {"label", "center", "missed"}
+
+    def update(self, detections):
+        """Assign a track ID to each (label, box) pair. Returns (ids, dropped_ids)."""
+        ids = [None] * len(detections)
+        unmatched = set(self.tracks)
+        for i, (label, (x1, y1, x2, y2)) in enumerate(detections):
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            best_id, best_dist = None, self.max_distance
+            for track_id in unmatched:
+                track = self.tracks[track_id]
+                if track["label"] != label:
+                    continue
+                dist = ((track["center"][0] - cx) ** 2 + (track["center"][1] - cy) ** 2) ** 0.5
+                if dist <= best_dist:
+                    best_id, best_dist = track_id, dist
+            if best_id is None:
+                best_id = self.next_id
+                self.next_id += 1
+            else:
+                unmatched.discard(best_id)
+            self.tracks[best_id] = {"label": label, "center": (cx, cy), "missed": 0}
+            ids[i] = best_id
+
+        dropped = []
+        for track_id in unmatched:
+            self.tracks[track_id]["missed"] += 1
+            if self.tracks[track_id]["missed"] > self.max_missed:
+                del self.tracks[track_id]
+                dropped.append(track_id)
+        return ids, dropped
@@ -0,0 +1,211 @@
+"""EventJournal durability: crash repair, CRC checks, segments, maintenance and delivery."""
+import os
+import time
+
+import pytest
+
+from observo.journal import EventJournal, BackendReplayer, RECORD_HEADER, COMPACTED_SUFFIX
+
+T0 = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self, now=T0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def open_journal(path, clock, **kwargs):
+    kwargs.setdefault('fsync', 'never')
+    return EventJournal(str(path), clock=clock, **kwargs)
+
+
+def segment_files(path):
+    return sorted(n for n in os.listdir(path) if n.endswith('.seg') or n.endswith(COMPACTED_SUFFIX))
+
+
+def fill(journal, count, start=T0, step=1.0, blob=b'jpeg'):
+    return [journal.append({"n": i}, blob, ts=start + i * step) for i in range(count)]
+
+
+def test_append_read_and_get(tmp_path, clock):
+    journal = open_journal(tmp_path, clock)
+    seqs = fill(journal, 5)
+    assert seqs == [1, 2, 3, 4, 5]
+
+    records = journal.read()
+    assert [r.data["n"] for r in records] == [0, 1, 2, 3, 4]
+    assert all(r.blob == b'' and r.blob_size == 4 for r in records)
+    assert [r.blob for r in journal.read(with_blobs=True)] == [b'jpeg'] * 5
+
+    record = journal.get(3)
+    assert (record.seq, record.ts, record.data, record.blob) == (3, T0 + 2, {"n": 2}, b'jpeg')
+    assert journal.get(0) is None
+    assert journal.get(6) is None
+
+
+def test_torn_tail_is_cut_off_on_open(tmp_path, clock):
+    journal = open_journal(tmp_path, clock)
+    fill(journal, 3)
+    journal.close()
+    path = os.path.join(tmp_path, segment_files(tmp_path)[0])
+    intact = os.path.getsize(path)
+    # A crash halfway through the fourth record: full header, half the payload
+    with open(path, 'ab') as f:
+        f.write(RECORD_HEADER.pack(100, 0, 4, T0 + 3, 10) + b'x' * 50)
+
+    journal = open_journal(tmp_path, clock)
+    assert os.path.getsize(path) == intact
+    assert [r.seq for r in journal.read()] == [1, 2, 3]
+    assert journal.append({"n": 3}, ts=T0 + 3) == 4
+    assert [r.seq for r in journal.read()] == [1, 2, 3, 4]
+
+
+def test_corrupt_record_fails_crc(tmp_path, clock):
+    journal = open_journal(tmp_path, clock)
+    fill(journal, 3, blob=b'0123456789')
+    journal.close()
+    path = os.path.join(tmp_path, segment_files(tmp_path)[0])
+    record_size = os.path.getsize(path) // 3
+    with open(path, 'r+b') as f:
+        # Flip a byte in the second record's snapshot
+        f.seek(record_size + RECORD_HEADER.size + 10)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xff]))
+
+    journal = open_journal(tmp_path, clock)
+    assert [r.seq for r in journal.read()] == [1]
+    assert os.path.getsize(path) == record_size
+    assert journal.append({"n": 1}, ts=T0 + 1) == 2
+
+
+def test_segments_roll_by_time_and_size(tmp_path, clock):
+    journal = open_journal(tmp_path, clock, segment_seconds=10)
+    fill(journal, 25)  # one record a second
+    assert len(segment_files(tmp_path)) == 3
+    assert [s.first_seq for s in journal.segments] == [1, 11, 21]
+
+    small = open_journal(tmp_path / 'small', clock, segment_bytes=250)
+    fill(small, 6, blob=b'x' * 100)
+    assert [s.records for s in small.segments] == [2, 2, 2]  # rolls once a segment passes 250 bytes
+
+    # Reopening rebuilds every segment's index from disk
+    journal.close()
+    journal = open_journal(tmp_path, clock, segment_seconds=10)
+    assert journal.next_seq == 26
+    assert [r.seq for r in journal.read(since=T0 + 8, until=T0 + 12)] == [9, 10, 11, 12, 13]
+
+
+def test_read_with_limit_keeps_the_newest(tmp_path, clock):
+    journal = open_journal(tmp_path, clock, segment_seconds=10)
+    fill(journal, 100)
+    assert [r.seq for r in journal.read(limit=3)] == [98, 99, 100]
+    assert [r.seq for r in journal.read(limit=15)] == list(range(86, 101))
+    assert [r.seq for r in journal.read(since=T0 + 5, until=T0 + 30, limit=4)] == [28, 29, 30, 31]
+    assert [r.seq for r in journal.read(since=T0 + 95, limit=50)] == [96, 97, 98, 99, 100]
+    assert journal.read(since=T0 + 200, limit=5) == []
+    # Records sharing a timestamp across an index entry are all found
+    same = open_journal(tmp_path / 'same', clock)
+    fill(same, 70, step=0.0)
+    assert len(same.read(since=T0)) == 70
+
+
+def test_delivery_cursor_survives_reopen(tmp_path, clock):
+    journal = open_journal(tmp_path, clock)
+    fill(journal, 5)
+    journal.mark_delivered(3)
+    journal.mark_delivered(2)  # never moves backwards
+    assert [r.seq for r in journal.pending()] == [4, 5]
+    journal.close()
+
+    journal = open_journal(tmp_path, clock)
+    assert journal.delivered_seq == 3
+    assert [r.seq for r in journal.pending()] == [4, 5]
+    assert journal.pending()[0].blob == b'jpeg'
+    assert journal.stats()["pending"] == 2
+
+
+def test_compaction_drops_delivered_snapshots(tmp_path, clock):
+    journal = open_journal(tmp_path, clock, segment_seconds=10, compact_after=60, retention=3600)
+    fill(journal, 30)
+    journal.mark_delivered(15)
+    clock.now = T0 + 100
+    journal.maintain()
+
+    names = segment_files(tmp_path)
+    assert [n.endswith(COMPACTED_SUFFIX) for n in names] == [True, False, False]
+    first = journal.get(5)
+    assert first.blob == b'' and first.data == {"n": 4, "blob_dropped": True}
+    # The second segment still has undelivered events, so it keeps its snapshots
+    assert journal.get(15).blob == b'jpeg'
+    assert [r.seq for r in journal.read(limit=3)] == [28, 29, 30]
+
+    # Appends after compaction go to a new segment
+    assert journal.append({"n": 30}, ts=T0 + 100) == 31
+    assert journal.segments[-1].first_seq == 31
+
+
+def test_retention_removes_only_delivered_segments(tmp_path, clock):
+    journal = open_journal(tmp_path, clock, segment_seconds=10, compact_after=3600, retention=600)
+    fill(journal, 30)
+    journal.mark_delivered(20)
+    clock.now = T0 + 1000
+    journal.maintain()
+    assert [s.first_seq for s in journal.segments] == [21]
+    assert journal.get(5) is None
+    assert [r.seq for r in journal.pending()] == list(range(21, 31))
+
+    journal.mark_delivered(30)
+    journal.maintain()
+    assert journal.segments == []
+    journal.close()
+    # Sequence numbers are never reused, even with every segment gone
+    journal = open_journal(tmp_path, clock)
+    assert journal.append({"n": 30}) == 31
+
+
+def test_replayer_retries_and_delivers_in_order(tmp_path, clock):
+    journal = open_journal(tmp_path, clock)
+    fill(journal, 3)
+    sent, failures = [], [2]
+
+    def send(record):
+        if record.seq == 2 and failures[0]:
+            failures[0] -= 1
+            raise ConnectionError("backend down")
+        sent.append(record.seq)
+
+    replayer = BackendReplayer(journal, send, retry_delay=(0.01, 0.05))
+    replayer.start()
+    journal.append({"n": 3}, b'jpeg', ts=T0 + 3)
+    replayer.notify()
+    deadline = time.monotonic() + 5
+    while journal.delivered_seq < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    journal.close()
+    replayer.notify()
+    replayer.thread.join(1)
+    assert sent == [1, 2, 3, 4]
+    assert journal.delivered_seq == 4
+    assert not journal.pending()
+
+
+def test_after_and_journal_id(tmp_path, clock):
+    journal = open_journal(tmp_path, clock, segment_seconds=10)
+    fill(journal, 30)
+    assert [r.seq for r in journal.after(25)] == [26, 27, 28, 29, 30]
+    assert [r.seq for r in journal.after(8, limit=4)] == [9, 10, 11, 12]
+    assert journal.after(30) == []
+    journal_id = journal.id
+    journal.close()
+    # The id identifies these sequence numbers across restarts, and only these
+    assert open_journal(tmp_path, clock).id == journal_id
+    assert open_journal(tmp_path / 'other', clock).id != journal_id
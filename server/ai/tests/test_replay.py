@@ -0,0 +1,39 @@
+"""Regression suite: replay committed recordings and compare against their golden alerts.
+
+After an intended behaviour change, re-bless the golden file (see observo/replay.py)
+and commit it together with the change.
+"""
+import os
+import glob
+import time
+
+import pytest
+
+from observo import replay
+
+REPLAYS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'replays')
+
+
+@pytest.fixture(autouse=True)
+def utc(monkeypatch):
+    # Restricted-hours rules read local time; goldens are blessed in UTC
+    monkeypatch.setenv('TZ', 'UTC')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('golden', sorted(glob.glob(os.path.join(REPLAYS, '*.json'))),
+                         ids=os.path.basename)
+def test_alerts_match_golden(golden, capsys):
+    status = replay.main(['check', golden])
+    assert status == 0, capsys.readouterr().out
+
+
+def test_replay_is_deterministic():
+    recording = replay.Recording.load(os.path.join(REPLAYS, 'night_intruder.jsonl'))
+    config = {"features": ["1", "2", "3"], "start": recording.start}
+    first, _ = replay.replay(recording, config)
+    second, _ = replay.replay(recording, config)
+    assert first and first == second
@@ -0,0 +1,116 @@
+"""Alert schedules: overnight windows, holidays, DST and the cached transition."""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from observo.schedule import Schedule, Window, parse_clock
+
+PARIS = 'Europe/Paris'
+NEW_YORK = 'America/New_York'
+
+
+def at(timezone, value):
+    """Unix time of a local 'YYYY-MM-DDTHH:MM' in timezone"""
+    return datetime.fromisoformat(value).replace(tzinfo=ZoneInfo(timezone)).timestamp()
+
+
+def test_parse_clock():
+    assert parse_clock('00:00') == 0
+    assert parse_clock('22:30') == 22 * 60 + 30
+    assert parse_clock('24:00') == 24 * 60
+    for bad in ('24:30', '25:00', '12:60'):
+        with pytest.raises(ValueError):
+            parse_clock(bad)
+    with pytest.raises(ValueError):
+        Window('22:00', '06:00', days=['funday'])
+
+
+def test_window_across_midnight():
+    schedule = Schedule.daily('22:00', '06:00', PARIS)
+    # 2026-06-10 is a Wednesday
+    assert not schedule.is_active(at(PARIS, '2026-06-10T21:59'))
+    assert schedule.is_active(at(PARIS, '2026-06-10T22:00'))
+    assert schedule.is_active(at(PARIS, '2026-06-11T00:00'))
+    assert schedule.is_active(at(PARIS, '2026-06-11T05:59'))
+    assert not schedule.is_active(at(PARIS, '2026-06-11T06:00'))
+    assert not schedule.is_active(at(PARIS, '2026-06-11T12:00'))
+
+
+def test_overnight_window_belongs_to_its_start_day():
+    schedule = Schedule.from_spec({"timezone": PARIS,
+                                   "windows": [{"days": ["fri"], "start": "22:00", "end": "06:00"}]})
+    # Friday night runs into Saturday morning, but Saturday night is off
+    assert schedule.is_active(at(PARIS, '2026-06-13T03:00'))
+    assert not schedule.is_active(at(PARIS, '2026-06-13T23:00'))
+    assert not schedule.is_active(at(PARIS, '2026-06-12T03:00'))
+
+
+def test_holiday_replaces_the_weekly_windows():
+    spec = {"timezone": PARIS, "holidays": ["2026-12-25"],
+            "windows": [{"days": ["mon", "tue", "wed", "thu", "fri"], "start": "18:00", "end": "08:00"}]}
+    schedule = Schedule.from_spec(spec)
+    # Christmas (a Friday) is watched all day by default
+    assert schedule.is_active(at(PARIS, '2026-12-25T12:00'))
+    assert not schedule.is_active(at(PARIS, '2026-12-24T12:00'))
+
+    quiet = Schedule.from_spec({**spec, "holiday_windows": []})
+    # Thursday night still runs to its end on the holiday morning
+    assert quiet.is_active(at(PARIS, '2026-12-25T07:59'))
+    assert not quiet.is_active(at(PARIS, '2026-12-25T08:00'))
+    assert not quiet.is_active(at(PARIS, '2026-12-25T20:00'))
+    assert quiet.is_active(at(PARIS, '2026-12-28T20:00'))
+
+
+@pytest.mark.parametrize('night, hours', [
+    ('2026-03-07', 7),   # clocks go forward at 02:00 on the 8th
+    ('2026-10-31', 9),   # clocks go back at 02:00 on 1 November
+    ('2026-06-10', 8),
+])
+def test_dst_keeps_local_times(night, hours):
+    schedule = Schedule.daily('22:00', '06:00', NEW_YORK)
+    opens = at(NEW_YORK, f'{night}T22:00')
+    schedule.is_active(opens)
+    assert schedule.active
+    assert schedule.valid_from == opens
+    assert schedule.next_transition - opens == hours * 3600
+    closes = datetime.fromtimestamp(schedule.next_transition, ZoneInfo(NEW_YORK))
+    assert (closes.hour, closes.minute) == (6, 0)
+
+
+def test_next_transition_is_cached_until_crossed():
+    schedule = Schedule.daily('22:00', '06:00', PARIS)
+    start = at(PARIS, '2026-06-10T12:00')
+    assert not schedule.is_active(start)
+    assert schedule.recomputes == 1
+    assert schedule.next_transition == at(PARIS, '2026-06-10T22:00')
+
+    for minutes in range(0, 10 * 60, 7):
+        assert not schedule.is_active(start + minutes * 60)
+    assert schedule.recomputes == 1
+
+    # Crossing the boundary recomputes once and flips the state
+    assert schedule.is_active(at(PARIS, '2026-06-10T22:00'))
+    assert schedule.recomputes == 2
+    assert schedule.next_transition == at(PARIS, '2026-06-11T06:00')
+    assert schedule.is_active(at(PARIS, '2026-06-11T03:00'))
+    assert schedule.recomputes == 2
+
+    # So does the clock jumping backwards
+    assert not schedule.is_active(start)
+    assert schedule.recomputes == 3
+    assert schedule.describe() == {"timezone": PARIS, "active": False,
+                                   "next_transition": at(PARIS, '2026-06-10T22:00')}
+
+
+def test_adjacent_windows_merge_into_one_transition():
+    schedule = Schedule([Window('20:00', '23:00'), Window('23:00', '02:00')], PARIS)
+    assert schedule.is_active(at(PARIS, '2026-06-10T21:00'))
+    assert schedule.next_transition == at(PARIS, '2026-06-11T02:00')
+
+
+def test_empty_spec_is_rejected():
+    with pytest.raises(ValueError):
+        Schedule.from_spec({"timezone": PARIS, "windows": []})
+    with pytest.raises(ValueError):
+        Schedule.from_spec('[]')
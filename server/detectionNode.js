@@ -0,0 +1,158 @@
+// server/detectionNode.js
+// Detection node agent: holds a lease with the API server's scheduler and runs
+// one ai/detect.py process per camera assigned to this host.
+//
+//   node detectionNode.js --coordinator http://api:5000 --cameras-per-core 1.5
+//   node detectionNode.js --dry-run --id local-a --base-port 6100   # no Python, for local testing
+//
+// Capacity is cores x cameras-per-core; take cameras-per-core from the
+// benchmarks (ai/benchmarks) for this host's CPU and settings. If the lease
+// can't be renewed before it expires, the node stops all its cameras, because
+// the scheduler will already be handing them to other nodes.
+require('dotenv').config();
+const os = require('os');
+const { spawn } = require('child_process');
+const axios = require('axios');
+const { detectionArgs } = require('./services/detectionArgs');
+
+function option(name, fallback) {
+  const index = process.argv.indexOf(`--${name}`);
+  if (index !== -1) {
+    const value = process.argv[index + 1];
+    return value === undefined || value.startsWith('--') ? true : value;
+  }
+  const envName = `NODE_${name.toUpperCase().replace(/-/g, '_')}`;
+  return process.env[envName] !== undefined ? process.env[envName] : fallback;
+}
+
+const config = {
+  coordinator: option('coordinator', 'http://localhost:5000'),
+  id: option('id', `${os.hostname()}-${process.pid}`),
+  url: option('url', `http://${os.hostname()}`),
+  cores: Number(option('cores', os.cpus().length)),
+  camerasPerCore: Number(option('cameras-per-core', 1)),
+  basePort: Number(option('base-port', 5100)),
+  python: option('python', 'python'),
+  dryRun: Boolean(option('dry-run', false)),
+  // Dry runs report this as load per core instead of the real load average
+  fakeLoad: option('fake-load', null),
+};
+const capacity = Math.floor(config.cores * config.camerasPerCore);
+
+const running = new Map();  // cameraId -> { port, process, restarts }
+let heartbeatMs = 5000;
+let leaseMs = 15000;
+let leaseRenewedAt = 0;
+let stopping = false;
+
+function freePort() {
+  const used = new Set([...running.values()].map(entry => entry.port));
+  let port = config.basePort;
+  while (used.has(port)) port += 1;
+  return port;
+}
+
+function startCamera(camera) {
+  const id = camera._id.toString();
+  const entry = { port: freePort(), process: null, restarts: 0, camera };
+  running.set(id, entry);
+  if (config.dryRun) {
+    console.log(`[dry-run] would start camera ${id} on port ${entry.port}`);
+    return;
+  }
+  const launch = () => {
+    const child = spawn(config.python, detectionArgs(camera, [
+      '--port', String(entry.port),
+      // Alerts and analytics go to the coordinator, not this host's localhost
+      '--backend_url', config.coordinator,
+    ]));
+    child.stdout.on('data', data => console.log(`[${id}] ${data}`.trimEnd()));
+    child.stderr.on('data', data => console.log(`[${id}] ${data}`.trimEnd()));
+    child.on('exit', code => {
+      if (running.get(id) !== entry || entry.process !== child) return;
+      // Crashed while still assigned: restart with backoff
+      entry.restarts += 1;
+      const delay = Math.min(60000, 1000 * 2 ** Math.min(entry.restarts, 6));
+      console.error(`Camera ${id} exited with ${code}; restarting in ${delay / 1000}s`);
+      entry.process = null;
+      setTimeout(() => {
+        if (running.get(id) === entry) launch();
+      }, delay);
+    });
+    entry.process = child;
+  };
+  launch();
+  console.log(`Started camera ${id} on port ${entry.port}`);
+}
+
+function stopCamera(id) {
+  const entry = running.get(id);
+  if (!entry) return;
+  running.delete(id);
+  if (entry.process) entry.process.kill('SIGTERM');
+  console.log(`${config.dryRun ? '[dry-run] ' : ''}Stopped camera ${id}`);
+}
+
+function load() {
+  if (config.fakeLoad !== null) return Number(config.fakeLoad);
+  return os.loadavg()[0] / config.cores;
+}
+
+async function heartbeat() {
+  const report = {
+    node: config.id,
+    url: config.url,
+    capacity,
+    cores: config.cores,
+    load: load(),
+    running: [...running.entries()].map(([camera, entry]) => ({ camera, port: entry.port })),
+  };
+  const headers = process.env.NODE_TOKEN ? { 'X-Node-Token': process.env.NODE_TOKEN } : {};
+  const response = await axios.post(`${config.coordinator}/api/nodes/heartbeat`, report,
+    { headers, timeout: 5000 });
+  leaseRenewedAt = Date.now();
+  heartbeatMs = response.data.heartbeatMs || heartbeatMs;
+  leaseMs = response.data.leaseMs || leaseMs;
+
+  const assigned = new Map(response.data.assignments.map(({ camera }) => [camera._id.toString(), camera]));
+  [...running.keys()].filter(id => !assigned.has(id)).forEach(stopCamera);
+  assigned.forEach((camera, id) => {
+    if (!running.has(id)) startCamera(camera);
+  });
+}
+
+async function loop() {
+  while (!stopping) {
+    try {
+      await heartbeat();
+    } catch (err) {
+      console.error(`Heartbeat to ${config.coordinator} failed: ${err.message}`);
+      if (running.size && Date.now() - leaseRenewedAt > leaseMs) {
+        console.error('Lease expired; stopping all cameras');
+        [...running.keys()].forEach(stopCamera);
+      }
+    }
+    await new Promise(resolve => setTimeout(resolve, heartbeatMs));
+  }
+}
+
+async function shutdown() {
+  if (stopping) return;
+  stopping = true;
+  [...running.keys()].forEach(stopCamera);
+  try {
+    const headers = process.env.NODE_TOKEN ? { 'X-Node-Token': process.env.NODE_TOKEN } : {};
+    await axios.post(`${config.coordinator}/api/nodes/${encodeURIComponent(config.id)}/leave`, {},
+      { headers, timeout: 3000 });
+  } catch (err) {
+    console.error(`Could not deregister: ${err.message}`);
+  }
+  process.exit(0);
+}
+
+process.on('SIGINT', shutdown);
+process.on('SIGTERM', shutdown);
+
+console.log(`Detection node ${config.id}: capacity ${capacity} (${config.cores} cores x ${config.camerasPerCore}), ` +
+  `coordinator ${config.coordinator}${config.dryRun ? ', dry run' : ''}`);
+loop();
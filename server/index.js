@@ -4,6 +4,9 @@ const mongoose = require('mongoose');
 const userRoutes = require('./routes/user');
 const cameraRoutes = require('./routes/camera');
 const alertRoutes = require('./routes/alert');
+const analyticsRoutes = require('./routes/analytics');
+const nodeRoutes = require('./routes/nodes');
+const scheduler = require('./services/detectionScheduler');
 const cors = require('cors');
 const { spawn } = require('child_process');
 const { auth } = require('./middleware/auth'); // Destructure auth from exports
@@ -21,6 +24,8 @@ mongoose.connect(MONGO_URI)
 app.use('/api/users', userRoutes);
 app.use('/api/cameras', cameraRoutes);
 app.use('/api/alerts', alertRoutes);
+app.use('/api/analytics', analyticsRoutes);
+app.use('/api/nodes', nodeRoutes(scheduler.start()));
 
 // Add test route for auth middleware
 app.get('/api/test-auth', auth, (req, res) => {
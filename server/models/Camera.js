@@ -10,6 +10,14 @@ const cameraSchema = new Schema({
     enum: ['1','2','3'],
     default: []
   },
+  // Restricted hours for feature '3', passed to the detector as --schedule:
+  // { timezone, windows: [{ days, start, end }], holidays: ['YYYY-MM-DD'], holiday_windows }
+  schedule: { type: Schema.Types.Mixed },
+  // Counting lines and occupancy zones, passed to the detector as --analytics:
+  // { lines: [{ name, points: [[x, y], [x, y]] }], zones: [{ name, points }] }
+  analytics: { type: Schema.Types.Mixed },
+  // Detection switched on via start-detection; the scheduler keeps these running on a detection node
+  detection: { type: Boolean, default: false },
   user: { type: Schema.Types.ObjectId, ref: 'User' }, // owner
   createdAt: { type: Date, default: Date.now },
   updatedAt: { type: Date, default: Date.now },
@@ -0,0 +1,30 @@
+const mongoose = require('mongoose');
+const Schema = mongoose.Schema;
+
+// One minute of line-crossing or zone-occupancy counts for a camera, computed
+// by the detector and uploaded in bulk. Dashboards query these instead of
+// re-deriving counts from raw detections.
+const rollupSchema = new Schema({
+  camera: { type: Schema.Types.ObjectId, ref: 'Camera', required: true },
+  user: { type: Schema.Types.ObjectId, ref: 'User' },
+  minute: { type: Date, required: true },
+  kind: { type: String, enum: ['line', 'zone'], required: true },
+  name: { type: String, required: true },
+  // kind 'line'
+  in: { type: Number, default: 0 },
+  out: { type: Number, default: 0 },
+  // kind 'zone'
+  entries: { type: Number, default: 0 },
+  exits: { type: Number, default: 0 },
+  peak: { type: Number, default: 0 },
+  // Frames processed in the minute and the sum of occupancy over them; hour and
+  // day averages are occupancyFrames / frames summed over the period
+  frames: { type: Number, default: 0 },
+  occupancyFrames: { type: Number, default: 0 },
+});
+
+// A re-sent minute replaces the stored one, so uploads can be retried safely
+rollupSchema.index({ camera: 1, kind: 1, name: 1, minute: 1 }, { unique: true });
+rollupSchema.index({ camera: 1, minute: 1 });
+
+module.exports = mongoose.model('Rollup', rollupSchema);
@@ -3,18 +3,60 @@ const router = express.Router();
 const Alert = require('../models/Alert');
 const { auth } = require('./user');
 const multer = require('multer');
+const alertEvents = require('../services/alertEvents');
 const upload = multer();
 
+// Alert as pushed to clients: no image bytes, camera reduced to id + name
+const toEvent = (alert) => {
+  const { img, ...rest } = alert.toObject();
+  return { ...rest, hasImage: Boolean(img && img.data) };
+};
+
 // Get all alerts
 router.get('/', async (req, res) => {
   try {
-    const alerts = await Alert.find({}).populate('camera');
+    // Clients resume the event stream from here. Read it before the query:
+    // an alert published in between is then both in the snapshot and
+    // replayed by the stream (clients dedupe by _id) instead of in neither
+    const lastEventId = alertEvents.lastEventId();
+    // Image bytes are served separately by /:id/image
+    const alerts = await Alert.find({}).select('-img.data').populate('camera', 'name status');
+    res.set('X-Last-Event-Id', lastEventId);
+    res.set('Access-Control-Expose-Headers', 'X-Last-Event-Id');
     res.json(alerts);
   } catch (err) {
     res.status(500).json({ error: 'Server error.' });
   }
 });
 
+// Stream new alerts and seen-state changes (Server-Sent Events).
+// Resumes from the Last-Event-ID header (browser reconnects) or ?lastEventId=.
+router.get('/stream', (req, res) => {
+  res.setHeader('Content-Type', 'text/event-stream');
+  res.setHeader('Cache-Control', 'no-cache');
+  res.setHeader('Connection', 'keep-alive');
+  res.flushHeaders();
+
+  const send = (event) => {
+    res.write(`id: ${event.id}\nevent: ${event.type}\ndata: ${JSON.stringify(event.data)}\n\n`);
+  };
+
+  const backlog = alertEvents.eventsSince(req.get('Last-Event-ID') || req.query.lastEventId);
+  if (backlog === null) {
+    // Can't serve the delta (server restarted or client too far behind)
+    res.write(`id: ${alertEvents.lastEventId()}\nevent: reset\ndata: {}\n\n`);
+  } else {
+    backlog.forEach(send);
+  }
+
+  const unsubscribe = alertEvents.subscribe(send);
+  const heartbeat = setInterval(() => res.write(': ping\n\n'), 25000);
+  req.on('close', () => {
+    clearInterval(heartbeat);
+    unsubscribe();
+  });
+});
+
 // Mark alert as seen
 router.patch('/:id/seen', async (req, res) => {
   try {
@@ -24,6 +66,7 @@ router.patch('/:id/seen', async (req, res) => {
       { new: true }
     );
     if (!alert) return res.status(404).json({ error: 'Alert not found.' });
+    alertEvents.publish('seen', { _id: alert._id, seen: true });
     res.json(alert);
   } catch (err) {
     res.status(500).json({ error: 'Server error.' });
@@ -33,7 +76,7 @@ router.patch('/:id/seen', async (req, res) => {
 // Create a new alert (for testing/demo)
 router.post('/', upload.single('img'), async (req, res) => {
   try {
-    const { message, camera, user } = req.body;
+    const { message, camera, user, date } = req.body;
     let img = undefined;
     if (req.file) {
       img = {
@@ -48,8 +91,11 @@ router.post('/', upload.single('img'), async (req, res) => {
     if (!camera || !user) {
       return res.status(400).json({ error: 'Camera and User are required.' });
     }
-    const alert = new Alert({ message, camera, user, img });
+    // Alerts replayed from a detector's journal carry the time they fired
+    const alert = new Alert({ message, camera, user, img, date: date || undefined });
     await alert.save();
+    await alert.populate('camera', 'name status');
+    alertEvents.publish('alert', toEvent(alert));
     res.status(201).json(alert);
   } catch (err) {
     console.error('Failed to create alert:', err);
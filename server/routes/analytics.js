@@ -0,0 +1,108 @@
+const express = require('express');
+const mongoose = require('mongoose');
+const router = express.Router();
+const Rollup = require('../models/Rollup');
+
+const COUNT_FIELDS = ['in', 'out', 'entries', 'exits', 'peak', 'frames', 'occupancyFrames'];
+const BUCKETS = { minute: 60 * 1000, hour: 60 * 60 * 1000, day: 24 * 60 * 60 * 1000 };
+
+// Bulk upload of per-minute rollups from a detector:
+// { camera, user, rollups: [{ minute, kind, name, in, out, entries, exits, peak,
+//                             frames, occupancyFrames }] }
+// Zone rows come for every minute the camera was processed, empty ones included.
+router.post('/rollups', async (req, res) => {
+  try {
+    const { camera, user, rollups } = req.body;
+    if (!mongoose.isValidObjectId(camera) || !Array.isArray(rollups)) {
+      return res.status(400).json({ error: 'camera and a rollups array are required' });
+    }
+
+    const ops = [];
+    for (const rollup of rollups) {
+      const minute = new Date(rollup.minute);
+      if (Number.isNaN(minute.getTime()) || !['line', 'zone'].includes(rollup.kind) || !rollup.name) {
+        return res.status(400).json({ error: 'Each rollup needs a minute, kind and name' });
+      }
+      const fields = mongoose.isValidObjectId(user) ? { user } : {};
+      COUNT_FIELDS.forEach(field => {
+        if (rollup[field] !== undefined) fields[field] = Number(rollup[field]) || 0;
+      });
+      ops.push({
+        updateOne: {
+          filter: { camera, kind: rollup.kind, name: rollup.name, minute },
+          update: { $set: fields },
+          upsert: true,
+        }
+      });
+    }
+
+    if (ops.length) {
+      await Rollup.bulkWrite(ops, { ordered: false });
+    }
+    res.status(201).json({ stored: ops.length });
+  } catch (err) {
+    res.status(500).json({ error: 'Failed to store rollups', details: err.message });
+  }
+});
+
+// Counts for one camera, re-bucketed server-side:
+// GET /:cameraId?from=&to=&kind=line|zone&name=&bucket=minute|hour|day
+router.get('/:cameraId', async (req, res) => {
+  try {
+    const { cameraId } = req.params;
+    const { kind, name } = req.query;
+    const bucket = req.query.bucket || 'hour';
+    if (!mongoose.isValidObjectId(cameraId) || !BUCKETS[bucket]) {
+      return res.status(400).json({ error: 'Invalid camera id or bucket' });
+    }
+
+    const to = req.query.to ? new Date(req.query.to) : new Date();
+    const from = req.query.from ? new Date(req.query.from) : new Date(to.getTime() - BUCKETS.day);
+    if (Number.isNaN(from.getTime()) || Number.isNaN(to.getTime())) {
+      return res.status(400).json({ error: 'Invalid from/to date' });
+    }
+
+    const match = { camera: new mongoose.Types.ObjectId(cameraId), minute: { $gte: from, $lt: to } };
+    if (kind) match.kind = kind;
+    if (name) match.name = name;
+
+    const series = await Rollup.aggregate([
+      { $match: match },
+      {
+        $group: {
+          _id: {
+            kind: '$kind',
+            name: '$name',
+            start: { $subtract: ['$minute', { $mod: [{ $toLong: '$minute' }, BUCKETS[bucket]] }] },
+          },
+          in: { $sum: '$in' },
+          out: { $sum: '$out' },
+          entries: { $sum: '$entries' },
+          exits: { $sum: '$exits' },
+          peak: { $max: '$peak' },
+          frames: { $sum: '$frames' },
+          occupancyFrames: { $sum: '$occupancyFrames' },
+        }
+      },
+      { $sort: { '_id.start': 1 } },
+      {
+        $project: {
+          _id: 0, kind: '$_id.kind', name: '$_id.name', start: '$_id.start',
+          in: 1, out: 1, entries: 1, exits: 1, peak: 1,
+          // Weighted by frames, so empty minutes count as zero occupancy
+          avgOccupancy: {
+            $round: [{
+              $cond: [{ $gt: ['$frames', 0] }, { $divide: ['$occupancyFrames', '$frames'] }, 0],
+            }, 2],
+          },
+        }
+      },
+    ]);
+
+    res.json({ camera: cameraId, bucket, from, to, series });
+  } catch (err) {
+    res.status(500).json({ error: 'Failed to fetch analytics', details: err.message });
+  }
+});
+
+module.exports = router;
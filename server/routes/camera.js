@@ -4,12 +4,24 @@ const router = express.Router();
 const Camera = require('../models/Camera');
 const { spawn } = require('child_process');
 const axios = require('axios');
-const path = require('path');
 const http = require('http');
+const scheduler = require('../services/detectionScheduler');
+const { detectionArgs } = require('../services/detectionArgs');
+const mjpegFanout = require('../services/mjpegFanout');
+
+const LOCAL_DETECTION_URL = 'http://127.0.0.1:5000';
+
+const localDetections = new Map();  // cameraId -> child process started by the local fallback
+
+// Detection service for a camera: the node the scheduler placed it on, or the
+// single local process started by the fallback in startDetection
+async function detectionUrl(cameraId) {
+  return (await scheduler.endpointFor(cameraId)) || LOCAL_DETECTION_URL;
+}
 
 router.post('/', async (req, res) => {
   try {
-    const { name, status, src, features, user } = req.body;
+    const { name, status, src, features, user, schedule, analytics } = req.body;
 
     // Validation
     if (!name || !src || !user) {
@@ -26,6 +38,8 @@ router.post('/', async (req, res) => {
       status: status || 'active',
       src,
       features: filteredFeatures,
+      schedule,
+      analytics,
       user,
       createdAt: new Date(),
       updatedAt: new Date()
@@ -41,26 +55,75 @@ router.post('/', async (req, res) => {
 });
 
 // Proxy video feed from Python backend
-router.get('/:id/video_feed', async (req, res) => {
+router.get('/:id/video_feed', (req, res) => {
   const cameraId = req.params.id;
-  const pythonUrl = `http://127.0.0.1:5000/video_feed/${cameraId}`;
+  // Forward viewer quality preferences (?w=&q=&fps=) to the Python broadcaster
+  const query = new URLSearchParams();
+  ['w', 'q', 'fps'].forEach(key => {
+    if (req.query[key] !== undefined) query.set(key, req.query[key]);
+  });
+  query.sort();
+  const qs = query.toString();
 
-  // Set headers for MJPEG stream
-  res.setHeader('Content-Type', 'multipart/x-mixed-replace; boundary=frame');
+  // Viewers of the same camera and variant share one upstream connection
+  mjpegFanout.watch(`${cameraId}${qs ? `?${qs}` : ''}`,
+    async () => `${await detectionUrl(cameraId)}/video_feed/${cameraId}${qs ? `?${qs}` : ''}`, res);
+});
 
-  http.get(pythonUrl, (pyRes) => {
-    pyRes.on('data', (chunk) => {
-      res.write(chunk);
+// Proxy pass-through HLS live view (playlist + fMP4 segments) from Python backend.
+// The camera's H.264 is remuxed once, not re-encoded per viewer.
+router.get('/:id/hls/:file', async (req, res) => {
+  const { id, file } = req.params;
+  if (!/^[\w.-]+$/.test(file)) {
+    return res.status(400).json({ error: 'Invalid segment name' });
+  }
+  try {
+    const pythonUrl = `${await detectionUrl(id)}/hls/${id}/${file}`;
+
+    const upstream = http.get(pythonUrl, (pyRes) => {
+      res.status(pyRes.statusCode);
+      ['content-type', 'content-length', 'cache-control'].forEach(header => {
+        if (pyRes.headers[header]) res.setHeader(header, pyRes.headers[header]);
+      });
+      pyRes.pipe(res);
     });
-    pyRes.on('end', () => {
+    upstream.on('error', () => {
+      if (!res.headersSent) res.status(502);
       res.end();
     });
-    pyRes.on('error', (err) => {
-      res.status(502).end('Python backend error');
+    req.on('close', () => {
+      upstream.destroy();
     });
-  }).on('error', (err) => {
-    res.status(502).end('Could not connect to Python backend');
-  });
+  } catch (err) {
+    res.status(500).json({ error: 'Failed to proxy HLS', details: err.message });
+  }
+});
+
+// Proxy per-frame detection metadata (Server-Sent Events) from Python backend.
+// Clients draw boxes/zones themselves instead of relying on burned-in overlays.
+router.get('/:id/metadata', async (req, res) => {
+  const cameraId = req.params.id;
+  try {
+    const pythonUrl = `${await detectionUrl(cameraId)}/metadata/${cameraId}`;
+
+    res.setHeader('Content-Type', 'text/event-stream');
+    res.setHeader('Cache-Control', 'no-cache');
+    res.setHeader('Connection', 'keep-alive');
+    res.flushHeaders();
+
+    const upstream = http.get(pythonUrl, (pyRes) => {
+      pyRes.pipe(res);
+    });
+    upstream.on('error', () => {
+      res.end();
+    });
+    // Don't leave the Python stream open once the browser goes away
+    req.on('close', () => {
+      upstream.destroy();
+    });
+  } catch (err) {
+    res.status(500).json({ error: 'Failed to proxy metadata', details: err.message });
+  }
 });
 
 // // Get camera video feed
@@ -152,7 +215,7 @@ router.get('/:id', async (req, res) => {
 // Update a camera
 router.put('/:id', async (req, res) => {
   try {
-    const { name, status, src, features, zone_points } = req.body;
+    const { name, status, src, features, zone_points, schedule, analytics } = req.body;
 
     // Validation
     if (!name || !src) {
@@ -161,7 +224,7 @@ router.put('/:id', async (req, res) => {
 
     const camera = await Camera.findByIdAndUpdate(
       req.params.id,
-      { name, status, src, features, zone_points },
+      { name, status, src, features, zone_points, schedule, analytics },
       { new: true }
     );
 
@@ -196,9 +259,9 @@ router.post('/:id/start-detection', async (req, res) => {
       return res.status(404).json({ error: 'Camera not found' });
     }
 
-    await startDetection(camera);
+    const placement = await startDetection(camera);
     res.json({ 
-      message: 'Detection started',
+      message: placement === 'scheduled' ? 'Detection scheduled on a detection node' : 'Detection started',
       video_feed_url: `${req.protocol}://${req.get('host')}/api/cameras/${camera._id}/video_feed`
     });
   } catch (err) {
@@ -209,49 +272,64 @@ router.post('/:id/start-detection', async (req, res) => {
   }
 });
 
-// Helper function to start detection
-async function startDetection(camera) {
-  const cameraId = camera._id.toString();
-  
+// Stop detection for a specific camera: scheduled cameras are released by their
+// node, a local fallback process is terminated here
+router.post('/:id/stop-detection', async (req, res) => {
   try {
-    // Start via API
-    const response = await axios.post('http://localhost/start', {
-      rtsp_url: camera.src,
-      features: camera.features.join(',')
-    }, {
-      timeout: 5000
-    });
-    
-    if (response.status !== 200) {
-      throw new Error(`API returned ${response.status}`);
+    const camera = await Camera.findByIdAndUpdate(req.params.id, { detection: false }, { new: true });
+    if (!camera) {
+      return res.status(404).json({ error: 'Camera not found' });
     }
-    
-    console.log(`Detection started for camera ${cameraId} via API`);
-  } catch (err) {
-    console.error('Failed to start detection via API, falling back to subprocess:', err.message);
-    
-    // Fallback to subprocess
-    if (!camera.src) {
-      throw new Error('No video source provided');
+    const child = localDetections.get(camera._id.toString());
+    if (child) {
+      // SIGTERM lets the worker run its exit handlers (HLS remux, journal)
+      child.kill('SIGTERM');
+      localDetections.delete(camera._id.toString());
     }
+    await scheduler.exclusive(() => scheduler.rebalance('stop'));
+    res.json({ message: 'Detection stopped' });
+  } catch (err) {
+    res.status(500).json({ error: 'Failed to stop detection', details: err.message });
+  }
+});
 
-    const process = spawn('python', [
-      path.join(__dirname, '../ai/detect.py'),
-      '--camera_url', camera.src,
-      '--features', camera.features.join(','),
-      '--camera_id', camera._id.toString(),
-      '--user_id', camera.user ? camera.user.toString() : 'PLACE_A_VALID_USER_ID_HERE'
-    ]);
-
-    // Handle process output
-    process.stdout.on('data', (data) => {
-      console.log(`Detection output: ${data}`);
-    });
+// Helper function to start detection. With detection nodes registered the
+// camera is handed to the scheduler; otherwise it runs as a local subprocess.
+async function startDetection(camera) {
+  const cameraId = camera._id.toString();
+  if (!camera.src) {
+    throw new Error('No video source provided');
+  }
 
-    process.stderr.on('data', (data) => {
-      console.log(`Detection log: ${data}`);
-    });
+  camera.detection = true;
+  await camera.save();
+
+  if (await scheduler.hasNodes()) {
+    await scheduler.exclusive(() => scheduler.rebalance('start'));
+    console.log(`Detection for camera ${cameraId} scheduled`);
+    return 'scheduled';
+  }
+
+  if (localDetections.has(cameraId)) {
+    console.log(`Camera ${cameraId} is already running locally`);
+    return 'local';
   }
+  console.log(`No detection nodes registered; starting camera ${cameraId} locally`);
+  const process = spawn('python', detectionArgs(camera));
+  localDetections.set(cameraId, process);
+  process.on('exit', () => {
+    if (localDetections.get(cameraId) === process) localDetections.delete(cameraId);
+  });
+
+  // Handle process output
+  process.stdout.on('data', (data) => {
+    console.log(`Detection output: ${data}`);
+  });
+
+  process.stderr.on('data', (data) => {
+    console.log(`Detection log: ${data}`);
+  });
+  return 'local';
 }
 
 module.exports = router;
\ No newline at end of file
@@ -0,0 +1,89 @@
+// server/routes/nodes.js
+// Detection node agents (detectionNode.js) heartbeat here to hold their lease
+// and learn which cameras to run.
+//
+// Heartbeat replies carry camera URLs, credentials included, so the API only
+// runs with a shared secret (NODE_TOKEN). NODE_API_INSECURE=1 allows it without
+// one for local development; camera credentials are then stripped from replies.
+const express = require('express');
+
+// Camera doc with the user:password part of its stream URL removed
+function redactCamera(camera) {
+  const plain = camera.toObject ? camera.toObject() : { ...camera };
+  try {
+    const url = new URL(plain.src);
+    if (url.username || url.password) {
+      url.username = '';
+      url.password = '';
+      plain.src = url.toString();
+    }
+  } catch (err) {
+    // Not a URL (e.g. a local file path): nothing to strip
+  }
+  return plain;
+}
+
+function nodeRoutes(scheduler) {
+  const router = express.Router();
+  const token = process.env.NODE_TOKEN;
+  const insecure = !token && process.env.NODE_API_INSECURE === '1';
+
+  if (!token && !insecure) {
+    console.warn('NODE_TOKEN is not set: detection node API disabled ' +
+      '(set NODE_API_INSECURE=1 to run without it in development)');
+    router.use((req, res) => res.status(503).json({ error: 'Detection node API disabled: NODE_TOKEN is not set' }));
+    return router;
+  }
+  if (insecure) {
+    console.warn('Detection node API running without NODE_TOKEN; camera credentials are not sent to nodes');
+  }
+
+  // Shared secret between the API server and its nodes
+  router.use((req, res, next) => {
+    if (token && req.get('X-Node-Token') !== token) {
+      return res.status(401).json({ error: 'Invalid node token' });
+    }
+    next();
+  });
+
+  // { node, url, capacity, cores, load, running: [{ camera, port }] }
+  //   -> { leaseMs, heartbeatMs, assignments: [{ camera }] }
+  router.post('/heartbeat', async (req, res) => {
+    try {
+      const { node, url } = req.body;
+      if (!node || !url) {
+        return res.status(400).json({ error: 'node and url are required' });
+      }
+      const reply = await scheduler.heartbeat(req.body);
+      if (insecure) {
+        reply.assignments = reply.assignments.map(({ camera }) => ({ camera: redactCamera(camera) }));
+      }
+      res.json(reply);
+    } catch (err) {
+      res.status(500).json({ error: 'Heartbeat failed', details: err.message });
+    }
+  });
+
+  // Graceful shutdown: reassign the node's cameras now instead of at lease expiry
+  router.post('/:id/leave', async (req, res) => {
+    try {
+      await scheduler.leave(req.params.id);
+      res.json({ message: 'Node removed' });
+    } catch (err) {
+      res.status(500).json({ error: 'Leave failed', details: err.message });
+    }
+  });
+
+  // Nodes, their leases and which cameras they hold
+  router.get('/', async (req, res) => {
+    try {
+      res.json(await scheduler.status());
+    } catch (err) {
+      res.status(500).json({ error: 'Failed to fetch nodes' });
+    }
+  });
+
+  return router;
+}
+
+module.exports = nodeRoutes;
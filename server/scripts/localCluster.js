@@ -0,0 +1,81 @@
+// server/scripts/localCluster.js
+// Local test of the detection scheduler: an in-memory coordinator, a few fake
+// cameras and several dry-run node agents (separate processes), scripted to
+// join, crash and overload. No MongoDB, Python or cameras needed.
+//
+//   node scripts/localCluster.js [--cameras 8] [--port 5055]
+const path = require('path');
+const crypto = require('crypto');
+const express = require('express');
+const { fork } = require('child_process');
+const { Scheduler } = require('../services/scheduler');
+const { MemoryLeaseStore } = require('../services/leaseStore');
+const nodeRoutes = require('../routes/nodes');
+
+const arg = (name, fallback) => {
+  const index = process.argv.indexOf(`--${name}`);
+  return index === -1 ? fallback : Number(process.argv[index + 1]);
+};
+const PORT = arg('port', 5055);
+const CAMERAS = arg('cameras', 8);
+
+const cameras = Array.from({ length: CAMERAS }, (_, i) => ({
+  _id: `cam${String(i + 1).padStart(2, '0')}`,
+  src: `rtsp://example.invalid/cam${i + 1}`,
+  features: ['1'],
+}));
+
+// Short leases and no hold time so the whole script runs in about half a minute
+const scheduler = new Scheduler({
+  store: new MemoryLeaseStore(),
+  cameraSource: async () => cameras,
+  leaseMs: 3000,
+  heartbeatMs: 1000,
+  rebalanceMs: 1000,
+  minHoldMs: 0,
+  overloadBeats: 3,
+}).start();
+
+// The node API needs a shared secret; the forked agents inherit it
+process.env.NODE_TOKEN = process.env.NODE_TOKEN || crypto.randomBytes(16).toString('hex');
+
+const app = express();
+app.use(express.json());
+app.use('/api/nodes', nodeRoutes(scheduler));
+
+const agents = {};
+function startAgent(id, extra = []) {
+  agents[id] = fork(path.join(__dirname, '../detectionNode.js'), [
+    '--dry-run', '--id', id, '--coordinator', `http://127.0.0.1:${PORT}`,
+    '--cores', '2', '--cameras-per-core', '2', '--url', 'http://127.0.0.1', ...extra,
+  ], { silent: true });
+  console.log(`> ${id} started ${extra.join(' ')}`);
+}
+
+async function printStatus(label) {
+  const status = await scheduler.status();
+  const rows = status.nodes
+    .sort((a, b) => a.id.localeCompare(b.id))
+    .map(n => `  ${n.id.padEnd(7)} cap ${n.capacity} load ${n.load.toFixed(1)}${n.overloaded ? ' OVERLOADED' : ''}  ` +
+      `assigned [${n.assigned.sort().join(' ')}] running [${n.running.sort().join(' ')}]`);
+  console.log(`t=${label}s\n${rows.join('\n')}\n  unassigned [${status.unassigned.join(' ')}]`);
+}
+
+const steps = [
+  [0, () => { startAgent('node-a'); startAgent('node-b'); }],
+  [8, () => startAgent('node-c')],
+  [16, () => { agents['node-a'].kill('SIGKILL'); console.log('> node-a killed (no leave, lease must expire)'); }],
+  [24, () => startAgent('node-d', ['--fake-load', '1.5'])],
+  [36, () => { agents['node-b'].kill('SIGTERM'); console.log('> node-b stopped gracefully'); }],
+];
+
+app.listen(PORT, () => {
+  const started = Date.now();
+  steps.forEach(([at, fn]) => setTimeout(fn, at * 1000));
+  const ticker = setInterval(() => printStatus(Math.round((Date.now() - started) / 1000)), 4000);
+  setTimeout(() => {
+    clearInterval(ticker);
+    Object.values(agents).forEach(agent => agent.kill('SIGKILL'));
+    printStatus('end').then(() => process.exit(0));
+  }, 44000);
+});
@@ -0,0 +1,42 @@
+// server/services/alertEvents.js
+// In-process alert event hub feeding GET /api/alerts/stream.
+// Event ids are "<bootId>-<seq>" so a client reconnecting after a server
+// restart (or after falling out of the history window) is told to refetch.
+
+const BOOT_ID = Date.now().toString(36);
+const HISTORY_LIMIT = 1000;
+
+let seq = 0;
+const history = [];
+const subscribers = new Set();
+
+function publish(type, data) {
+  seq += 1;
+  const event = { id: `${BOOT_ID}-${seq}`, seq, type, data };
+  history.push(event);
+  if (history.length > HISTORY_LIMIT) history.shift();
+  subscribers.forEach(fn => fn(event));
+  return event;
+}
+
+function lastEventId() {
+  return `${BOOT_ID}-${seq}`;
+}
+
+// Events after lastId, or null when the delta can't be served and the client
+// must reload the full list.
+function eventsSince(lastId) {
+  if (!lastId) return null;
+  const [boot, n] = String(lastId).split('-');
+  const last = Number(n);
+  if (boot !== BOOT_ID || !Number.isInteger(last) || last > seq) return null;
+  if (history.length && history[0].seq > last + 1) return null;
+  return history.filter(event => event.seq > last);
+}
+
+function subscribe(fn) {
+  subscribers.add(fn);
+  return () => subscribers.delete(fn);
+}
+
+module.exports = { publish, lastEventId, eventsSince, subscribe };
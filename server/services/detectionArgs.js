@@ -0,0 +1,25 @@
+// server/services/detectionArgs.js
+// Command line for one camera's detection process (ai/detect.py), shared by the
+// local fallback in routes/camera.js and the node agent (detectionNode.js).
+const path = require('path');
+
+const DETECT_SCRIPT = path.join(__dirname, '../ai/detect.py');
+
+function detectionArgs(camera, extra = []) {
+  const args = [
+    DETECT_SCRIPT,
+    '--camera_url', camera.src,
+    '--features', (camera.features || []).join(','),
+    '--camera_id', camera._id.toString(),
+    '--user_id', camera.user ? camera.user.toString() : 'PLACE_A_VALID_USER_ID_HERE'
+  ];
+  if (camera.schedule) {
+    args.push('--schedule', JSON.stringify(camera.schedule));
+  }
+  if (camera.analytics) {
+    args.push('--analytics', JSON.stringify(camera.analytics));
+  }
+  return args.concat(extra);
+}
+
+module.exports = { detectionArgs, DETECT_SCRIPT };
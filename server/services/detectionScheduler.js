@@ -0,0 +1,18 @@
+// server/services/detectionScheduler.js
+// The API server's camera scheduler: cameras with detection switched on are
+// spread over the detection nodes that heartbeat to /api/nodes.
+const Camera = require('../models/Camera');
+const { Scheduler } = require('./scheduler');
+const { MemoryLeaseStore } = require('./leaseStore');
+
+const env = (name, fallback) => (process.env[name] ? Number(process.env[name]) : fallback);
+
+const scheduler = new Scheduler({
+  store: new MemoryLeaseStore(),
+  cameraSource: () => Camera.find({ detection: true, status: 'active' }).lean(),
+  leaseMs: env('NODE_LEASE_MS', 15000),
+  heartbeatMs: env('NODE_HEARTBEAT_MS', 5000),
+  overloadLoad: env('NODE_OVERLOAD_LOAD', 0.9),
+});
+
+module.exports = scheduler;
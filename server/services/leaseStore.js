@@ -0,0 +1,50 @@
+// server/services/leaseStore.js
+// Coordination state for the detection scheduler: node leases and camera
+// assignments. MemoryLeaseStore is the local stand-in; it keeps everything in
+// the API process, which is enough for one coordinator (node agents re-report
+// what they run after a coordinator restart). A shared store (Redis, etcd,
+// Mongo) only has to implement the same async methods to run several
+// coordinators.
+
+class MemoryLeaseStore {
+  constructor() {
+    this.nodes = new Map();        // nodeId -> node record
+    this.assignments = new Map();  // cameraId -> { camera, node, since, releasing }
+  }
+
+  async getNode(id) {
+    return this.nodes.get(id) || null;
+  }
+
+  async putNode(node) {
+    this.nodes.set(node.id, node);
+    return node;
+  }
+
+  async deleteNode(id) {
+    return this.nodes.delete(id);
+  }
+
+  async listNodes() {
+    return [...this.nodes.values()];
+  }
+
+  async getAssignment(cameraId) {
+    return this.assignments.get(cameraId) || null;
+  }
+
+  async putAssignment(assignment) {
+    this.assignments.set(assignment.camera, assignment);
+    return assignment;
+  }
+
+  async deleteAssignment(cameraId) {
+    return this.assignments.delete(cameraId);
+  }
+
+  async listAssignments() {
+    return [...this.assignments.values()];
+  }
+}
+
+module.exports = { MemoryLeaseStore };
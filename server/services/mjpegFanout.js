@@ -0,0 +1,225 @@
+// server/services/mjpegFanout.js
+// One upstream MJPEG connection per camera stream variant, shared by every
+// browser watching it.
+//
+// The upstream multipart body from the Python service is split into frames
+// (boundary, Content-Length and X-Frame-Seq headers). Each frame is written to
+// every viewer. A viewer whose socket is backed up (res.write returned false)
+// skips frames until it drains and then gets the newest one, so a slow client
+// never holds back the others or buffers stale video. The upstream is closed
+// when the last viewer leaves.
+const http = require('http');
+
+const BOUNDARY = 'frame';
+const CRLF = Buffer.from('\r\n');
+const HEADER_END = Buffer.from('\r\n\r\n');
+const RECONNECT_MAX_MS = 5000;
+
+const streams = new Map();  // key -> MjpegFanout
+
+class MjpegFanout {
+  // resolveUrl: async () => upstream URL, asked again on every reconnect
+  // because the camera may have moved to another detection node
+  constructor(key, resolveUrl) {
+    this.key = key;
+    this.resolveUrl = resolveUrl;
+    this.viewers = new Set();
+    this.latest = null;  // { seq, head, jpeg }
+    this.upstream = null;
+    this.reconnectTimer = null;
+    this.closed = false;
+    this.everConnected = false;
+    this.reconnectDelay = 500;
+    this.frames = 0;
+    this.dropped = 0;
+    this.resetParser();
+  }
+
+  resetParser() {
+    this.pending = Buffer.alloc(0);  // bytes not yet consumed (boundary/headers)
+    this.body = null;                // Buffer being filled for the current frame
+    this.bodyFilled = 0;
+    this.bodySeq = 0;
+    this.skipCrlf = false;
+  }
+
+  subscribe(res) {
+    const viewer = { res, busy: false, sentSeq: -1 };
+    this.viewers.add(viewer);
+    res.on('drain', () => {
+      viewer.busy = false;
+      // Catch up with the newest frame rather than the ones skipped meanwhile
+      if (this.latest && this.latest.seq !== viewer.sentSeq) this.send(viewer, this.latest);
+    });
+    res.on('close', () => this.unsubscribe(viewer));
+    if (this.latest) {
+      this.send(viewer, this.latest);
+    }
+    if (!this.upstream && !this.reconnectTimer) this.connect();
+  }
+
+  unsubscribe(viewer) {
+    this.viewers.delete(viewer);
+    if (this.viewers.size === 0) this.close();
+  }
+
+  close() {
+    if (this.closed) return;
+    this.closed = true;
+    streams.delete(this.key);
+    clearTimeout(this.reconnectTimer);
+    if (this.upstream) {
+      this.upstream.destroy();
+      this.upstream = null;
+    }
+    console.log(`MJPEG upstream ${this.key} closed (${this.frames} frames, ${this.dropped} dropped for slow viewers)`);
+  }
+
+  async connect() {
+    this.reconnectTimer = null;
+    this.upstream = { destroy() {} };  // placeholder while the URL resolves
+    let url;
+    try {
+      url = await this.resolveUrl();
+    } catch (err) {
+      this.fail(err);
+      return;
+    }
+    if (this.closed) return;
+    const request = http.get(url, (pyRes) => {
+      if (pyRes.statusCode !== 200) {
+        pyRes.resume();
+        this.fail(new Error(`Python backend returned ${pyRes.statusCode}`));
+        return;
+      }
+      this.everConnected = true;
+      this.reconnectDelay = 500;
+      this.resetParser();
+      pyRes.on('data', chunk => this.parse(chunk));
+      pyRes.on('end', () => this.fail(new Error('Python stream ended')));
+      pyRes.on('error', err => this.fail(err));
+    });
+    request.on('error', err => this.fail(err));
+    this.upstream = request;
+  }
+
+  fail(err) {
+    if (!this.upstream || this.closed) return;  // already handled
+    this.upstream.destroy();
+    this.upstream = null;
+    if (!this.everConnected) {
+      // Never got a stream: tell the waiting viewers instead of hanging
+      const viewers = [...this.viewers];
+      this.close();
+      viewers.forEach(({ res }) => {
+        if (!res.headersSent) res.status(502);
+        res.end('Could not connect to Python backend');
+      });
+      return;
+    }
+    console.warn(`MJPEG upstream ${this.key} lost (${err.message}); reconnecting`);
+    this.reconnectTimer = setTimeout(() => this.connect(), this.reconnectDelay);
+    this.reconnectDelay = Math.min(this.reconnectDelay * 2, RECONNECT_MAX_MS);
+  }
+
+  // Incremental multipart parser: boundary line, part headers, Content-Length bytes of JPEG
+  parse(chunk) {
+    let offset = 0;
+    while (offset < chunk.length) {
+      if (this.body) {
+        const n = Math.min(this.body.length - this.bodyFilled, chunk.length - offset);
+        chunk.copy(this.body, this.bodyFilled, offset, offset + n);
+        this.bodyFilled += n;
+        offset += n;
+        if (this.bodyFilled === this.body.length) {
+          this.publish(this.bodySeq, this.body);
+          this.body = null;
+          this.skipCrlf = true;
+        }
+        continue;
+      }
+
+      this.pending = this.pending.length ? Buffer.concat([this.pending, chunk.subarray(offset)]) : chunk.subarray(offset);
+      offset = chunk.length;
+      if (this.skipCrlf && this.pending.length >= 2) {
+        if (this.pending[0] === 0x0d && this.pending[1] === 0x0a) this.pending = this.pending.subarray(2);
+        this.skipCrlf = false;
+      }
+      const end = this.pending.indexOf(HEADER_END);
+      if (end === -1) {
+        if (this.pending.length > 64 * 1024) this.pending = Buffer.alloc(0);  // not a multipart stream we know
+        return;
+      }
+      const headers = this.pending.subarray(0, end).toString('latin1');
+      const rest = this.pending.subarray(end + HEADER_END.length);
+      this.pending = Buffer.alloc(0);
+      const length = /content-length:\s*(\d+)/i.exec(headers);
+      const seq = /x-frame-seq:\s*(\d+)/i.exec(headers);
+      if (!length) {
+        console.warn(`MJPEG upstream ${this.key}: part without Content-Length, skipping`);
+        this.pending = rest;
+        continue;
+      }
+      this.body = Buffer.allocUnsafe(Number(length[1]));
+      this.bodyFilled = 0;
+      this.bodySeq = seq ? Number(seq[1]) : this.frames + 1;
+      // The rest of this chunk (if any) starts the body
+      if (rest.length) {
+        chunk = rest;
+        offset = 0;
+      }
+    }
+  }
+
+  publish(seq, jpeg) {
+    this.frames += 1;
+    const head = Buffer.from(`--${BOUNDARY}\r\nContent-Type: image/jpeg\r\n` +
+      `Content-Length: ${jpeg.length}\r\nX-Frame-Seq: ${seq}\r\n\r\n`);
+    this.latest = { seq, head, jpeg };
+    this.viewers.forEach(viewer => {
+      if (viewer.busy) {
+        this.dropped += 1;
+      } else {
+        this.send(viewer, this.latest);
+      }
+    });
+  }
+
+  send(viewer, frame) {
+    const { res } = viewer;
+    if (!res.headersSent) {
+      res.writeHead(200, {
+        'Content-Type': `multipart/x-mixed-replace; boundary=${BOUNDARY}`,
+        'Cache-Control': 'no-cache, no-store',
+        Connection: 'keep-alive',
+      });
+    }
+    // The same Buffers go to every viewer; nothing is copied per client
+    res.write(frame.head);
+    res.write(frame.jpeg);
+    viewer.busy = !res.write(CRLF);
+    viewer.sentSeq = frame.seq;
+  }
+}
+
+// Attach a viewer to the shared stream for key, opening the upstream if needed
+function watch(key, resolveUrl, res) {
+  let stream = streams.get(key);
+  if (!stream) {
+    stream = new MjpegFanout(key, resolveUrl);
+    streams.set(key, stream);
+  }
+  stream.subscribe(res);
+}
+
+function stats() {
+  return [...streams.values()].map(stream => ({
+    key: stream.key,
+    viewers: stream.viewers.size,
+    frames: stream.frames,
+    dropped: stream.dropped,
+    seq: stream.latest ? stream.latest.seq : null,
+  }));
+}
+
+module.exports = { watch, stats };
@@ -0,0 +1,295 @@
+// server/services/scheduler.js
+// Assigns cameras to detection nodes.
+//
+// Each node agent (detectionNode.js) heartbeats with its capacity (cores x
+// cameras per core, from the benchmarks), its load and the cameras it runs.
+// A heartbeat renews the node's lease; a node whose lease runs out is treated
+// as gone and its cameras are reassigned. Rebalancing runs on every join and
+// leave and on a timer:
+//   - wanted cameras without a live node go to the node with the most free slots
+//   - nodes over capacity, or overloaded for several heartbeats, shed cameras
+//   - after a join, cameras move from the fullest to the emptiest node until
+//     utilisation is even (a few moves per round, and never a camera that moved
+//     within minHoldMs)
+// A node is "hot" while its load is above overloadLoad or within
+// shedCooldownMs of shedding a camera. Hot nodes never receive moved cameras
+// (new cameras go to them only when nothing else has room), so a camera shed
+// for load isn't moved straight back by the next even-out round.
+// A moved camera is only handed to its new node once the old node has reported
+// that it stopped running it (or its lease expired), so a camera never runs twice.
+// Only a heartbeat sent after the move counts: an earlier report can predate a
+// start the old node was told to make in its previous reply.
+
+const { MemoryLeaseStore } = require('./leaseStore');
+
+const DEFAULTS = {
+  leaseMs: 15000,
+  heartbeatMs: 5000,
+  rebalanceMs: 5000,
+  overloadLoad: 0.9,     // 1-minute load average per core
+  overloadBeats: 3,      // consecutive overloaded heartbeats before shedding
+  minHoldMs: 60000,
+  shedCooldownMs: 120000,
+  maxMovesPerRound: 2,
+};
+
+class Scheduler {
+  // cameraSource: async () => [camera] for every camera that should be running
+  constructor({ store = new MemoryLeaseStore(), cameraSource = async () => [], ...options } = {}) {
+    this.store = store;
+    this.cameraSource = cameraSource;
+    this.options = { ...DEFAULTS, ...options };
+    this.cameras = new Map();  // cameraId -> camera doc, from the last rebalance
+    this.queue = Promise.resolve();
+    this.timer = null;
+    this.unplaced = 0;  // wanted cameras with no capacity, as last logged
+  }
+
+  // Serialise heartbeats and rebalances so they never interleave across awaits
+  exclusive(fn) {
+    const run = this.queue.then(fn, fn);
+    this.queue = run.catch(() => {});
+    return run;
+  }
+
+  start() {
+    if (!this.timer) {
+      this.timer = setInterval(() => {
+        this.exclusive(() => this.rebalance('timer')).catch(err => {
+          console.error('Camera rebalance failed:', err.message);
+        });
+      }, this.options.rebalanceMs);
+      this.timer.unref();
+    }
+    return this;
+  }
+
+  stop() {
+    clearInterval(this.timer);
+    this.timer = null;
+  }
+
+  async hasNodes() {
+    return (await this.liveNodes(Date.now())).length > 0;
+  }
+
+  // report: { node, url, capacity, cores, load, running: [{ camera, port }] }
+  heartbeat(report) {
+    return this.exclusive(async () => {
+      const now = Date.now();
+      const previous = await this.store.getNode(report.node);
+      const load = Number(report.load) || 0;
+      const node = {
+        id: report.node,
+        url: report.url,
+        capacity: Math.max(0, Math.floor(Number(report.capacity) || 0)),
+        cores: report.cores,
+        load,
+        overloadedBeats: load > this.options.overloadLoad ? (previous ? previous.overloadedBeats : 0) + 1 : 0,
+        running: (report.running || []).map(entry => ({ camera: String(entry.camera), port: entry.port })),
+        leaseExpires: now + this.options.leaseMs,
+        lastHeartbeat: now,
+        joinedAt: previous ? previous.joinedAt : now,
+        shedAt: previous ? previous.shedAt : 0,
+      };
+      await this.store.putNode(node);
+
+      if (!previous) {
+        console.log(`Detection node ${node.id} joined (capacity ${node.capacity})`);
+        await this.adopt(node, now);
+        await this.rebalance('join');
+      } else if (node.overloadedBeats >= this.options.overloadBeats) {
+        await this.rebalance('overload');
+      }
+
+      return {
+        leaseMs: this.options.leaseMs,
+        heartbeatMs: this.options.heartbeatMs,
+        assignments: await this.assignmentsFor(node.id, now),
+      };
+    });
+  }
+
+  leave(nodeId) {
+    return this.exclusive(async () => {
+      if (await this.store.deleteNode(nodeId)) {
+        console.log(`Detection node ${nodeId} left`);
+        await this.rebalance('leave');
+      }
+    });
+  }
+
+  // After a coordinator restart the store is empty; keep cameras where they already run
+  async adopt(node, now) {
+    for (const { camera } of node.running) {
+      if (!(await this.store.getAssignment(camera))) {
+        await this.store.putAssignment({ camera, node: node.id, since: now, releasing: null });
+      }
+    }
+  }
+
+  async liveNodes(now) {
+    const nodes = await this.store.listNodes();
+    const live = [];
+    for (const node of nodes) {
+      if (node.leaseExpires > now) {
+        live.push(node);
+      } else {
+        console.warn(`Detection node ${node.id} lease expired`);
+        await this.store.deleteNode(node.id);
+      }
+    }
+    return live;
+  }
+
+  async rebalance(reason) {
+    const now = Date.now();
+    const { maxMovesPerRound, minHoldMs, overloadBeats, overloadLoad, shedCooldownMs } = this.options;
+    const nodes = await this.liveNodes(now);
+    const wanted = await this.cameraSource();
+    this.cameras = new Map(wanted.map(camera => [String(camera._id), camera]));
+
+    const byNode = new Map(nodes.map(node => [node.id, { node, cameras: [] }]));
+    const unassigned = new Set(this.cameras.keys());
+    for (const assignment of await this.store.listAssignments()) {
+      const slot = byNode.get(assignment.node);
+      if (!this.cameras.has(assignment.camera) || !slot) {
+        await this.store.deleteAssignment(assignment.camera);
+        continue;
+      }
+      if (assignment.releasing && !byNode.has(assignment.releasing)) {
+        assignment.releasing = null;  // the old node is gone, nothing to wait for
+        await this.store.putAssignment(assignment);
+      }
+      slot.cameras.push(assignment);
+      unassigned.delete(assignment.camera);
+    }
+
+    const slots = [...byNode.values()];
+    // An overloaded node gives up one camera per round, then has to stay
+    // overloaded for another overloadBeats heartbeats to give up the next
+    slots.forEach(slot => {
+      slot.overloaded = slot.node.overloadedBeats >= overloadBeats;
+      slot.limit = slot.overloaded ? Math.max(0, Math.min(slot.node.capacity, slot.cameras.length - 1)) : slot.node.capacity;
+    });
+    const limit = slot => slot.limit;
+    const utilisation = ({ node, cameras }) => (node.capacity ? cameras.length / node.capacity : Infinity);
+    const hot = slot => slot.node.load > overloadLoad || now - (slot.node.shedAt || 0) < shedCooldownMs;
+    // Least utilised node with room; hot nodes only when allowHot and nothing cooler has room
+    const target = (exclude, allowHot = false) => slots
+      .filter(slot => slot !== exclude && slot.cameras.length < limit(slot) && (allowHot || !hot(slot)))
+      .sort((a, b) => (hot(a) - hot(b)) || (utilisation(a) - utilisation(b)))[0];
+    const move = async (from, assignment, to) => {
+      from.cameras.splice(from.cameras.indexOf(assignment), 1);
+      assignment.releasing = from.node.id;
+      assignment.node = to.node.id;
+      assignment.since = now;
+      to.cameras.push(assignment);
+      await this.store.putAssignment(assignment);
+      console.log(`Camera ${assignment.camera} moving ${from.node.id} -> ${to.node.id} (${reason})`);
+    };
+
+    // Shed cameras from nodes that are over capacity or overloaded
+    let moves = 0;
+    for (const from of slots) {
+      while (from.cameras.length > limit(from) && moves < maxMovesPerRound) {
+        const to = target(from);
+        // A camera still waiting for its previous node to let go can't move again yet
+        const settled = from.cameras.filter(a => !a.releasing);
+        if (!to || !settled.length) break;
+        // Newest assignment first: it has the least state to lose. Cameras
+        // moved within minHoldMs go last, so one camera doesn't bounce around
+        const held = settled.filter(a => now - a.since >= minHoldMs);
+        const assignment = (held.length ? held : settled).reduce((a, b) => (b.since > a.since ? b : a));
+        await move(from, assignment, to);
+        moves += 1;
+        if (from.overloaded) from.node.shedAt = now;
+      }
+      if (from.overloaded && from.cameras.length <= from.limit) {
+        from.node.overloadedBeats = 0;
+        await this.store.putNode(from.node);
+      }
+    }
+
+    // Place cameras that have no live node
+    let unplaced = 0;
+    for (const camera of unassigned) {
+      const to = target(null, true);
+      if (!to) {
+        unplaced += 1;
+        continue;
+      }
+      const assignment = { camera, node: to.node.id, since: now, releasing: null };
+      to.cameras.push(assignment);
+      await this.store.putAssignment(assignment);
+    }
+
+    if (unplaced !== this.unplaced) {
+      if (unplaced) console.warn(`No detection capacity left for ${unplaced} camera(s)`);
+      this.unplaced = unplaced;
+    }
+
+    // Even out utilisation (mostly after a node joins), never onto a hot node
+    while (moves < maxMovesPerRound) {
+      const ordered = slots.filter(slot => slot.node.capacity).sort((a, b) => utilisation(b) - utilisation(a));
+      const from = ordered[0];
+      const to = target(from);
+      if (!from || !to) break;
+      // Only move if it makes things more even, not just different
+      if ((from.cameras.length - 1) / from.node.capacity < (to.cameras.length + 1) / to.node.capacity) break;
+      const movable = from.cameras.filter(a => !a.releasing && now - a.since >= minHoldMs);
+      if (!movable.length) break;
+      await move(from, movable[movable.length - 1], to);
+      moves += 1;
+    }
+  }
+
+  // Cameras a node should run now, with the config it needs to start them
+  async assignmentsFor(nodeId, now) {
+    const assignments = (await this.store.listAssignments()).filter(a => a.node === nodeId);
+    const result = [];
+    for (const assignment of assignments) {
+      if (assignment.releasing) {
+        const old = await this.store.getNode(assignment.releasing);
+        const released = !old || old.leaseExpires <= now ||
+          (old.lastHeartbeat > assignment.since && !old.running.some(r => r.camera === assignment.camera));
+        if (!released) continue;
+        assignment.releasing = null;
+        await this.store.putAssignment(assignment);
+      }
+      const camera = this.cameras.get(assignment.camera);
+      if (camera) result.push({ camera });
+    }
+    return result;
+  }
+
+  // Base URL of the detection service running a camera, or null
+  async endpointFor(cameraId) {
+    const assignment = await this.store.getAssignment(String(cameraId));
+    if (!assignment) return null;
+    const node = await this.store.getNode(assignment.node);
+    const running = node && node.running.find(r => r.camera === assignment.camera);
+    return running ? `${node.url}:${running.port}` : null;
+  }
+
+  async status() {
+    const now = Date.now();
+    const nodes = await this.store.listNodes();
+    const assignments = await this.store.listAssignments();
+    return {
+      nodes: nodes.map(node => ({
+        id: node.id,
+        url: node.url,
+        capacity: node.capacity,
+        load: node.load,
+        overloaded: node.overloadedBeats >= this.options.overloadBeats,
+        leaseExpiresIn: Math.max(0, node.leaseExpires - now),
+        assigned: assignments.filter(a => a.node === node.id).map(a => a.camera),
+        running: node.running.map(r => r.camera),
+      })),
+      unassigned: [...this.cameras.keys()].filter(id => !assignments.some(a => a.camera === id)),
+    };
+  }
+}
+
+module.exports = { Scheduler, DEFAULTS };